@@ -1,6 +1,17 @@
+from . import bitmaps  # noqa
+from . import cache  # noqa
 from . import constants  # noqa
+from . import diffing  # noqa
+from . import export  # noqa
 from . import file_utils  # noqa
+from . import history  # noqa
+from . import incremental  # noqa
 from . import main  # noqa
+from . import normalize  # noqa
+from . import performance  # noqa
+from . import profiling  # noqa
 from . import reporting  # noqa
 from . import rules  # noqa
+from . import sampling  # noqa
+from . import sketches  # noqa
 from . import validator  # noqa
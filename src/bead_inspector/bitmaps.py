@@ -0,0 +1,44 @@
+from typing import Iterator
+
+
+def popcount(bits: int) -> int:
+    """Returns the number of set bits in a non-negative int."""
+    return bin(bits).count("1")
+
+
+class RowBitmap:
+    """A compact set of row indices (one bit per row), used to record which
+    rows fail a validation.
+    """
+
+    def __init__(self, num_rows: int) -> None:
+        self.num_rows = num_rows
+        self.bits = bytearray((num_rows + 7) // 8)
+
+    def add(self, row_index: int) -> None:
+        self.bits[row_index >> 3] |= 1 << (row_index & 7)
+
+    def update(self, other: "RowBitmap") -> None:
+        """Adds every row in other (a bitmap of the same rows) to this one."""
+        union = self.to_int() | other.to_int()
+        self.bits = bytearray(union.to_bytes(len(self.bits), "little"))
+
+    def __contains__(self, row_index: int) -> bool:
+        return bool(self.bits[row_index >> 3] & (1 << (row_index & 7)))
+
+    def __iter__(self) -> Iterator[int]:
+        for byte_index, byte in enumerate(self.bits):
+            if byte == 0:
+                continue
+            for bit in range(8):
+                if byte & (1 << bit):
+                    yield (byte_index << 3) + bit
+
+    def __len__(self) -> int:
+        return popcount(self.to_int())
+
+    def to_int(self) -> int:
+        """Returns the bitmap as an int (bit i set if row i is in the set), for
+        fast unions and intersections of bitmaps.
+        """
+        return int.from_bytes(self.bits, "little")
@@ -0,0 +1,81 @@
+import hashlib
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from bead_inspector.file_utils import DataSource, ZipArchiveMember
+
+try:
+    from bead_inspector._version import version as TOOL_VERSION
+except ImportError:  # pragma: no cover - only when running from a bare checkout
+    TOOL_VERSION = "unknown"
+
+# Bump this whenever a change to the validations (or to the structure of the
+#   cached results) means results cached by earlier code shouldn't be reused.
+SCHEMA_VERSION = 8
+
+HASH_CHUNK_SIZE = 2**20
+
+
+def hash_data_file(file_name: DataSource) -> str:
+    """Returns the sha256 hex digest of a data file's bytes (as stored)."""
+    hasher = hashlib.sha256()
+    if isinstance(file_name, ZipArchiveMember):
+        f = file_name.open()
+    else:
+        f = open(file_name, "rb")
+    with f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+class ResultCache:
+    """An on-disk cache of the validation results for single data files.
+
+    Entries are keyed by the file's content hash, the tool and schema versions,
+    and any setting that changes the results (e.g. single_error_log_limit), so
+    an entry is only ever reused for an identical file validated identically.
+    Each entry is a small JSON file in cache_dir.
+    """
+
+    def __init__(self, cache_dir: Path) -> None:
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(exist_ok=True, parents=True)
+
+    @staticmethod
+    def make_key(data_format: str, file_hash: str, **settings: Any) -> str:
+        key_parts = {
+            "data_format": data_format,
+            "file_hash": file_hash,
+            "tool_version": TOOL_VERSION,
+            "schema_version": SCHEMA_VERSION,
+            "settings": settings,
+        }
+        key_json = json.dumps(key_parts, sort_keys=True)
+        return hashlib.sha256(key_json.encode("utf-8")).hexdigest()
+
+    def _entry_path(self, key: str) -> Path:
+        return self.cache_dir.joinpath(f"{key}.json")
+
+    def get(self, key: str) -> Optional[Dict]:
+        """Returns the cached entry for key, or None if there isn't a (readable)
+        one.
+        """
+        try:
+            with open(self._entry_path(key), "r") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def put(self, key: str, entry: Dict) -> None:
+        entry_path = self._entry_path(key)
+        # Write then rename, so an interrupted run can't leave a partial entry.
+        tmp_path = entry_path.with_suffix(
+            f".{os.getpid()}.{threading.get_ident()}.tmp"
+        )
+        with open(tmp_path, "w") as f:
+            json.dump(entry, f)
+        os.replace(tmp_path, entry_path)
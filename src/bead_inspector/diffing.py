@@ -0,0 +1,149 @@
+import json
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+from bead_inspector.incremental import FAILING_ROW_DETAILS
+
+ISSUE_DIFF_STATUSES = ["fixed", "new", "remaining"]
+
+
+def get_issue_key(issue: Dict) -> Tuple:
+    """Identifies the same issue in the logs of different runs: the file, the
+    kind of issue and the column and/or validation it's about.
+    """
+    details = issue["issue_details"]
+    return (
+        issue["data_format"],
+        issue["issue_type"],
+        details.get("column"),
+        details.get("validation"),
+    )
+
+
+def index_issues(issues: List[Dict]) -> Dict[Tuple, List[Dict]]:
+    """Maps each issue key to the issues with that key (usually just one), in
+    log order.
+    """
+    index = {}
+    for issue in issues:
+        index.setdefault(get_issue_key(issue), []).append(issue)
+    return index
+
+
+def _get_id_key(id_value: Any) -> Hashable:
+    if isinstance(id_value, Hashable):
+        return id_value
+    return json.dumps(id_value, sort_keys=True, default=str)
+
+
+def index_failing_rows(issue: Dict) -> Dict[Hashable, int]:
+    """Maps the id value of each failing row logged for an issue to its row
+    number (the first one, if rows share an id value).
+    """
+    details = issue["issue_details"]
+    index = {}
+    for detail_name in FAILING_ROW_DETAILS:
+        if not isinstance(details.get(detail_name), list):
+            continue
+        for row_number, id_value, _ in details[detail_name]:
+            index.setdefault(_get_id_key(id_value), row_number)
+    return index
+
+
+def summarize_issue(issue: Dict) -> Dict:
+    details = issue["issue_details"]
+    return {
+        "data_format": issue["data_format"],
+        "issue_type": issue["issue_type"],
+        "issue_level": issue["issue_level"],
+        "column": details.get("column"),
+        "validation": details.get("validation"),
+        "total_fails": details.get("total_fails"),
+    }
+
+
+def diff_issue_pair(old_issue: Dict, new_issue: Dict) -> Dict:
+    """Compares the failing rows logged for an issue in two runs, matching
+    them by id value. The comparison only covers every failing row if both
+    logs recorded all of them (see all_rows_compared).
+    """
+    old_rows = index_failing_rows(old_issue)
+    new_rows = index_failing_rows(new_issue)
+    old_details = old_issue["issue_details"]
+    new_details = new_issue["issue_details"]
+    return {
+        **summarize_issue(new_issue),
+        "previous_issue_level": old_issue["issue_level"],
+        "previous_total_fails": old_details.get("total_fails"),
+        "fixed_rows": [
+            [row_number, id_key]
+            for id_key, row_number in old_rows.items()
+            if id_key not in new_rows
+        ],
+        "new_rows": [
+            [row_number, id_key]
+            for id_key, row_number in new_rows.items()
+            if id_key not in old_rows
+        ],
+        "num_remaining_rows": sum(id_key in old_rows for id_key in new_rows),
+        "all_rows_compared": bool(
+            old_details.get("all_fails_recorded", True)
+            and new_details.get("all_fails_recorded", True)
+        ),
+    }
+
+
+def diff_issues(old_issues: List[Dict], new_issues: List[Dict]) -> Dict[str, List]:
+    """Sorts the issues of two runs into those fixed since the old run, those
+    new in the new run, and those remaining in both. Issues are matched by
+    their key (with issues sharing a key matched in log order) and, for
+    remaining issues, failing rows by id value, using dicts as hash indexes so
+    the time taken grows linearly with the size of the logs.
+    """
+    old_index = index_issues(old_issues)
+    new_index = index_issues(new_issues)
+    issue_diff = {status: [] for status in ISSUE_DIFF_STATUSES}
+    for key, old_key_issues in old_index.items():
+        num_new = len(new_index.get(key, []))
+        for old_issue in old_key_issues[num_new:]:
+            issue_diff["fixed"].append(summarize_issue(old_issue))
+    for key, new_key_issues in new_index.items():
+        old_key_issues = old_index.get(key, [])
+        for i, new_issue in enumerate(new_key_issues):
+            if i < len(old_key_issues):
+                issue_diff["remaining"].append(
+                    diff_issue_pair(old_key_issues[i], new_issue)
+                )
+            else:
+                issue_diff["new"].append(summarize_issue(new_issue))
+    return issue_diff
+
+
+def format_issue_diff(
+    issue_diff: Dict[str, List], labels: Optional[Tuple[str, str]] = None
+) -> str:
+    """Returns a plain text summary of an issue diff."""
+    lines = []
+    if labels is not None:
+        old_label, new_label = labels
+        lines.append(f"Comparing the issues in {old_label} to those in {new_label}.")
+    for status in ISSUE_DIFF_STATUSES:
+        lines.append(f"{status.title()} issues: {len(issue_diff[status])}")
+        for entry in issue_diff[status]:
+            description = " :: ".join(
+                str(entry[k])
+                for k in ["data_format", "issue_type", "column", "validation"]
+                if entry[k] is not None
+            )
+            line = f"  - {description} ({entry['issue_level']})"
+            has_rows = status == "remaining" and (
+                entry["fixed_rows"] or entry["new_rows"] or entry["num_remaining_rows"]
+            )
+            if has_rows:
+                line += (
+                    f": {len(entry['fixed_rows'])} failing rows fixed, "
+                    f"{len(entry['new_rows'])} new"
+                )
+                if not entry["all_rows_compared"]:
+                    line += " (of the rows logged)"
+            lines.append(line)
+    return "\n".join(lines)
@@ -0,0 +1,137 @@
+import csv
+import io
+import json
+from pathlib import Path
+from typing import Any, Dict, Tuple
+
+from bead_inspector.bitmaps import RowBitmap
+from bead_inspector.file_utils import (
+    BOMLESS_ENCODINGS,
+    CSVData,
+    open_data_file,
+    split_line_ending,
+)
+
+FAILURE_EXPORT_FORMATS = ["csv", "ndjson"]
+
+
+class FailureExportWriter:
+    """Streams every failing value found while validating a data file to a CSV
+    or NDJSON (one JSON object per line) file, one record at a time, so
+    exporting all failures takes constant memory however many there are.
+    """
+
+    FIELDS = [
+        "data_format",
+        "row_number",
+        "id_value",
+        "issue_level",
+        "validation",
+        "value",
+    ]
+
+    def __init__(self, file_path: Path, export_format: str = "csv") -> None:
+        if export_format not in FAILURE_EXPORT_FORMATS:
+            raise ValueError(
+                f"export_format must be one of {FAILURE_EXPORT_FORMATS}, not "
+                f"'{export_format}'."
+            )
+        self.file_path = Path(file_path)
+        self.export_format = export_format
+        self.num_failures = 0
+        self.file = open(self.file_path, "w", newline="", encoding="utf-8")
+        if export_format == "csv":
+            self.csv_writer = csv.writer(self.file)
+            self.csv_writer.writerow(self.FIELDS)
+
+    def write(
+        self,
+        data_format: str,
+        row_number: int,
+        id_value: Any,
+        issue_level: str,
+        validation: str,
+        value: Any,
+    ) -> None:
+        record = [data_format, row_number, id_value, issue_level, validation, value]
+        if self.export_format == "csv":
+            if isinstance(value, (list, tuple)):
+                record[-1] = json.dumps(value, default=str)
+            self.csv_writer.writerow(record)
+        else:
+            self.file.write(json.dumps(dict(zip(self.FIELDS, record)), default=str))
+            self.file.write("\n")
+        self.num_failures += 1
+
+    def close(self) -> None:
+        self.file.close()
+
+    def __enter__(self) -> "FailureExportWriter":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def _format_csv_field(value: str) -> str:
+    buffer = io.StringIO()
+    csv.writer(buffer, lineterminator="").writerow([value])
+    return buffer.getvalue()
+
+
+def write_valid_and_rejected_rows(
+    csv_data_object: CSVData,
+    failure_bitmaps: Dict[str, RowBitmap],
+    failure_levels: Dict[str, str],
+    valid_path: Path,
+    rejected_path: Path,
+) -> Tuple[int, int]:
+    """Splits the records of a validated file into a file of the records that
+    passed every error-level validation and a file of those that didn't. The
+    file is read once, in order, and each record is copied with its original
+    bytes (and encoding); rejected records get an extra "reasons" column
+    listing the validations they failed. Returns the number of valid and
+    rejected records.
+    """
+    error_labels = [
+        label for label, level in failure_levels.items() if level == "error"
+    ]
+    num_rows = len(csv_data_object.data)
+    rejected_rows = RowBitmap(num_rows)
+    for label in error_labels:
+        rejected_rows.update(failure_bitmaps[label])
+    encoding = BOMLESS_ENCODINGS.get(
+        csv_data_object.encoding, csv_data_object.encoding
+    )
+    row_byte_offsets = csv_data_object.row_byte_offsets
+    num_valid = 0
+    num_rejected = 0
+    with open_data_file(csv_data_object.file_name) as f, open(
+        valid_path, "wb"
+    ) as valid_file, open(rejected_path, "wb") as rejected_file:
+        # Everything before the first record: any BOM and the header (if the
+        #   file has one).
+        preamble = f.read(row_byte_offsets[0])
+        valid_file.write(preamble)
+        header_text = preamble.decode(encoding)
+        if header_text.lstrip("\ufeff") != "":
+            header_text, line_ending = split_line_ending(header_text)
+            header_text = f"{header_text},reasons{line_ending}"
+        rejected_file.write(header_text.encode(encoding))
+        for row_index in range(num_rows):
+            row_length = row_byte_offsets[row_index + 1] - row_byte_offsets[row_index]
+            raw_row = f.read(row_length)
+            if row_index not in rejected_rows:
+                valid_file.write(raw_row)
+                num_valid += 1
+                continue
+            reasons = "; ".join(
+                label
+                for label in error_labels
+                if row_index in failure_bitmaps[label]
+            )
+            row_text, line_ending = split_line_ending(raw_row.decode(encoding))
+            rejected_row = f"{row_text},{_format_csv_field(reasons)}{line_ending}"
+            rejected_file.write(rejected_row.encode(encoding))
+            num_rejected += 1
+    return num_valid, num_rejected
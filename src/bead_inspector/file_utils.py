@@ -1,6 +1,272 @@
+import bz2
 import csv
-from pathlib import Path
-from typing import List, Optional, Tuple
+import gzip
+import io
+import lzma
+import time
+import zipfile
+from array import array
+from pathlib import Path, PurePosixPath
+from typing import (
+    AnyStr,
+    BinaryIO,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    Union,
+)
+
+try:
+    import zstandard
+except ImportError:  # zstd support is optional
+    zstandard = None
+
+
+class ZipArchiveMember:
+    """A minimal pathlib-like handle on one member of a .zip archive, so that
+    a zipped submission can be validated without extracting it to disk.
+
+    Every call to open() opens its own handle on the archive, so members can
+    be read from several threads at once.
+    """
+
+    def __init__(self, archive_path: Union[str, Path], member_name: str):
+        self.archive_path = Path(archive_path)
+        self.member_name = member_name
+
+    @property
+    def name(self) -> str:
+        return PurePosixPath(self.member_name).name
+
+    def is_file(self) -> bool:
+        return not self.member_name.endswith("/")
+
+    def open(self) -> BinaryIO:
+        # The archive's file handle stays open until the member stream closes.
+        with zipfile.ZipFile(self.archive_path) as archive:
+            return archive.open(self.member_name)
+
+    def stat_size(self) -> int:
+        """The (uncompressed) size of the member in bytes."""
+        with zipfile.ZipFile(self.archive_path) as archive:
+            return archive.getinfo(self.member_name).file_size
+
+    def __str__(self) -> str:
+        return f"{self.archive_path}/{self.member_name}"
+
+    def __repr__(self) -> str:
+        return f"ZipArchiveMember({str(self.archive_path)!r}, {self.member_name!r})"
+
+
+def list_zip_archive_members(archive_path: Union[str, Path]) -> List[ZipArchiveMember]:
+    """Lists the file members of a .zip archive (at any depth), skipping
+    directories and macOS resource-fork entries.
+    """
+    with zipfile.ZipFile(archive_path) as archive:
+        member_names = archive.namelist()
+    return [
+        ZipArchiveMember(archive_path, member_name)
+        for member_name in member_names
+        if not member_name.endswith("/")
+        and not member_name.startswith("__MACOSX/")
+        and not PurePosixPath(member_name).name.startswith("._")
+    ]
+
+
+class _DecompressedFile(io.RawIOBase):
+    """Wraps a decompressing stream so that closing it also closes the
+    compressed source it reads from.
+    """
+
+    def __init__(self, decompressed_file: BinaryIO, source_file: BinaryIO):
+        self._decompressed_file = decompressed_file
+        self._source_file = source_file
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        data = self._decompressed_file.read(len(buffer))
+        buffer[: len(data)] = data
+        return len(data)
+
+    def seekable(self) -> bool:
+        return self._decompressed_file.seekable()
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        # Decompressing streams can only seek forwards by reading (and a
+        # backwards seek starts again from the beginning), so this is O(offset).
+        return self._decompressed_file.seek(offset, whence)
+
+    def tell(self) -> int:
+        return self._decompressed_file.tell()
+
+    def close(self) -> None:
+        if not self.closed:
+            try:
+                self._decompressed_file.close()
+            finally:
+                self._source_file.close()
+        super().close()
+
+
+def _open_zstd_stream(source_file: BinaryIO) -> BinaryIO:
+    return zstandard.ZstdDecompressor().stream_reader(source_file, closefd=False)
+
+
+COMPRESSION_OPENERS = {
+    ".gz": lambda source_file: gzip.GzipFile(fileobj=source_file, mode="rb"),
+    ".bz2": lambda source_file: bz2.BZ2File(source_file, mode="rb"),
+    ".xz": lambda source_file: lzma.LZMAFile(source_file, mode="rb"),
+}
+if zstandard is not None:
+    COMPRESSION_OPENERS[".zst"] = _open_zstd_stream
+
+DataSource = Union[str, Path, ZipArchiveMember]
+
+
+def _get_file_name(file_name: DataSource) -> str:
+    if isinstance(file_name, ZipArchiveMember):
+        return file_name.name
+    return Path(file_name).name
+
+
+def get_compression_suffix(file_name: DataSource) -> Optional[str]:
+    """Returns the compression suffix (e.g. '.gz') of a file name, or None if
+    the file isn't compressed in a format we know how to stream.
+    """
+    suffix = PurePosixPath(_get_file_name(file_name)).suffix.lower()
+    if suffix in COMPRESSION_OPENERS:
+        return suffix
+    return None
+
+
+def strip_compression_suffix(file_name: str) -> str:
+    """Maps 'challenges.csv.gz' to 'challenges.csv'."""
+    suffix = get_compression_suffix(file_name)
+    if suffix is None:
+        return file_name
+    return file_name[: -len(suffix)]
+
+
+def list_data_files(data_dir: Path) -> List[DataSource]:
+    """Lists the files in a directory of data files or a .zip archive of them."""
+    if data_dir.is_file() and zipfile.is_zipfile(data_dir):
+        return list_zip_archive_members(data_dir)
+    return [p for p in data_dir.iterdir() if p.is_file()]
+
+
+def get_data_format(file_path: DataSource) -> str:
+    """Maps e.g. 'Challenges.csv' and 'challenges.csv.gz' to 'challenges'."""
+    return strip_compression_suffix(file_path.name.lower()).replace(".csv", "")
+
+
+def map_data_formats_to_paths(
+    data_files: Iterable[DataSource], expected_data_formats: List[str]
+) -> Dict[str, DataSource]:
+    """Maps each expected data format to its file among data_files, raising a
+    ValueError if there's more than one file for a format.
+    """
+    data_format_to_path_map = {}
+    for file_path in sorted(data_files, key=str):
+        data_format = get_data_format(file_path)
+        if data_format not in expected_data_formats:
+            continue
+        if data_format in data_format_to_path_map:
+            raise ValueError(
+                f"Found multiple files for the {data_format} format:\n"
+                f"  - {data_format_to_path_map[data_format]}\n  - {file_path}\n"
+                "Please remove all but one of them and then try again."
+            )
+        data_format_to_path_map[data_format] = file_path
+    return data_format_to_path_map
+
+
+def get_file_size(file_name: DataSource) -> int:
+    """Returns the size of a data file (as stored, i.e. possibly compressed)."""
+    if isinstance(file_name, ZipArchiveMember):
+        return file_name.stat_size()
+    return Path(file_name).stat().st_size
+
+
+def open_data_file(file_name: DataSource) -> BinaryIO:
+    """Opens a data file (or a member of a .zip archive) for binary reading,
+    transparently decompressing it as a stream if it has a supported
+    compression suffix.
+    """
+    if isinstance(file_name, ZipArchiveMember):
+        source_file = file_name.open()
+    else:
+        source_file = open(file_name, "rb")
+    suffix = get_compression_suffix(file_name)
+    if suffix is None:
+        return source_file
+    try:
+        decompressed_file = COMPRESSION_OPENERS[suffix](source_file)
+    except Exception:
+        source_file.close()
+        raise
+    return io.BufferedReader(_DecompressedFile(decompressed_file, source_file))
+
+
+BOM_LENGTHS = {
+    "utf-32-le": 4,
+    "utf-32-be": 4,
+    "utf-16-le": 2,
+    "utf-16-be": 2,
+    "utf-8-sig": 3,
+}
+# The codecs to decode a file with once its BOM (if any) has been skipped.
+BOMLESS_ENCODINGS = {"utf-8-sig": "utf-8"}
+SINGLE_BYTE_ENCODINGS = ["cp1252", "latin1", "iso-8859-1", "ascii"]
+
+
+def _get_encoded_length_func(encoding: str) -> Callable[[str], int]:
+    """Returns a function giving the number of bytes a decoded string took up
+    in the file, used to track byte offsets while parsing decoded text.
+    """
+    if encoding in SINGLE_BYTE_ENCODINGS:
+        return len
+    elif encoding.startswith("utf-32"):
+        return lambda line: 4 * len(line)
+    elif encoding.startswith("utf-16"):
+        return lambda line: len(line.encode("utf-16-le"))
+    elif encoding == "utf-8":
+        return lambda line: len(line) if line.isascii() else len(line.encode(encoding))
+    return lambda line: len(line.encode(encoding))
+
+
+def split_line_ending(text: str) -> Tuple[str, str]:
+    """Splits a record's text into its fields and its line ending (if any)."""
+    for line_ending in ["\r\n", "\n", "\r"]:
+        if text.endswith(line_ending):
+            return text[: -len(line_ending)], line_ending
+    return text, ""
+
+
+def iter_records(lines: Iterable[AnyStr]) -> Iterator[Tuple[AnyStr, int]]:
+    """Yields each record in lines (of bytes or text, e.g. a file opened either
+    way) along with the number of lines it spans. A newline ends a record
+    unless it's inside a quoted field, i.e. unless an odd number of quote
+    characters have been seen in the record so far (escaped quotes come in
+    pairs). This assumes quote characters are only used to quote whole
+    fields, as in RFC 4180.
+    """
+    record_lines = []
+    num_quotes = 0
+    for line in lines:
+        record_lines.append(line)
+        num_quotes += line.count(b'"' if isinstance(line, bytes) else '"')
+        if num_quotes % 2 == 0:
+            yield line[:0].join(record_lines), len(record_lines)
+            record_lines = []
+            num_quotes = 0
+    if len(record_lines) > 0:
+        yield record_lines[0][:0].join(record_lines), len(record_lines)
 
 
 class EmptyFileError(Exception):
@@ -14,17 +280,56 @@ class EmptyFileError(Exception):
 
 
 class CSVData:
-    def __init__(self, file_name: Path, header: Optional[List[str]] = None):
+    READ_CHUNK_SIZE = 2**20
+
+    # How much text to decode when detecting the encoding of a header-only load.
+    HEADER_SAMPLE_SIZE = 2**16
+
+    def __init__(
+        self,
+        file_name: DataSource,
+        header: Optional[List[str]] = None,
+        header_only: bool = False,
+    ):
+        """With header_only=True, only the first record (the header) is read,
+        which is enough for the structural (column name and order) checks.
+        """
         self.file_name = file_name
         if header is None:
             self.header = []
         else:
             self.header = header
+        self.header_only = header_only
         self.data = []
         self.load_file(self.file_name)
 
-    def detect_bom(self, file_name: Path) -> str:
-        with open(file_name, "rb") as f:
+    @classmethod
+    def from_chunk(
+        cls,
+        file_name: DataSource,
+        header: List[str],
+        encoding: str,
+        chunk_bytes: bytes,
+        byte_offset: int = 0,
+    ) -> "CSVData":
+        """Parses a chunk of whole records from a file (given as bytes that
+        start at byte_offset in the file). Row indices and line numbers count
+        from the start of the chunk, while byte offsets are offsets in the file.
+        """
+        csv_data = cls.__new__(cls)
+        csv_data.file_name = file_name
+        csv_data.header = list(header)
+        csv_data.header_only = False
+        csv_data.data = []
+        csv_data.encoding = encoding
+        parse_start = time.perf_counter()
+        csv_data._parse_records(io.BytesIO(chunk_bytes), byte_offset)
+        csv_data.load_timings = {"parsing": time.perf_counter() - parse_start}
+        return csv_data
+
+    @classmethod
+    def detect_bom(cls, file_name: DataSource) -> str:
+        with open_data_file(file_name) as f:
             raw_bytes = f.read(4)
             if raw_bytes.startswith(b"\xff\xfe\x00\x00"):
                 return "utf-32-le"
@@ -39,9 +344,10 @@ class CSVData:
             else:
                 return None
 
+    @classmethod
     def detect_encoding(
-        self,
-        file_name: Path,
+        cls,
+        file_name: DataSource,
         encodings: Tuple = (
             "utf-8",
             "utf-16",
@@ -51,14 +357,24 @@ class CSVData:
             "iso-8859-1",
             "ascii",
         ),
+        sample_size: Optional[int] = None,
     ) -> str:
-        bom_encoding = self.detect_bom(file_name)
+        """Returns the first encoding that can decode the file. If sample_size
+        is given, only that many characters are decoded.
+        """
+        bom_encoding = cls.detect_bom(file_name)
         if bom_encoding is not None:
             encodings = [bom_encoding, *encodings]
         for encoding in encodings:
             try:
-                with open(file_name, encoding=encoding) as f:
-                    f.read()
+                with io.TextIOWrapper(
+                    open_data_file(file_name), encoding=encoding, newline=""
+                ) as f:
+                    if sample_size is not None:
+                        f.read(sample_size)
+                    else:
+                        while f.read(cls.READ_CHUNK_SIZE):
+                            pass
                 return encoding
             except (UnicodeDecodeError, UnicodeError):
                 continue
@@ -67,27 +383,83 @@ class CSVData:
     def load_file(self, file_name):
         """
         Load the CSV file, extract the header, and load the data with row
-          indices.
+          indices. Compressed files are decompressed as a stream while parsing.
+
+        While parsing, this also builds a compact index of each record's
+          starting byte offset (in the decompressed data) and physical line
+          number, so that records whose quoted fields span several lines get
+          exact line numbers, and so the records can be copied out of the file
+          byte for byte in one sequential read (see write_valid_and_rejected_rows).
+          These offsets are not meant for random access: seeking in a gz, bz2,
+          xz or zip source decompresses it again from the start, so each seek
+          costs O(offset).
+
+        The seconds spent detecting the encoding and parsing are recorded in
+          load_timings.
         """
-        encoding = self.detect_encoding(file_name)
-        with open(file_name, mode="rb") as file:
-            raw_data = file.read()
-        if encoding in ("utf-16-le", "utf-16-be", "utf-32-le", "utf-32-be"):
-            if encoding in ["utf-16-be", "utf-16-le"]:
-                raw_data = raw_data[2:]
-            elif encoding in ["utf-32-be", "utf-32-le"]:
-                raw_data = raw_data[4:]
-        decoded_data = raw_data.decode(encoding)
-        csv_reader = csv.reader(decoded_data.splitlines())
-        self._set_header(csv_reader)
-        try:
-            for index, row in enumerate(csv_reader):
-                self.data.append([index] + row)
-        except Exception:
-            print(f"Encountered an error while tring to read in file\n  {file_name}\n")
-            print(f"specifically while reading the line after row number {index}.")
-            print(f"row contents: {row}")
-            raise
+        encoding_start = time.perf_counter()
+        if self.header_only:
+            self.encoding = self.detect_encoding(
+                file_name, sample_size=self.HEADER_SAMPLE_SIZE
+            )
+        else:
+            self.encoding = self.detect_encoding(file_name)
+        parse_start = time.perf_counter()
+        bom_length = BOM_LENGTHS.get(self.encoding, 0)
+        raw_file = open_data_file(file_name)
+        raw_file.read(bom_length)
+        self._parse_records(raw_file, bom_length)
+        self.load_timings = {
+            "encoding_detection": parse_start - encoding_start,
+            "parsing": time.perf_counter() - parse_start,
+        }
+
+    def _parse_records(self, raw_file: BinaryIO, byte_offset: int) -> None:
+        """Parses the records in raw_file (whose first byte is at byte_offset
+        in the data file), reading the header first if it wasn't provided.
+        """
+        file_name = self.file_name
+        self._row_encoding = BOMLESS_ENCODINGS.get(self.encoding, self.encoding)
+        self.row_byte_offsets = array("q")
+        self.row_line_numbers = array("q")
+        encoded_length = _get_encoded_length_func(self._row_encoding)
+        position = {"byte_offset": byte_offset, "line_number": 0}
+
+        def track_position(lines: Iterable[str]) -> Iterator[str]:
+            for line in lines:
+                position["byte_offset"] += encoded_length(line)
+                position["line_number"] += 1
+                yield line
+
+        with io.TextIOWrapper(
+            raw_file, encoding=self._row_encoding, newline=""
+        ) as text_file:
+            csv_reader = csv.reader(track_position(text_file))
+            self._set_header(csv_reader)
+            record_start = (position["byte_offset"], position["line_number"])
+            if self.header_only:
+                csv_reader = iter([])
+            try:
+                for index, row in enumerate(csv_reader):
+                    self.data.append([index] + row)
+                    self.row_byte_offsets.append(record_start[0])
+                    self.row_line_numbers.append(record_start[1] + 1)
+                    record_start = (position["byte_offset"], position["line_number"])
+            except Exception:
+                print(
+                    "Encountered an error while tring to read in file\n  "
+                    f"{file_name}\n"
+                )
+                print(f"specifically while reading the line after row number {index}.")
+                print(f"row contents: {row}")
+                raise
+        # A closing sentinel, so every record's byte range is [start, next_start).
+        self.row_byte_offsets.append(record_start[0])
+        self.num_lines = position["line_number"]
+
+    def get_line_number(self, row_index: int) -> int:
+        """Returns the (1-based) physical line number a record starts on."""
+        return self.row_line_numbers[row_index]
 
     def _set_header(self, csv_reader) -> None:
         if len(self.header) == 0:
@@ -99,11 +471,14 @@ class CSVData:
                     f"No data found in file {self.file_name}, and no header "
                     "provided.",
                 )
+        # The header as read (or provided), before standardization.
+        self.raw_header = list(self.header)
         self._set_index(self.header)
         self.header = [self.index_col] + self.header
         self._standardize_header()
 
-    def _standardize_col_name(self, col_name: str) -> str:
+    @staticmethod
+    def _standardize_col_name(col_name: str) -> str:
         return "_".join(col_name.lower().strip().split())
 
     def _standardize_header(self) -> None:
@@ -0,0 +1,238 @@
+import sqlite3
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from bead_inspector.constants import EXPECTED_ISSUE_LEVELS
+
+HISTORY_WORST_BY = ["label", "validation"]
+
+# Runs are keyed by an autoincrementing run_id (so a later run has a larger
+#   id), and labelled (e.g. with the name of the submission that was checked).
+HISTORY_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    label TEXT NOT NULL,
+    run_time TEXT NOT NULL,
+    data_directory TEXT,
+    issue_log TEXT,
+    duration_seconds REAL,
+    num_issues INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS runs_by_label ON runs (label, run_id);
+CREATE TABLE IF NOT EXISTS run_files (
+    run_id INTEGER NOT NULL REFERENCES runs (run_id),
+    data_format TEXT NOT NULL,
+    file_hash TEXT,
+    row_count INTEGER,
+    rows_with_errors INTEGER,
+    validation_seconds REAL,
+    from_cache INTEGER NOT NULL,
+    PRIMARY KEY (run_id, data_format)
+);
+CREATE INDEX IF NOT EXISTS run_files_by_hash ON run_files (file_hash);
+CREATE TABLE IF NOT EXISTS run_issues (
+    run_id INTEGER NOT NULL REFERENCES runs (run_id),
+    data_format TEXT NOT NULL,
+    issue_type TEXT NOT NULL,
+    issue_level TEXT NOT NULL,
+    column_name TEXT,
+    validation TEXT,
+    total_fails INTEGER
+);
+CREATE INDEX IF NOT EXISTS run_issues_by_run ON run_issues (
+    run_id, issue_level, data_format
+);
+CREATE INDEX IF NOT EXISTS run_issues_by_check ON run_issues (
+    data_format, issue_type, validation, column_name
+);
+"""
+
+
+def check_issue_level(issue_level: str) -> None:
+    if issue_level not in EXPECTED_ISSUE_LEVELS:
+        raise ValueError(
+            f"issue_level must be one of {EXPECTED_ISSUE_LEVELS}, not "
+            f"'{issue_level}'."
+        )
+
+
+class RunHistory:
+    """A SQLite database of the results of validation runs: each run's
+    summary (label, time, duration and number of issues), each data file's
+    hash, row counts and validation time, and the total failing rows of each
+    issue. The tables are indexed for the trend and worst offender queries.
+    """
+
+    def __init__(self, db_path: Path) -> None:
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(exist_ok=True, parents=True)
+        self.connection = sqlite3.connect(str(self.db_path))
+        self.connection.row_factory = sqlite3.Row
+        with self.connection:
+            self.connection.executescript(HISTORY_SCHEMA)
+
+    def __enter__(self) -> "RunHistory":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self.connection.close()
+
+    def record_run(
+        self, run: Dict[str, Any], files: List[Dict[str, Any]], issues: List[Dict]
+    ) -> int:
+        """Records a run (a dict of the runs columns, but for run_id and
+        num_issues), its data files (dicts of the run_files columns, but for
+        run_id) and its issues, in one transaction. Returns the run's id.
+        """
+        with self.connection:
+            cursor = self.connection.execute(
+                "INSERT INTO runs (label, run_time, data_directory, issue_log, "
+                "duration_seconds, num_issues) VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    run["label"],
+                    run["run_time"],
+                    run.get("data_directory"),
+                    run.get("issue_log"),
+                    run.get("duration_seconds"),
+                    len(issues),
+                ),
+            )
+            run_id = cursor.lastrowid
+            self.connection.executemany(
+                "INSERT INTO run_files (run_id, data_format, file_hash, row_count, "
+                "rows_with_errors, validation_seconds, from_cache) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (
+                        run_id,
+                        f["data_format"],
+                        f.get("file_hash"),
+                        f.get("row_count"),
+                        f.get("rows_with_errors"),
+                        f.get("validation_seconds"),
+                        int(f.get("from_cache", False)),
+                    )
+                    for f in files
+                ],
+            )
+            self.connection.executemany(
+                "INSERT INTO run_issues (run_id, data_format, issue_type, "
+                "issue_level, column_name, validation, total_fails) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (
+                        run_id,
+                        issue["data_format"],
+                        issue["issue_type"],
+                        issue["issue_level"],
+                        issue["issue_details"].get("column"),
+                        issue["issue_details"].get("validation"),
+                        issue["issue_details"].get("total_fails"),
+                    )
+                    for issue in issues
+                ],
+            )
+        return run_id
+
+    def get_trend(
+        self,
+        label: str,
+        last: int = 10,
+        issue_level: str = "error",
+        data_format: Optional[str] = None,
+    ) -> List[Dict]:
+        """Returns the number of issues (at issue_level, and for data_format if
+        given) and their total failing rows in each of the last runs with a
+        label, oldest first.
+        """
+        check_issue_level(issue_level)
+        format_filter = ""
+        params = [label, last, issue_level]
+        if data_format is not None:
+            format_filter = "AND i.data_format = ?"
+            params.append(data_format)
+        rows = self.connection.execute(
+            f"""
+            SELECT r.run_id, r.run_time,
+                ROUND(r.duration_seconds, 3) AS duration_seconds,
+                COUNT(i.run_id) AS num_issues,
+                COALESCE(SUM(i.total_fails), 0) AS total_fails
+            FROM (
+                SELECT * FROM runs WHERE label = ? ORDER BY run_id DESC LIMIT ?
+            ) AS r
+            LEFT JOIN run_issues AS i
+                ON i.run_id = r.run_id AND i.issue_level = ? {format_filter}
+            GROUP BY r.run_id
+            ORDER BY r.run_id
+            """,
+            params,
+        )
+        return [dict(row) for row in rows]
+
+    def get_worst_offenders(
+        self, by: str = "label", top: int = 10, issue_level: str = "error"
+    ) -> List[Dict]:
+        """Ranks, in the latest run of each label, either the labels (by="label")
+        by their total failing rows at issue_level, or the checks
+        (by="validation", i.e. each file, issue type, column and validation) by
+        the number of labels whose latest run failed them.
+        """
+        if by not in HISTORY_WORST_BY:
+            raise ValueError(f"by must be one of {HISTORY_WORST_BY}, not '{by}'.")
+        check_issue_level(issue_level)
+        latest_runs = (
+            "WITH latest AS (SELECT label, MAX(run_id) AS run_id FROM runs "
+            "GROUP BY label)"
+        )
+        if by == "label":
+            query = f"""
+                {latest_runs}
+                SELECT latest.label, runs.run_time,
+                    COUNT(i.run_id) AS num_issues,
+                    COALESCE(SUM(i.total_fails), 0) AS total_fails
+                FROM latest
+                JOIN runs ON runs.run_id = latest.run_id
+                LEFT JOIN run_issues AS i
+                    ON i.run_id = latest.run_id AND i.issue_level = ?
+                GROUP BY latest.label
+                ORDER BY total_fails DESC, num_issues DESC, latest.label
+                LIMIT ?
+            """
+        else:
+            query = f"""
+                {latest_runs}
+                SELECT i.data_format, i.issue_type, i.column_name, i.validation,
+                    COUNT(DISTINCT latest.label) AS num_labels,
+                    COALESCE(SUM(i.total_fails), 0) AS total_fails
+                FROM latest
+                JOIN run_issues AS i
+                    ON i.run_id = latest.run_id AND i.issue_level = ?
+                GROUP BY i.data_format, i.issue_type, i.column_name, i.validation
+                ORDER BY num_labels DESC, total_fails DESC
+                LIMIT ?
+            """
+        rows = self.connection.execute(query, [issue_level, top])
+        return [dict(row) for row in rows]
+
+
+def format_history_table(rows: List[Dict]) -> str:
+    """Lays out the results of a history query as a plain text table."""
+    if len(rows) == 0:
+        return "No runs found."
+    headers = list(rows[0].keys())
+    cells = [
+        ["" if row[h] is None else str(row[h]) for h in headers] for row in rows
+    ]
+    widths = [
+        max(len(h), *(len(row_cells[i]) for row_cells in cells))
+        for i, h in enumerate(headers)
+    ]
+    lines = ["  ".join(h.ljust(w) for h, w in zip(headers, widths)).rstrip()]
+    for row_cells in cells:
+        lines.append(
+            "  ".join(c.ljust(w) for c, w in zip(row_cells, widths)).rstrip()
+        )
+    return "\n".join(lines)
@@ -0,0 +1,291 @@
+import csv
+import hashlib
+import io
+import zlib
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from bead_inspector.file_utils import (
+    BOM_LENGTHS,
+    BOMLESS_ENCODINGS,
+    SINGLE_BYTE_ENCODINGS,
+    DataSource,
+    iter_records,
+    open_data_file,
+)
+from bead_inspector.sampling import get_sample_key, merge_failing_rows
+from bead_inspector.sketches import SpaceSaving, merge_value_counters
+
+# Chunk boundaries are found by scanning raw bytes for newlines and quote
+#   characters, which only works for encodings where those bytes can't be part
+#   of another character.
+CHUNKABLE_ENCODINGS = ["utf-8", *SINGLE_BYTE_ENCODINGS]
+
+# A chunk ends after a record whose crc32 has its low bits all zero (so on
+#   average one record in AVERAGE_CHUNK_RECORDS ends a chunk), subject to these
+#   minimum and maximum chunk sizes.
+AVERAGE_CHUNK_RECORDS = 2**12
+MIN_CHUNK_RECORDS = AVERAGE_CHUNK_RECORDS // 4
+MAX_CHUNK_RECORDS = AVERAGE_CHUNK_RECORDS * 8
+
+# How many bytes of a file are hashed at a time when fingerprinting it.
+FINGERPRINT_READ_SIZE = 2**20
+
+# The issue_details entries holding failing rows, each of which starts with the
+#   row's line number.
+FAILING_ROW_DETAILS = [
+    "failing_rows_and_values",
+    "rows_where_column_is_null",
+    "number_of_rows_without_enough_columns",
+]
+
+
+class RecordChunk:
+    def __init__(self, byte_offset: int, chunk_bytes: bytes, num_records: int):
+        self.byte_offset = byte_offset
+        self.chunk_bytes = chunk_bytes
+        self.num_records = num_records
+        self.digest = hashlib.sha256(chunk_bytes).hexdigest()
+
+
+def can_chunk(encoding: str) -> bool:
+    return BOMLESS_ENCODINGS.get(encoding, encoding) in CHUNKABLE_ENCODINGS
+
+
+def read_header_record(
+    file_name: DataSource, encoding: str
+) -> Tuple[Optional[List[str]], int, int]:
+    """Returns the header of a file as parsed from its first record, the byte
+    offset the data records start at, and the number of lines the header spans.
+    The header is None if the file is empty.
+    """
+    bom_length = BOM_LENGTHS.get(encoding, 0)
+    with open_data_file(file_name) as f:
+        f.read(bom_length)
+        header_bytes, _ = next(iter_records(f), (b"", 0))
+    if len(header_bytes) == 0:
+        return None, bom_length, 0
+    header_text = header_bytes.decode(BOMLESS_ENCODINGS.get(encoding, encoding))
+    header = next(csv.reader(io.StringIO(header_text, newline="")))
+    num_lines = sum(1 for _ in io.StringIO(header_text, newline=""))
+    return header, bom_length + len(header_bytes), num_lines
+
+
+def iter_record_chunks(
+    file_name: DataSource,
+    byte_offset: int,
+    average_chunk_records: Optional[int] = None,
+    min_chunk_records: Optional[int] = None,
+    max_chunk_records: Optional[int] = None,
+) -> Iterator[RecordChunk]:
+    """Splits the records of a file (starting at byte_offset) into chunks with
+    content-defined boundaries: whether a record ends a chunk depends only on
+    that record's bytes, so inserting or editing rows only changes the chunks
+    around those rows, and later chunks keep their contents (and hashes).
+    """
+    boundary_mask = (average_chunk_records or AVERAGE_CHUNK_RECORDS) - 1
+    min_chunk_records = min_chunk_records or MIN_CHUNK_RECORDS
+    max_chunk_records = max_chunk_records or MAX_CHUNK_RECORDS
+    with open_data_file(file_name) as f:
+        f.seek(byte_offset)
+        chunk_start = byte_offset
+        chunk_records = []
+        for record, _ in iter_records(f):
+            chunk_records.append(record)
+            num_records = len(chunk_records)
+            if num_records >= max_chunk_records or (
+                num_records >= min_chunk_records
+                and zlib.crc32(record) & boundary_mask == 0
+            ):
+                chunk = RecordChunk(chunk_start, b"".join(chunk_records), num_records)
+                chunk_start += len(chunk.chunk_bytes)
+                chunk_records = []
+                yield chunk
+        if len(chunk_records) > 0:
+            yield RecordChunk(chunk_start, b"".join(chunk_records), len(chunk_records))
+
+
+def split_complete_records(data: bytes) -> Tuple[bytes, bytes]:
+    """Splits data into its complete records (each ending with a newline) and
+    any incomplete record at the end (e.g. one still being written).
+    """
+    records = [record for record, _ in iter_records(io.BytesIO(data))]
+    if len(records) > 0:
+        last_record = records[-1]
+        if not last_record.endswith(b"\n") or last_record.count(b'"') % 2 == 1:
+            return data[: len(data) - len(last_record)], last_record
+    return data, b""
+
+
+def fingerprint_file_prefix(file_name: DataSource, end_offset: int) -> str:
+    """Returns a hash of the first end_offset bytes of a file, used to check
+    that a file has only been appended to since it was last validated (any
+    change to those bytes changes the hash).
+    """
+    hasher = hashlib.sha256(str(end_offset).encode())
+    with open_data_file(file_name) as f:
+        num_left = end_offset
+        while num_left > 0:
+            data = f.read(min(FINGERPRINT_READ_SIZE, num_left))
+            if len(data) == 0:
+                break
+            hasher.update(data)
+            num_left -= len(data)
+    return hasher.hexdigest()
+
+
+def read_file_tail(file_name: DataSource, byte_offset: int) -> bytes:
+    with open_data_file(file_name) as f:
+        f.seek(byte_offset)
+        return f.read()
+
+
+def merkle_root(digests: List[str]) -> str:
+    """Returns the root hash of a Merkle tree over the given leaf digests."""
+    level = [bytes.fromhex(d) for d in digests]
+    if len(level) == 0:
+        return hashlib.sha256(b"").hexdigest()
+    while len(level) > 1:
+        if len(level) % 2 == 1:
+            level.append(level[-1])
+        level = [
+            hashlib.sha256(level[i] + level[i + 1]).digest()
+            for i in range(0, len(level), 2)
+        ]
+    return level[0].hex()
+
+
+def is_row_level_issue(issue: Dict) -> bool:
+    """Row-level issues are built up from the rows of a file (and so differ
+    between chunks); all other issues only depend on the file's header.
+    """
+    details = issue["issue_details"]
+    return "total_fails" in details or "row_number" in details
+
+
+def rebase_issues(issues: List[Dict], line_offset: int) -> List[Dict]:
+    """Shifts the line numbers of the failing rows in issues found in a chunk
+    by the lines that come before the chunk.
+    """
+    rebased_issues = []
+    for issue in issues:
+        details = dict(issue["issue_details"])
+        if "row_number" in details:
+            details["row_number"] += line_offset
+        for detail_name in FAILING_ROW_DETAILS:
+            if isinstance(details.get(detail_name), list):
+                details[detail_name] = [
+                    (row_number + line_offset, id_value, value)
+                    for row_number, id_value, value in details[detail_name]
+                ]
+        rebased_issues.append({**issue, "issue_details": details})
+    return rebased_issues
+
+
+def _get_merge_key(issue: Dict) -> Tuple:
+    details = issue["issue_details"]
+    return (
+        issue["issue_type"],
+        issue["issue_level"],
+        details.get("column"),
+        details.get("validation"),
+    )
+
+
+def merge_chunk_issues(
+    chunk_issues: List[List[Dict]],
+    single_error_log_limit: int,
+    get_issue_position: Callable[[Dict], Tuple],
+) -> List[Dict]:
+    """Merges the (rebased) row-level issues found in each chunk of a file, in
+    file order, into the issues a validation of the whole file would find.
+    The most common invalid values are merged from the sketches saved in
+    each chunk's issues (their invalid_value_counters), rather than from
+    just the top few values each chunk recorded.
+    """
+    merged = {}
+    for issues in chunk_issues:
+        for issue in issues:
+            if "total_fails" not in issue["issue_details"]:
+                # Issues about a single row (e.g. column_dtype_validation_misc).
+                merged[(len(merged),)] = issue
+                continue
+            key = _get_merge_key(issue)
+            if key not in merged:
+                merged[key] = {**issue, "issue_details": dict(issue["issue_details"])}
+                continue
+            details = merged[key]["issue_details"]
+            for detail_name, value in issue["issue_details"].items():
+                if detail_name in ["total_fails", "number_of_uncastable_values"]:
+                    details[detail_name] += value
+                elif detail_name in FAILING_ROW_DETAILS:
+                    details[detail_name] = merge_failing_rows(
+                        details[detail_name],
+                        value,
+                        single_error_log_limit,
+                        seed=details.get("failure_sampling_seed"),
+                        sample_key=get_sample_key(
+                            issue["issue_type"],
+                            details.get("column"),
+                            details.get("validation"),
+                        ),
+                    )
+            if "invalid_value_counters" in details:
+                details["invalid_value_counters"] = merge_value_counters(
+                    [
+                        details["invalid_value_counters"],
+                        issue["issue_details"]["invalid_value_counters"],
+                    ]
+                )
+                details.update(
+                    SpaceSaving.from_state(
+                        details["invalid_value_counters"]
+                    ).get_details()
+                )
+    for issue in merged.values():
+        details = issue["issue_details"]
+        if "all_fails_recorded" in details:
+            details["all_fails_recorded"] = (
+                details["total_fails"] <= single_error_log_limit
+            )
+    return sorted(
+        merged.values(),
+        key=lambda issue: (issue["issue_type"], get_issue_position(issue)),
+    )
+
+
+def drop_value_counters(issues: List[Dict]) -> List[Dict]:
+    """Drops the saved sketches of invalid values (only needed for merging the
+    issues of chunks) from the details of issues.
+    """
+    return [
+        {
+            **issue,
+            "issue_details": {
+                detail_name: value
+                for detail_name, value in issue["issue_details"].items()
+                if detail_name != "invalid_value_counters"
+            },
+        }
+        for issue in issues
+    ]
+
+
+def merge_row_error_stats(row_error_stats: List[Optional[Dict]]) -> Optional[Dict]:
+    """Merges the row error stats of chunks of a file (or returns None if any
+    chunk's row failures weren't tracked). Chunks don't share rows, so every
+    stat is just a sum over chunks.
+    """
+    if None in row_error_stats:
+        return None
+    co_failures = {}
+    merged = {"rows_with_errors": 0, "rows_with_only_info_issues": 0}
+    for stats in row_error_stats:
+        merged["rows_with_errors"] += stats["rows_with_errors"]
+        merged["rows_with_only_info_issues"] += stats["rows_with_only_info_issues"]
+        for label, other_label, num_rows in stats["co_failures"]:
+            key = (label, other_label)
+            co_failures[key] = co_failures.get(key, 0) + num_rows
+    merged["co_failures"] = [
+        [*labels, num_rows] for labels, num_rows in sorted(co_failures.items())
+    ]
+    return merged
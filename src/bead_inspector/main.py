@@ -1,6 +1,16 @@
 import argparse
+import json
+import sys
 from pathlib import Path
+from typing import List
 
+from bead_inspector.constants import EXPECTED_ISSUE_LEVELS
+from bead_inspector.diffing import diff_issues, format_issue_diff
+from bead_inspector.export import FAILURE_EXPORT_FORMATS
+from bead_inspector.history import HISTORY_WORST_BY, RunHistory, format_history_table
+from bead_inspector.normalize import NORMALIZERS, fix_data_files
+from bead_inspector.reporting import ReportGenerator, read_issue_log
+from bead_inspector.sampling import FAILURE_SAMPLING_MODES
 from bead_inspector.validator import BEADChallengeDataValidator
 
 
@@ -11,10 +21,184 @@ def check_int(value: str) -> int:
         raise argparse.ArgumentTypeError(f"Invalid integer value: '{value}'")
 
 
+def fix_main(argv: List[str]) -> None:
+    parser = argparse.ArgumentParser(
+        prog="bead_inspector fix",
+        description=(
+            "Write fixed copies of NTIA data files, correcting common mechanical "
+            "errors (e.g. 20230701 -> 2023-07-01), and log every change."
+        ),
+    )
+    parser.add_argument(
+        "directory",
+        type=str,
+        help="The directory (or .zip archive) to check for the files.",
+    )
+    parser.add_argument(
+        "--files",
+        nargs="*",
+        default="*",
+        help="List of files (without .csv) to fix.",
+    )
+    parser.add_argument(
+        "--output_dir",
+        default=None,
+        help=(
+            "A dir to write the fixed files and change logs to (defaults to a "
+            "fixed/ dir in the data directory, or next to a .zip archive)."
+        ),
+    )
+    parser.add_argument(
+        "--normalizers",
+        nargs="*",
+        default=list(NORMALIZERS.keys()),
+        choices=list(NORMALIZERS.keys()),
+        help="The kinds of fixes to make (defaults to all of them).",
+    )
+    args = parser.parse_args(argv)
+    fix_data_files(
+        data_directory=Path(args.directory).resolve(),
+        output_dir=args.output_dir,
+        expected_data_formats=args.files,
+        normalizer_names=args.normalizers,
+    )
+
+
+def diff_main(argv: List[str]) -> None:
+    parser = argparse.ArgumentParser(
+        prog="bead_inspector diff",
+        description=(
+            "Compare the issue logs of two runs (e.g. of a submission and its "
+            "revision): which issues were fixed, which are new and which remain."
+        ),
+    )
+    parser.add_argument("old_log", type=str, help="The issue log of the earlier run.")
+    parser.add_argument("new_log", type=str, help="The issue log of the later run.")
+    parser.add_argument(
+        "--output",
+        default=None,
+        help="A file to write the diff to, as JSON.",
+    )
+    parser.add_argument(
+        "--report",
+        action="store_true",
+        help=(
+            "Also write a report of the later run with a section on the changes "
+            "since the earlier one, next to (not over) the later run's report."
+        ),
+    )
+    args = parser.parse_args(argv)
+    old_issues, _ = read_issue_log(Path(args.old_log))
+    new_issues, new_metadata = read_issue_log(Path(args.new_log))
+    issue_diff = diff_issues(old_issues, new_issues)
+    print(format_issue_diff(issue_diff, labels=(args.old_log, args.new_log)))
+    if args.output is not None:
+        with open(args.output, "w") as f:
+            json.dump(issue_diff, f, indent=4)
+    if args.report:
+        ReportGenerator(
+            Path(args.new_log),
+            overwrite_report=True,
+            issues=new_issues,
+            log_metadata=new_metadata,
+            layout=new_metadata.get("report_layout", "single"),
+            previous_issues_file_path=Path(args.old_log),
+            report_name_suffix="_changes",
+        )
+
+
+def history_main(argv: List[str]) -> None:
+    parser = argparse.ArgumentParser(
+        prog="bead_inspector history",
+        description="Query the run history recorded with --history_db.",
+    )
+    parser.add_argument("history_db", type=str, help="The run history database.")
+    subparsers = parser.add_subparsers(dest="query", required=True)
+    trend_parser = subparsers.add_parser(
+        "trend",
+        help="The issue counts of the last runs with a label.",
+    )
+    trend_parser.add_argument("label", type=str, help="The label of the runs.")
+    trend_parser.add_argument(
+        "--last",
+        default=10,
+        type=check_int,
+        help="The number of runs to show.",
+    )
+    trend_parser.add_argument(
+        "--data_format",
+        default=None,
+        help="Only count the issues of this data format.",
+    )
+    worst_parser = subparsers.add_parser(
+        "worst",
+        help=(
+            "The labels whose latest runs have the most failing rows, or the "
+            "checks failed by the most labels."
+        ),
+    )
+    worst_parser.add_argument(
+        "--by",
+        default="label",
+        choices=HISTORY_WORST_BY,
+        help="Whether to rank labels or checks.",
+    )
+    worst_parser.add_argument(
+        "--top",
+        default=10,
+        type=check_int,
+        help="The number of labels or checks to show.",
+    )
+    for query_parser in [trend_parser, worst_parser]:
+        query_parser.add_argument(
+            "--issue_level",
+            default="error",
+            choices=EXPECTED_ISSUE_LEVELS,
+            help="Only count issues of this level.",
+        )
+    args = parser.parse_args(argv)
+    if not Path(args.history_db).is_file():
+        parser.error(f"No run history database at {args.history_db}.")
+    with RunHistory(Path(args.history_db)) as history:
+        if args.query == "trend":
+            rows = history.get_trend(
+                args.label,
+                last=args.last,
+                issue_level=args.issue_level,
+                data_format=args.data_format,
+            )
+        else:
+            rows = history.get_worst_offenders(
+                by=args.by, top=args.top, issue_level=args.issue_level
+            )
+    print(format_history_table(rows))
+
+
+MODE_MAINS = {"fix": fix_main, "diff": diff_main, "history": history_main}
+
+
 def main():
-    parser = argparse.ArgumentParser(description="Validate NTIA Data.")
+    # A data directory (or archive) that happens to share a mode's name is
+    #   validated, not taken for that mode.
+    if (
+        len(sys.argv) > 1
+        and sys.argv[1] in MODE_MAINS
+        and not Path(sys.argv[1]).exists()
+    ):
+        MODE_MAINS[sys.argv[1]](sys.argv[2:])
+        return
+    parser = argparse.ArgumentParser(
+        description="Validate NTIA Data.",
+        epilog=(
+            "Run 'bead_inspector fix -h' for the mode that fixes common errors, "
+            "'bead_inspector diff -h' for the mode that compares two runs, and "
+            "'bead_inspector history -h' for querying the run history."
+        ),
+    )
     parser.add_argument(
-        "directory", type=str, help="The directory to check for the files."
+        "directory",
+        type=str,
+        help="The directory (or .zip archive) to check for the files.",
     )
     parser.add_argument(
         "--files",
@@ -25,7 +209,10 @@ def main():
     parser.add_argument(
         "--results_dir",
         default=None,
-        help="A dir to logs issues to (rather than printing to console).",
+        help=(
+            "A dir to write the logs/ and reports/ subdirectories to (defaults to "
+            "the data directory, or the directory containing a .zip archive)."
+        ),
     )
     parser.add_argument(
         "-s",
@@ -34,6 +221,119 @@ def main():
         type=check_int,
         help="Max number of issue-causing records to log.",
     )
+    parser.add_argument(
+        "--max_workers",
+        default=1,
+        type=check_int,
+        help="Number of data files to validate in parallel.",
+    )
+    parser.add_argument(
+        "--on_structure_failure",
+        default="continue",
+        choices=BEADChallengeDataValidator.STRUCTURE_FAILURE_ACTIONS,
+        help=(
+            "What to do with files that fail the column name/order checks: "
+            "'continue' validating them fully, 'skip' their row-level checks, "
+            "or 'abort' the row-level checks for every file."
+        ),
+    )
+
+    parser.add_argument(
+        "--cache_dir",
+        default=None,
+        help=(
+            "A dir to cache validation results in. Files that haven't changed "
+            "since an earlier run with the same cache_dir aren't revalidated."
+        ),
+    )
+    parser.add_argument(
+        "--append_only",
+        action="store_true",
+        help=(
+            "Only validate the records appended to files since the last run "
+            "(needs --cache_dir)."
+        ),
+    )
+    parser.add_argument(
+        "--export_failures",
+        default=None,
+        help=(
+            "A dir to export every failing value to, in one "
+            "<format>_failures file per data format."
+        ),
+    )
+    parser.add_argument(
+        "--export_format",
+        default="csv",
+        choices=FAILURE_EXPORT_FORMATS,
+        help="The file format for --export_failures.",
+    )
+    parser.add_argument(
+        "--split_output",
+        default=None,
+        help=(
+            "A dir to write <format>.valid.csv and <format>.rejected.csv files "
+            "to, splitting each file's records by whether they passed every "
+            "error-level check."
+        ),
+    )
+    parser.add_argument(
+        "--row_stats",
+        action="store_true",
+        help=(
+            "Track every failing row, to report the number of rows with errors "
+            "and the checks failing on the same rows."
+        ),
+    )
+    parser.add_argument(
+        "--failure_sampling",
+        default="first",
+        choices=FAILURE_SAMPLING_MODES,
+        help=(
+            "Which failing rows to log for each issue: the first ones, or the "
+            "first few and a random sample of the rest."
+        ),
+    )
+    parser.add_argument(
+        "--sampling_seed",
+        type=check_int,
+        default=0,
+        help="The seed for --failure_sampling reservoir.",
+    )
+    parser.add_argument(
+        "--log_format",
+        default="json",
+        choices=BEADChallengeDataValidator.ISSUE_LOG_FORMATS,
+        help=(
+            "The format of the issue log. An ndjson (or gzipped ndjson.gz) log "
+            "has each file's issues appended as soon as it's validated."
+        ),
+    )
+    parser.add_argument(
+        "--report_layout",
+        default="single",
+        choices=ReportGenerator.REPORT_LAYOUTS,
+        help=(
+            "Write the report as a single HTML file, or as a directory of pages "
+            "(an index, plus a page per file and per very large issue)."
+        ),
+    )
+    parser.add_argument(
+        "--history_db",
+        default=None,
+        help=(
+            "A SQLite database to record the run in (its summary, file hashes, "
+            "timings and issue totals), for 'bead_inspector history' queries."
+        ),
+    )
+    parser.add_argument(
+        "--history_label",
+        default=None,
+        help=(
+            "The label to record the run under (defaults to the name of the "
+            "directory or archive)."
+        ),
+    )
 
     args = parser.parse_args()
 
@@ -43,6 +343,20 @@ def main():
         expected_data_formats=args.files,
         results_dir=args.results_dir,
         single_error_log_limit=args.single_error_log_limit,
+        max_workers=args.max_workers,
+        on_structure_failure=args.on_structure_failure,
+        cache_dir=args.cache_dir,
+        append_only=args.append_only,
+        export_failures_dir=args.export_failures,
+        export_format=args.export_format,
+        split_output_dir=args.split_output,
+        failure_sampling=args.failure_sampling,
+        sampling_seed=args.sampling_seed,
+        log_format=args.log_format,
+        report_layout=args.report_layout,
+        history_db=args.history_db,
+        history_label=args.history_label,
+        row_stats=args.row_stats,
     )
 
 
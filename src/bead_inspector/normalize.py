@@ -0,0 +1,340 @@
+import csv
+import datetime as dt
+import io
+import re
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple, Union
+
+from bead_inspector import constants, validator
+from bead_inspector.file_utils import (
+    BOM_LENGTHS,
+    BOMLESS_ENCODINGS,
+    CSVData,
+    DataSource,
+    iter_records,
+    list_data_files,
+    map_data_formats_to_paths,
+    open_data_file,
+    split_line_ending,
+)
+
+# Changed records are revalidated in batches of this many records, so only one
+#   batch of them is held in memory at a time.
+REVALIDATION_BATCH_RECORDS = 2**12
+
+CHANGE_LOG_FIELDS = [
+    "row_number",
+    "id_value",
+    "column",
+    "original_value",
+    "fixed_value",
+    "normalizers",
+    "remaining_failures",
+]
+
+
+def normalize_compact_date(value: str) -> str:
+    """Maps e.g. '20230701' to '2023-07-01'."""
+    value = value.strip()
+    if re.match(r"^\d{8}$", value):
+        try:
+            return dt.datetime.strptime(value, "%Y%m%d").strftime("%Y-%m-%d")
+        except ValueError:
+            pass
+    return value
+
+
+def strip_whitespace(value: str) -> str:
+    return value.strip()
+
+
+def uppercase(value: str) -> str:
+    return value.upper()
+
+
+def pad_zip_code(value: str) -> str:
+    """Restores the leading zeros of a zip code that was stored as a number,
+    e.g. '2134' -> '02134'.
+    """
+    value = value.strip()
+    if re.match(r"^\d{3,4}$", value):
+        return value.zfill(5)
+    return value
+
+
+def pad_coordinate_precision(value: str) -> str:
+    """Writes a coordinate with fewer than 6 decimal digits with exactly 6,
+    e.g. '41.8' -> '41.800000'.
+    """
+    value = value.strip()
+    if re.match(r"^-?\d+(\.\d{0,5})?$", value):
+        return f"{float(value):.6f}"
+    return value
+
+
+def _is_enum_validation(validation: constants.Validator) -> bool:
+    return isinstance(validation, type) and issubclass(
+        validation, constants.ValidatorEnum
+    )
+
+
+# Each normalizer is applied to the (string-typed) columns whose validation
+#   passes the check, in this order.
+NORMALIZERS = {
+    "compact_dates": (
+        normalize_compact_date,
+        lambda v: v in [constants.DateValidator, constants.DateNullableValidator],
+    ),
+    "enum_whitespace": (strip_whitespace, _is_enum_validation),
+    "enum_case": (uppercase, _is_enum_validation),
+    "zip_leading_zeros": (
+        pad_zip_code,
+        lambda v: v is constants.ZipNullableValidator,
+    ),
+    "coordinate_precision": (
+        pad_coordinate_precision,
+        lambda v: v
+        in [
+            constants.LatitudeNullableValidator,
+            constants.LongitudeNullableValidator,
+        ],
+    ),
+}
+
+
+class ColumnNormalizer:
+    def __init__(
+        self,
+        column_name: str,
+        validation: constants.Validator,
+        normalizers: List[Tuple[str, Callable[[str], str]]],
+    ):
+        self.column_name = column_name
+        self.validate = validation.validator()
+        self.normalizers = normalizers
+
+    def fix(self, value: str) -> Tuple[str, List[str]]:
+        """Returns the fixed value and the names of the normalizers that fixed
+        it. Values are only changed if they fail the column's validation and
+        the normalized value passes it.
+        """
+        if self.validate(value):
+            return value, []
+        fixed_value = value
+        applied = []
+        for name, normalizer in self.normalizers:
+            normalized_value = normalizer(fixed_value)
+            if normalized_value != fixed_value:
+                fixed_value = normalized_value
+                applied.append(name)
+        if len(applied) > 0 and self.validate(fixed_value):
+            return fixed_value, applied
+        return value, []
+
+
+class DataFileNormalizer:
+    """Streams a data file through the normalizers for its data format,
+    writing a fixed copy of the file and a log of every changed value, then
+    revalidates just the changed records. Only one record (plus a batch of
+    changed records awaiting revalidation) is held in memory at a time.
+    """
+
+    def __init__(
+        self,
+        data_format: str,
+        file_path: DataSource,
+        output_dir: Path,
+        normalizer_names: Optional[List[str]] = None,
+    ):
+        if normalizer_names is None:
+            normalizer_names = list(NORMALIZERS.keys())
+        unknown_names = [n for n in normalizer_names if n not in NORMALIZERS]
+        if len(unknown_names) > 0:
+            raise ValueError(
+                f"Unknown normalizers {unknown_names}; expected some of "
+                f"{list(NORMALIZERS.keys())}."
+            )
+        self.data_format = data_format
+        self.file_path = file_path
+        self.output_dir = Path(output_dir)
+        self.normalizer_names = normalizer_names
+        self.data_validator_cls = (
+            validator.BEADChallengeDataValidator.DATA_FORMAT_VALIDATORS[data_format]
+        )
+        self.stats = {
+            "rows_read": 0,
+            "rows_changed": 0,
+            "values_changed": 0,
+            "changed_rows_still_failing": 0,
+        }
+
+    @property
+    def fixed_file_path(self) -> Path:
+        return self.output_dir.joinpath(f"{self.data_format}.csv")
+
+    @property
+    def change_log_path(self) -> Path:
+        return self.output_dir.joinpath(f"{self.data_format}_changes.csv")
+
+    def _get_column_normalizers(
+        self, header: List[str]
+    ) -> Dict[int, ColumnNormalizer]:
+        column_dtypes = self.data_validator_cls.COLUMN_DTYPES
+        column_normalizers = {}
+        for column_validation in self.data_validator_cls.COLUMN_VALIDATIONS:
+            column_name = column_validation.column_name
+            if column_dtypes.get(column_name) is not str or column_name not in header:
+                continue
+            normalizers = [
+                (name, NORMALIZERS[name][0])
+                for name in self.normalizer_names
+                if NORMALIZERS[name][1](column_validation.validation)
+            ]
+            if len(normalizers) > 0:
+                column_normalizers[header.index(column_name)] = ColumnNormalizer(
+                    column_name, column_validation.validation, normalizers
+                )
+        return column_normalizers
+
+    def run(self) -> Dict[str, int]:
+        self.output_dir.mkdir(exist_ok=True, parents=True)
+        self.encoding = CSVData.detect_encoding(self.file_path)
+        row_encoding = BOMLESS_ENCODINGS.get(self.encoding, self.encoding)
+        bom_length = BOM_LENGTHS.get(self.encoding, 0)
+        csv_header = self.data_validator_cls.CSV_HEADER
+        with open_data_file(self.file_path) as raw_file, open(
+            self.fixed_file_path, "wb"
+        ) as fixed_file, open(
+            self.change_log_path, "w", newline="", encoding="utf-8"
+        ) as change_log_file:
+            fixed_file.write(raw_file.read(bom_length))
+            text_file = io.TextIOWrapper(raw_file, encoding=row_encoding, newline="")
+            records = iter_records(text_file)
+            line_number = 0
+            if csv_header is None:
+                header_text, num_lines = next(records, ("", 0))
+                line_number += num_lines
+                fixed_file.write(header_text.encode(row_encoding))
+                self.raw_header = next(
+                    csv.reader(io.StringIO(header_text, newline="")), []
+                )
+            else:
+                self.raw_header = list(csv_header)
+            header = [CSVData._standardize_col_name(c) for c in self.raw_header]
+            column_normalizers = self._get_column_normalizers(header)
+            id_index = len(header)
+            if self.data_validator_cls.ID_COLUMN in header:
+                id_index = header.index(self.data_validator_cls.ID_COLUMN)
+            self.change_log = csv.writer(change_log_file)
+            self.change_log.writerow(CHANGE_LOG_FIELDS)
+            batch = []
+            for record_text, num_lines in records:
+                row_number = line_number + 1
+                line_number += num_lines
+                self.stats["rows_read"] += 1
+                row = next(csv.reader(io.StringIO(record_text, newline="")), [])
+                changes = []
+                for col_index, column_normalizer in column_normalizers.items():
+                    if col_index >= len(row):
+                        continue
+                    fixed_value, applied = column_normalizer.fix(row[col_index])
+                    if len(applied) > 0:
+                        changes.append(
+                            [
+                                row_number,
+                                row[id_index] if id_index < len(row) else None,
+                                column_normalizer.column_name,
+                                row[col_index],
+                                fixed_value,
+                                "; ".join(applied),
+                            ]
+                        )
+                        row[col_index] = fixed_value
+                if len(changes) == 0:
+                    fixed_file.write(record_text.encode(row_encoding))
+                    continue
+                _, line_ending = split_line_ending(record_text)
+                buffer = io.StringIO()
+                csv.writer(buffer, lineterminator=line_ending).writerow(row)
+                fixed_file.write(buffer.getvalue().encode(row_encoding))
+                self.stats["rows_changed"] += 1
+                self.stats["values_changed"] += len(changes)
+                batch.append((buffer.getvalue(), changes))
+                if len(batch) >= REVALIDATION_BATCH_RECORDS:
+                    self._revalidate_batch(batch, row_encoding)
+                    batch = []
+            if len(batch) > 0:
+                self._revalidate_batch(batch, row_encoding)
+            text_file.detach()
+        return self.stats
+
+    def _revalidate_batch(
+        self, batch: List[Tuple[str, List[List]]], row_encoding: str
+    ) -> None:
+        """Validates a batch of changed records and logs their changes along
+        with the validations each record still fails.
+        """
+        batch_text = "".join(
+            record_text if record_text.endswith(("\n", "\r")) else record_text + "\n"
+            for record_text, _ in batch
+        )
+        batch_validator = self.data_validator_cls(
+            self.file_path,
+            csv_data_object=CSVData.from_chunk(
+                self.file_path,
+                self.raw_header,
+                self.encoding,
+                batch_text.encode(row_encoding),
+            ),
+            track_row_failures=True,
+        )
+        file_validator = batch_validator.file_validator
+        for row_index, (_, changes) in enumerate(batch):
+            remaining_failures = [
+                label
+                for label, bitmap in file_validator.failure_bitmaps.items()
+                if row_index in bitmap
+            ]
+            if len(remaining_failures) > 0:
+                self.stats["changed_rows_still_failing"] += 1
+            for change in changes:
+                self.change_log.writerow([*change, "; ".join(remaining_failures)])
+
+
+def fix_data_files(
+    data_directory: Path,
+    output_dir: Optional[Path] = None,
+    expected_data_formats: Union[str, List[str]] = "*",
+    normalizer_names: Optional[List[str]] = None,
+) -> Dict[str, Dict[str, int]]:
+    """Writes a fixed copy of each data file in data_directory (a directory
+    or .zip archive) to output_dir (by default, a fixed/ dir next to the data
+    files), along with a {data_format}_changes.csv log of what was changed.
+    Returns the stats for each data format.
+    """
+    data_dir = Path(data_directory).resolve()
+    if expected_data_formats == "*":
+        expected_data_formats = constants.EXPECTED_DATA_FORMATS
+    if output_dir is None:
+        if data_dir.is_file():
+            output_dir = data_dir.parent.joinpath("fixed")
+        else:
+            output_dir = data_dir.joinpath("fixed")
+    data_format_to_path_map = map_data_formats_to_paths(
+        list_data_files(data_dir), expected_data_formats
+    )
+    all_stats = {}
+    for data_format, file_path in data_format_to_path_map.items():
+        normalizer = DataFileNormalizer(
+            data_format, file_path, output_dir, normalizer_names
+        )
+        all_stats[data_format] = normalizer.run()
+        print(
+            f"Fixed {normalizer.stats['values_changed']} values in "
+            f"{normalizer.stats['rows_changed']} rows of {file_path.name} "
+            f"({normalizer.stats['changed_rows_still_failing']} of the changed "
+            "rows still fail a validation).\n"
+            f"  - {normalizer.fixed_file_path}\n"
+            f"  - {normalizer.change_log_path}"
+        )
+    return all_stats
@@ -0,0 +1,78 @@
+import sys
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+
+try:
+    import resource
+except ImportError:
+    # The resource module is only available on Unix.
+    resource = None
+
+
+class StageTimer:
+    """Times the stages of a data file's validation (e.g. parsing, type casting
+    and each validation method) and the validators run in them. Stages can be
+    nested, and a stage's time excludes the time of the stages nested in it,
+    so the times of all the stages and validators add up to the total.
+
+    Each stage or validator's time is accumulated over every time it's run
+    (e.g. for each chunk of a file).
+    """
+
+    def __init__(self) -> None:
+        self.stages = {}
+        self.validators = {}
+        # The running stages: [timings dict, name, time it (last) resumed].
+        self._running = []
+
+    def _add_running_time(self, now: float) -> None:
+        if len(self._running) > 0:
+            timings, name, resumed_at = self._running[-1]
+            timings[name] = timings.get(name, 0.0) + now - resumed_at
+
+    def start(self, name: str, is_validator: bool = False) -> None:
+        """Starts timing a stage (or validator), pausing the running one."""
+        now = time.perf_counter()
+        self._add_running_time(now)
+        timings = self.validators if is_validator else self.stages
+        self._running.append([timings, name, now])
+
+    def stop(self) -> None:
+        """Stops timing the latest stage started, resuming the one it paused."""
+        now = time.perf_counter()
+        self._add_running_time(now)
+        self._running.pop()
+        if len(self._running) > 0:
+            self._running[-1][2] = now
+
+    @contextmanager
+    def stage(self, name: str, is_validator: bool = False) -> Iterator[None]:
+        self.start(name, is_validator)
+        try:
+            yield
+        finally:
+            self.stop()
+
+    def add(self, name: str, seconds: float) -> None:
+        """Adds time spent in a stage that was timed separately."""
+        self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+    def to_dict(self) -> Dict[str, Dict[str, float]]:
+        return {
+            "stages": {name: round(s, 6) for name, s in self.stages.items()},
+            "validators": {name: round(s, 6) for name, s in self.validators.items()},
+        }
+
+
+def get_peak_memory_mb() -> Optional[float]:
+    """Returns the peak resident memory of the process so far, in MB (or None
+    where that isn't available, i.e. on Windows).
+    """
+    if resource is None:
+        return None
+    peak_memory = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS, and in KB elsewhere.
+    if sys.platform != "darwin":
+        peak_memory *= 1024
+    return round(peak_memory / 2**20, 1)
@@ -0,0 +1,201 @@
+import re
+from typing import Any, Dict, List, Optional
+
+from bead_inspector.sketches import HyperLogLog
+
+# Distinct values are counted exactly up to this many, and estimated with a
+#   HyperLogLog sketch beyond it.
+DISTINCT_EXACT_LIMIT = 1000
+
+PROFILE_KINDS = ["numeric", "date", "str"]
+
+ISO_DATE_PATTERN = re.compile(r"^\d{4}-\d{2}-\d{2}$")
+
+
+class ColumnProfile:
+    """Streaming summary stats for one column of a data file: the share of
+    null values, the number of distinct values, the range of values (for
+    numeric and date columns), and the range of the values' lengths.
+
+    Profiles can be saved (to_state) and merged, so the profiles of chunks of
+    a file combine into the profile of the whole file.
+    """
+
+    def __init__(self, kind: str = "str") -> None:
+        if kind not in PROFILE_KINDS:
+            raise ValueError(f"kind must be one of {PROFILE_KINDS}, not '{kind}'.")
+        self.kind = kind
+        self.num_values = 0
+        self.num_nulls = 0
+        self.distinct_values = set()
+        self.hll = None
+        self.min_value = None
+        self.max_value = None
+        self.min_length = None
+        self.max_length = None
+
+    def add(self, value: Optional[str], typed_value: Any = None) -> None:
+        """Adds a value as read from the file (and as cast to the column's
+        dtype, for numeric columns).
+        """
+        self.num_values += 1
+        if value is None or value == "":
+            self.num_nulls += 1
+            return
+        self._update_length_range(len(value))
+        if self.hll is None:
+            self.distinct_values.add(value)
+            if len(self.distinct_values) > DISTINCT_EXACT_LIMIT:
+                self._switch_to_hll()
+        else:
+            self.hll.add(value)
+        if self.kind == "numeric":
+            if isinstance(typed_value, (int, float)):
+                self._update_range(typed_value)
+        elif self.kind == "date":
+            if ISO_DATE_PATTERN.match(value):
+                self._update_range(value)
+
+    def add_values(
+        self, values: List[Optional[str]], typed_values: Optional[List] = None
+    ) -> None:
+        """Adds a column's values as read from the file (and as cast to the
+        column's dtype, for numeric columns) all at once, with the same result
+        as adding them one at a time but with most of the work done by builtins
+        rather than per value. None values (rows too short to have the column)
+        are skipped.
+        """
+        num_values = len(values) - values.count(None)
+        non_null_values = list(filter(None, values))
+        self.num_values += num_values
+        self.num_nulls += num_values - len(non_null_values)
+        if len(non_null_values) == 0:
+            return
+        lengths = list(map(len, non_null_values))
+        self._update_length_range(min(lengths))
+        self._update_length_range(max(lengths))
+        distinct_values = set(non_null_values)
+        if self.hll is None:
+            self.distinct_values.update(distinct_values)
+            if len(self.distinct_values) > DISTINCT_EXACT_LIMIT:
+                self._switch_to_hll()
+        else:
+            for value in distinct_values:
+                self.hll.add(value)
+        if self.kind == "numeric" and typed_values is not None:
+            numbers = [v for v in typed_values if isinstance(v, (int, float))]
+            if len(numbers) > 0:
+                self._update_range(min(numbers))
+                self._update_range(max(numbers))
+        elif self.kind == "date":
+            dates = [v for v in distinct_values if ISO_DATE_PATTERN.match(v)]
+            if len(dates) > 0:
+                self._update_range(min(dates))
+                self._update_range(max(dates))
+
+    def _update_length_range(self, length: int) -> None:
+        if self.min_length is None or length < self.min_length:
+            self.min_length = length
+        if self.max_length is None or length > self.max_length:
+            self.max_length = length
+
+    def _update_range(self, value: Any) -> None:
+        if self.min_value is None or value < self.min_value:
+            self.min_value = value
+        if self.max_value is None or value > self.max_value:
+            self.max_value = value
+
+    def _switch_to_hll(self) -> None:
+        self.hll = HyperLogLog()
+        for value in self.distinct_values:
+            self.hll.add(value)
+        self.distinct_values = set()
+
+    def update(self, other: "ColumnProfile") -> None:
+        """Merges the profile of other values of the same column into this one."""
+        self.num_values += other.num_values
+        self.num_nulls += other.num_nulls
+        if other.min_length is not None:
+            self._update_length_range(other.min_length)
+            self._update_length_range(other.max_length)
+        for value in [other.min_value, other.max_value]:
+            if value is not None:
+                self._update_range(value)
+        if self.hll is None and other.hll is None:
+            self.distinct_values.update(other.distinct_values)
+            if len(self.distinct_values) > DISTINCT_EXACT_LIMIT:
+                self._switch_to_hll()
+            return
+        if self.hll is None:
+            self._switch_to_hll()
+        if other.hll is None:
+            for value in other.distinct_values:
+                self.hll.add(value)
+        else:
+            self.hll.update(other.hll)
+
+    def to_state(self) -> Dict:
+        return {
+            "kind": self.kind,
+            "num_values": self.num_values,
+            "num_nulls": self.num_nulls,
+            "distinct_values": (
+                sorted(self.distinct_values) if self.hll is None else None
+            ),
+            "hll_registers": self.hll.registers.hex() if self.hll else None,
+            "min_value": self.min_value,
+            "max_value": self.max_value,
+            "min_length": self.min_length,
+            "max_length": self.max_length,
+        }
+
+    @classmethod
+    def from_state(cls, state: Dict) -> "ColumnProfile":
+        profile = cls(state["kind"])
+        profile.num_values = state["num_values"]
+        profile.num_nulls = state["num_nulls"]
+        if state["hll_registers"] is not None:
+            profile.hll = HyperLogLog(registers=bytes.fromhex(state["hll_registers"]))
+        else:
+            profile.distinct_values = set(state["distinct_values"])
+        profile.min_value = state["min_value"]
+        profile.max_value = state["max_value"]
+        profile.min_length = state["min_length"]
+        profile.max_length = state["max_length"]
+        return profile
+
+    def summarize(self) -> Dict:
+        if self.hll is None:
+            distinct_count = len(self.distinct_values)
+        else:
+            distinct_count = self.hll.count()
+        return {
+            "null_ratio": (
+                round(self.num_nulls / self.num_values, 4) if self.num_values else None
+            ),
+            "distinct_count": distinct_count,
+            "distinct_count_exact": self.hll is None,
+            "min": self.min_value,
+            "max": self.max_value,
+            "min_length": self.min_length,
+            "max_length": self.max_length,
+        }
+
+
+def merge_column_profiles(column_profiles: List[Dict[str, Dict]]) -> Dict[str, Dict]:
+    """Merges the saved column profiles of chunks of a file."""
+    merged = {}
+    for profiles in column_profiles:
+        for column, state in profiles.items():
+            if column not in merged:
+                merged[column] = ColumnProfile.from_state(state)
+            else:
+                merged[column].update(ColumnProfile.from_state(state))
+    return {column: profile.to_state() for column, profile in merged.items()}
+
+
+def summarize_column_profiles(column_profiles: Dict[str, Dict]) -> Dict[str, Dict]:
+    return {
+        column: ColumnProfile.from_state(state).summarize()
+        for column, state in column_profiles.items()
+    }
@@ -1,19 +1,230 @@
+import base64
 import datetime as dt
+import functools
+import gzip
+import hashlib
 import html
 import importlib
 import inspect
 import json
 import re
+import shutil
+import tempfile
 from collections import Counter
-from enum import Enum
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Dict, Iterable, Iterator, List, Optional, TextIO, Tuple
 
 from bead_inspector import constants
+from bead_inspector.cache import ResultCache
+from bead_inspector.diffing import ISSUE_DIFF_STATUSES, diff_issues
+from bead_inspector.incremental import FAILING_ROW_DETAILS
+
+# The styles and script for the pages of a paginated report. Large tables are
+#   embedded as gzipped, base64-encoded JSON and rendered with virtual
+#   scrolling: only the rows in view are added to the page.
+PAGE_HEAD_TEMPLATE = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>{title}</title>
+<style>
+.virtual-table table {{ table-layout: fixed; width: 100%; border-collapse: collapse; }}
+.virtual-table tr {{ height: 24px; }}
+.virtual-table th, .virtual-table td {{
+  padding: 0 4px; white-space: nowrap; overflow: hidden; text-overflow: ellipsis;
+}}
+.virtual-table .viewport {{ position: relative; height: 480px; overflow-y: auto; }}
+.virtual-table .viewport table {{ position: absolute; top: 0; }}
+</style>
+</head>
+<body>
+"""
+
+PAGE_TAIL = """
+<script>
+const ROW_HEIGHT = 24;
+
+async function decodeRows(encoded) {
+  const bytes = Uint8Array.from(atob(encoded), (c) => c.charCodeAt(0));
+  const stream = new Blob([bytes])
+    .stream()
+    .pipeThrough(new DecompressionStream("gzip"));
+  return JSON.parse(await new Response(stream).text());
+}
+
+function makeRow(cells) {
+  const tr = document.createElement("tr");
+  for (const cell of cells) {
+    const td = document.createElement("td");
+    td.textContent = cell;
+    td.title = cell;
+    tr.appendChild(td);
+  }
+  return tr;
+}
+
+async function renderVirtualTable(container) {
+  const encoded = container.querySelector("script").textContent.trim();
+  const rows = await decodeRows(encoded);
+  const viewport = container.querySelector(".viewport");
+  const table = viewport.querySelector("table");
+  viewport.querySelector(".spacer").style.height = `${rows.length * ROW_HEIGHT}px`;
+  const render = () => {
+    const first = Math.floor(viewport.scrollTop / ROW_HEIGHT);
+    const count = Math.ceil(viewport.clientHeight / ROW_HEIGHT) + 1;
+    table.style.top = `${first * ROW_HEIGHT}px`;
+    table.tBodies[0].replaceChildren(
+      ...rows.slice(first, first + count).map(makeRow)
+    );
+  };
+  viewport.addEventListener("scroll", render);
+  render();
+}
+
+document.querySelectorAll(".virtual-table").forEach(renderVirtualTable);
+</script>
+</body>
+</html>
+"""
+
+
+# Issues are rendered with this in place of their number, so that a cached
+#   rendering can be reused whatever the issue's number is in a later report.
+ISSUE_NUMBER_PLACEHOLDER = "@@issue_number@@"
+
+
+def format_html_cell_value(value: Any) -> str:
+    if isinstance(value, str):
+        return f"'{value}'"
+    return str(value)
+
+
+def iter_html_table(data: List[Dict], headers: Optional = None) -> Iterator[str]:
+    """Yields the lines of an HTML table (its header row, then each row)."""
+    if headers is None:
+        headers = data[0].keys()
+    header_cells = "".join(f"<th>{html.escape(str(h))}</th>" for h in headers)
+    yield f"<table border='1'>\n<tr>{header_cells}</tr>\n"
+    for row in data:
+        cells = []
+        for header in headers:
+            value = format_html_cell_value(row.get(header, ""))
+            cells.append(f"<td>{html.escape(value)}</td>")
+        yield f"<tr>{''.join(cells)}</tr>\n"
+    yield "</table>\n"
+
+
+class ValidatorMetadata:
+    """What reports show about a column validator (from constants) or row rule
+    (from rules): its descriptions, valid values, the columns a row rule
+    reads (mapped to their indexes, in column order), and the HTML for its
+    description and table of valid values.
+    """
+
+    def __init__(self, module_name: str, class_name: str) -> None:
+        cls = getattr(importlib.import_module(module_name), class_name)
+        self.name = class_name
+        self.rule_descr = getattr(cls, "rule_descr", None)
+        self.short_descr = getattr(cls, "short_descr", None)
+        self.valid_values = getattr(cls, "valid_values", None) or []
+        attributes = inspect.getmembers(cls, lambda a: not inspect.isroutine(a))
+        self.column_indexes = {
+            name.replace("_index", ""): value
+            for name, value in sorted(
+                [a for a in attributes if a[0].endswith("_index")],
+                key=lambda a: a[1],
+            )
+        }
+        self.rule_descr_html = html.escape(str(self.rule_descr))
+        if len(self.valid_values) > 0:
+            self.valid_values_html = "".join(
+                iter_html_table([{"Valid Values": vv} for vv in self.valid_values])
+            )
+        else:
+            self.valid_values_html = "<p>No data to display</p>"
+
+
+@functools.lru_cache(maxsize=None)
+def get_validator_metadata(module_name: str, class_name: str) -> ValidatorMetadata:
+    """Returns the metadata of a validator, which is only built once per process
+    (rather than once per issue).
+    """
+    return ValidatorMetadata(module_name, class_name)
+
+
+def read_issue_log(file_path: Path) -> Tuple[List[Dict], Dict]:
+    """Reads an issue log: either a list of issues or a dict with the issues
+    and the log's metadata, or an NDJSON log of issues and metadata records.
+    Returns the issues and the metadata.
+    """
+    if not Path(file_path).name.lower().endswith(".json"):
+        return read_ndjson_issue_log(file_path)
+    try:
+        with open(file_path, "r") as f:
+            issue_log = json.load(f)
+    except FileNotFoundError:
+        raise FileNotFoundError(
+            "Expected to find a validation_issues json file at " f"{file_path}."
+        )
+    if isinstance(issue_log, dict):
+        return issue_log["issues"], issue_log.get("metadata", {})
+    return issue_log, {}
+
+
+def read_ndjson_issue_log(file_path: Path) -> Tuple[List[Dict], Dict]:
+    """Streams the records of an NDJSON issue log, one line at a time. The
+    log of a run that crashed has no metadata record, and may end partway
+    through a record (or a gzip member); everything before that is read.
+    The tables of failing rows logged before each data format's issues are
+    added to the metadata.
+    """
+    log_metadata = {}
+    failing_rows = {}
+    issues = []
+    is_complete = False
+    try:
+        if Path(file_path).name.lower().endswith(".gz"):
+            log_file = gzip.open(file_path, "rt", encoding="utf-8")
+        else:
+            log_file = open(file_path, "r", encoding="utf-8")
+    except FileNotFoundError:
+        raise FileNotFoundError(
+            "Expected to find a validation_issues ndjson file at " f"{file_path}."
+        )
+    with log_file:
+        try:
+            for line in log_file:
+                if not line.endswith("\n"):
+                    break
+                record = json.loads(line)
+                if "issue_type" in record:
+                    issues.append(record)
+                elif "failing_rows" in record:
+                    failing_rows.update(record["failing_rows"])
+                elif "metadata" in record:
+                    log_metadata = record["metadata"]
+                    is_complete = True
+        except EOFError:
+            pass
+    if len(failing_rows) > 0:
+        log_metadata["failing_rows"] = failing_rows
+    if not is_complete:
+        print(
+            f"The issue log {file_path} is incomplete (the run that wrote it "
+            f"may have crashed); reporting the {len(issues)} issues it holds."
+        )
+    return issues, log_metadata
 
 
 class ReportGenerator:
     LINK_TO_TOC = '<a href="#toc">(back to top)</a>'
+    ISSUE_LOG_EXTENSIONS = (".json", ".ndjson", ".ndjson.gz")
+    REPORT_LAYOUTS = ["single", "paginated"]
+    # In a paginated report, tables with more rows than this are embedded as
+    #   compressed data, and issues with more failing rows than this get a page
+    #   of their own (rather than sharing their data format's page).
+    EMBEDDED_TABLE_ROWS = 200
+    ISSUE_PAGE_ROWS = 5000
 
     def __init__(
         self,
@@ -22,37 +233,111 @@ class ReportGenerator:
         max_error_rows: int = 20,
         max_id_col_chars: int = 100,
         overwrite_report: bool = False,
+        failure_export_dir: Optional[Path] = None,
+        issues: Optional[List[Dict]] = None,
+        log_metadata: Optional[Dict] = None,
+        layout: str = "single",
+        fragment_cache_dir: Optional[Path] = None,
+        previous_issues_file_path: Optional[Path] = None,
+        report_name_suffix: str = "",
     ):
+        """Writes a report of the issues in the issue log at issues_file_path.
+        If the issues (and the log's metadata) are passed in directly, they're
+        used instead of reading the log, which only names the report then (so
+        the log can still be being written).
+
+        The "single" layout writes the whole report to one HTML file. The
+        "paginated" layout writes a directory of pages: an index.html with the
+        summary stats and table of contents, a page for the issues of each
+        data format, and a page for each issue with more than ISSUE_PAGE_ROWS
+        failing rows.
+
+        If a fragment_cache_dir is given, the rendered HTML of each issue is
+        cached there, keyed by a hash of the issue, so later reports only
+        render the issues that are new or have changed.
+
+        If the issue log of an earlier run is given (previous_issues_file_path),
+        the report has a section on the issues fixed since that run, the new
+        issues and the remaining ones.
+
+        Without extra_stats, the summary stats logged in the log's metadata
+        (if any) are used. The report's file name is the log's (e.g.
+        BEAD_Data_Validation_Report_<run time>.html), with report_name_suffix
+        added before the extension, so e.g. a report on the changes since an
+        earlier run doesn't overwrite the run's own report.
+        """
+        if layout not in self.REPORT_LAYOUTS:
+            raise ValueError(
+                f"layout must be one of {self.REPORT_LAYOUTS}, not '{layout}'."
+            )
+        self.layout = layout
+        if fragment_cache_dir is not None:
+            self.fragment_cache = ResultCache(fragment_cache_dir)
+        else:
+            self.fragment_cache = None
+        if layout == "paginated":
+            self.LINK_TO_TOC = '<a href="index.html#toc">(back to the index)</a>'
         self.issues_file_path = Path(issues_file_path).resolve()
+        self.failure_export_dir = failure_export_dir
         if max_error_rows >= 0:
             self.max_error_rows = max_error_rows
         else:
             self.max_error_rows = -1
         self.max_id_col_chars = max_id_col_chars
-        self._set_issues()
+        self.report_name_suffix = report_name_suffix
+        self._set_issues(issues, log_metadata)
+        self.previous_issues_file_path = previous_issues_file_path
+        self.issue_diff = None
+        if previous_issues_file_path is not None:
+            previous_issues, _ = read_issue_log(previous_issues_file_path)
+            self.issue_diff = diff_issues(previous_issues, self.issues)
         self._set_report_dir()
+        if extra_stats is None:
+            extra_stats = self._get_logged_summary_stats()
         self._set_extra_summary_stats(extra_stats)
-        self.formatted_issues = []
-        self.final_report = self.prepare_final_report()
         self.write_report(overwrite_report)
 
     @property
     def report_file_path(self) -> Path:
         issue_file_name = self.issues_file_path.name.lower()
-        if not issue_file_name.endswith(".json"):
+        if not issue_file_name.endswith(self.ISSUE_LOG_EXTENSIONS):
             raise ValueError(
-                "Expected an issue file with '.json' file extension; received "
-                f"{self.issues_file_path}."
+                "Expected an issue file with a '.json', '.ndjson' or '.ndjson.gz' "
+                f"file extension; received {self.issues_file_path}."
             )
-        report_file_name = re.sub(r"\.json$", ".html", issue_file_name)
+        report_file_name = re.sub(
+            r"\.(nd)?json(\.gz)?$", f"{self.report_name_suffix}.html", issue_file_name
+        )
         report_file_name = re.sub(
             r"^validation_issue_logs",
             "BEAD_Data_Validation_Report",
             report_file_name,
         )
+        if self.layout == "paginated":
+            report_page_dir = re.sub(r"\.html$", "", report_file_name)
+            return self.report_dir.joinpath(report_page_dir, "index.html")
         report_file_path = self.report_dir.joinpath(report_file_name)
         return report_file_path
 
+    @property
+    def final_report(self) -> str:
+        """The written report (read back from the report file)."""
+        with open(self.report_file_path, "r", encoding="utf-8") as f:
+            return f.read()
+
+    def _get_logged_summary_stats(self) -> Optional[List[Dict]]:
+        """Rebuilds the extra summary stats from the log's metadata, which holds
+        them without the column profiles (those are logged separately).
+        """
+        summary_stats = self.log_metadata.get("summary_stats")
+        if summary_stats is None:
+            return None
+        column_profiles = self.log_metadata.get("column_profiles", {})
+        return [
+            {**stats, "column_profiles": column_profiles.get(stats["data_format"], {})}
+            for stats in summary_stats
+        ]
+
     def _set_extra_summary_stats(
         self, extra_stats: Optional[List[Dict]] = None
     ) -> None:
@@ -112,29 +397,134 @@ class ReportGenerator:
                 " To overwrite that file, run the ReportGenerator.write_report"
                 " method with the overwrite arg set to True."
             )
-        with open(self.report_file_path, "w", encoding="utf-8") as f:
-            f.write(self.final_report)
+        if self.layout == "paginated":
+            self.write_paginated_report()
+        else:
+            self.write_single_page_report()
         print(
             "Data Validation Report written to file:\n  - " f"{self.report_file_path}"
         )
 
-    def _read_issues_from_file(self, file_path: Path) -> List[Dict]:
-        try:
-            with open(file_path, "r") as f:
-                return json.load(f)
-        except FileNotFoundError:
-            raise FileNotFoundError(
-                "Expected to find a validation_issues json file at " f"{file_path}."
+    def write_single_page_report(self) -> None:
+        """Writes the report one section (and one issue) at a time, so memory
+        use depends on the size of the largest issue rather than the whole
+        report. The issues and the table of contents are first written to
+        separate fragment files, which are then copied into the report after
+        the summary sections.
+        """
+        with tempfile.TemporaryDirectory(dir=self.report_dir) as fragment_dir:
+            toc_path = Path(fragment_dir).joinpath("toc.html")
+            issues_path = Path(fragment_dir).joinpath("issues.html")
+            with open(toc_path, "w", encoding="utf-8") as toc_file, open(
+                issues_path, "w", encoding="utf-8"
+            ) as issues_file:
+                self.write_issues(toc_file, issues_file)
+            with open(self.report_file_path, "w", encoding="utf-8") as f:
+                f.write(self.format_report_title())
+                for section in [
+                    self.format_summary_stats(),
+                    self.format_issue_changes(),
+                    self.format_rule_co_failures(),
+                    self.format_column_profiles(),
+                    self.format_performance(),
+                ]:
+                    f.write("\n\n")
+                    f.write(section)
+                for fragment_path in [toc_path, issues_path]:
+                    with open(fragment_path, "r", encoding="utf-8") as fragment:
+                        shutil.copyfileobj(fragment, f)
+
+    def _get_num_failing_rows(self, issue: Dict) -> int:
+        return max(
+            [
+                len(value)
+                for name, value in issue["issue_details"].items()
+                if name in FAILING_ROW_DETAILS and isinstance(value, list)
+            ],
+            default=0,
+        )
+
+    def _get_report_pages(self) -> Dict[str, List[Tuple[int, Dict]]]:
+        """Maps the name of each page of a paginated report to the (numbered)
+        issues on it.
+        """
+        pages = {}
+        for i, issue in enumerate(self.issues, start=1):
+            if self._get_num_failing_rows(issue) > self.ISSUE_PAGE_ROWS:
+                page_name = f"issue-{i}"
+            else:
+                page_name = issue["data_format"]
+            pages.setdefault(page_name, []).append((i, issue))
+        return pages
+
+    def write_report_page(
+        self, page_name: str, numbered_issues: List[Tuple[int, Dict]]
+    ) -> List[Tuple[int, Dict, str, str]]:
+        """Writes a page of a paginated report, returning the table of contents
+        entries for its issues.
+        """
+        page_file_name = f"{page_name}.html"
+        toc_entries = []
+        page_path = self.report_file_path.parent.joinpath(page_file_name)
+        with open(page_path, "w", encoding="utf-8") as f:
+            f.write(PAGE_HEAD_TEMPLATE.format(title=html.escape(page_name)))
+            f.write(
+                f"<h1>{html.escape(page_name)}</h1>"
+                '<a href="index.html">(back to the index)</a>'
             )
+            for i, issue in numbered_issues:
+                toc_line, formatted_issue = self._number_issue(
+                    i, *self.render_issue(issue)
+                )
+                f.write("\n\n")
+                f.write(formatted_issue)
+                toc_entries.append((i, issue, toc_line, f"{page_file_name}#issue-{i}"))
+            f.write(PAGE_TAIL)
+        return toc_entries
+
+    def write_paginated_report(self) -> None:
+        """Writes the pages of the report, then the index page linking to each
+        issue.
+        """
+        self.report_file_path.parent.mkdir(exist_ok=True)
+        pages = self._get_report_pages()
+        toc_entries = sorted(
+            (
+                entry
+                for page_name, numbered_issues in pages.items()
+                for entry in self.write_report_page(page_name, numbered_issues)
+            ),
+            key=lambda entry: entry[0],
+        )
+        with open(self.report_file_path, "w", encoding="utf-8") as f:
+            f.write(PAGE_HEAD_TEMPLATE.format(title="BEAD Data Validation Report"))
+            f.write(self.format_report_title())
+            for section in [
+                self.format_summary_stats(),
+                self.format_issue_changes(),
+                self.format_rule_co_failures(),
+                self.format_column_profiles(),
+                self.format_performance(),
+            ]:
+                f.write("\n\n")
+                f.write(section)
+            for toc_html in self._iter_table_of_contents(toc_entries):
+                f.write(toc_html)
+            f.write(PAGE_TAIL)
 
     def _set_report_dir(self) -> Path:
         self.report_dir = self.issues_file_path.parent.parent.joinpath("reports")
         self.report_dir.mkdir(exist_ok=True)
 
-    def _set_issues(self) -> None:
-        self.issues = self._read_issues_from_file(self.issues_file_path)
+    def _set_issues(
+        self, issues: Optional[List[Dict]] = None, log_metadata: Optional[Dict] = None
+    ) -> None:
+        if issues is None:
+            issues, self.log_metadata = read_issue_log(self.issues_file_path)
+        else:
+            self.log_metadata = log_metadata or {}
         self.issues = sorted(
-            self.issues,
+            issues,
             key=lambda x: (
                 x["issue_level"],
                 x["data_format"],
@@ -143,39 +533,6 @@ class ReportGenerator:
             ),
         )
 
-    def _get_class_attributes(self, module_name: str, class_name: str) -> Dict:
-        module = importlib.import_module(module_name)
-        cls = getattr(module, class_name)
-        attributes = inspect.getmembers(cls, lambda a: not (inspect.isroutine(a)))
-        attributes = {
-            a[0]: a[1]
-            for a in attributes
-            if not (a[0].startswith("__") and a[0].endswith("__"))
-        }
-        return attributes
-
-    def _get_class_properties(
-        self, module_name: str, class_name: str
-    ) -> Dict[str, Any]:
-        try:
-            module = importlib.import_module(module_name)
-            cls = getattr(module, class_name)
-        except (ImportError, AttributeError) as e:
-            return {
-                "error": (
-                    f"Failed to import {class_name} from " f"{module_name}: {str(e)}"
-                )
-            }
-        attributes = {}
-        for name in ["valid_values", "rule_descr"]:
-            try:
-                attributes[name] = getattr(cls, name)
-            except Exception as e:
-                attributes[name] = f"Error accessing {name}: {str(e)}"
-        if issubclass(cls, Enum):
-            attributes["enum_members"] = {member.name: member.value for member in cls}
-        return attributes
-
     def _unpack_core_issue_fields(self, issue: Dict) -> Tuple[str, str, str, Dict]:
         data_format = issue["data_format"]
         issue_type = issue["issue_type"]
@@ -186,29 +543,34 @@ class ReportGenerator:
     def _list_to_html_table(self, data: List, headers: Optional = None):
         if not data:
             return "<p>No data to display</p>"
+        if self.layout == "paginated" and len(data) > self.EMBEDDED_TABLE_ROWS:
+            return self._format_embedded_table(data, headers)
+        return "".join(iter_html_table(data, headers))
+
+    def _format_embedded_table(self, data: List, headers: Optional = None) -> str:
+        """Formats a large table as its gzipped rows (as base64-encoded JSON),
+        which the page's script decompresses and renders as they're scrolled
+        into view.
+        """
         if headers is None:
             headers = data[0].keys()
-        table_html = "<table border='1'>\n<tr>"
-        for header in headers:
-            table_html += f"<th>{html.escape(str(header))}</th>"
-        table_html += "</tr>\n"
-        for row in data:
-            table_html += "<tr>"
-            for header in headers:
-                value = row.get(header, "")
-                if isinstance(value, str):
-                    escaped_value = html.escape(f"'{value}'")
-                else:
-                    escaped_value = html.escape(str(value))
-                table_html += f"<td>{escaped_value}</td>"
-            table_html += "</tr>\n"
-        table_html += "</table>\n"
-        return table_html
-
-    def _format_valid_values(self, valid_values: List[str]) -> str:
-        # if I don't need more complex logic later, maybe just roll this code
-        #   into the funcs that call this. ToDo
-        return self._list_to_html_table([{"Valid Values": vv} for vv in valid_values])
+        header_cells = "".join(f"<th>{html.escape(str(h))}</th>" for h in headers)
+        rows = [
+            [format_html_cell_value(row.get(header, "")) for header in headers]
+            for row in data
+        ]
+        encoded_rows = base64.b64encode(
+            gzip.compress(json.dumps(rows, separators=(",", ":")).encode("utf-8"))
+        ).decode("ascii")
+        return (
+            '<div class="virtual-table">'
+            f"<p>{len(rows)} rows (scroll the table to see them all).</p>\n"
+            f"<table border='1'><thead><tr>{header_cells}</tr></thead></table>\n"
+            '<div class="viewport"><div class="spacer"></div>'
+            "<table border='1'><tbody></tbody></table></div>\n"
+            f'<script type="application/gzip+base64">{encoded_rows}</script>\n'
+            "<noscript>Showing this table needs JavaScript.</noscript></div>\n"
+        )
 
     def _format_id_column_into_fail_table(
         self, id_column: str, fail_list: List
@@ -240,6 +602,27 @@ class ReportGenerator:
             trunc_note = ""
         return (trunc_note, failing_rows)
 
+    def _format_most_common_invalid_values(self, issue_details: Dict) -> str:
+        most_common = issue_details.get("most_common_invalid_values")
+        if not most_common:
+            return ""
+        if issue_details["most_common_counts_exact"]:
+            counts_note = ""
+        else:
+            counts_note = (
+                "<ul><li>Note: there were too many distinct invalid values to "
+                "count them all, so these counts are estimates (they may be "
+                "too high, but any value that makes up a large share of the "
+                "invalid values is listed).</li></ul>"
+            )
+        most_common_table = self._list_to_html_table(
+            [{"Invalid Value": value, "Count": count} for value, count in most_common]
+        )
+        return (
+            "<li>Most common invalid values:"
+            f"{most_common_table}</li>{counts_note}\n"
+        )
+
     def _format_column_contents_validation(
         self, issue: Dict, issue_number: int
     ) -> Tuple[str, str]:
@@ -256,19 +639,9 @@ class ReportGenerator:
         validation = issue_details["validation"]
         all_fails_recorded = issue_details["all_fails_recorded"]
         fail_set_completeness_msg = self._format_all_fails_recorded_message(
-            all_fails_recorded
-        )
-        validator_attrs = self._get_class_properties(
-            module_name="bead_inspector.constants",
-            class_name=validation,
+            all_fails_recorded, issue_details.get("failure_sampling")
         )
-        try:
-            rule_descr = html.escape(validator_attrs["rule_descr"])
-        except KeyError:
-            print(f"validation: {validation}\nvalidator_attrs: {validator_attrs}")
-            # ToDo: remove this try-except block after development
-            raise
-        valid_values_table = self._format_valid_values(validator_attrs["valid_values"])
+        metadata = get_validator_metadata("bead_inspector.constants", validation)
         trunc_note, failing_rows = self._format_id_column_into_fail_table(
             id_column, issue_details["failing_rows_and_values"]
         )
@@ -278,7 +651,7 @@ class ReportGenerator:
             f"{toc_descr}:</h3>{self.LINK_TO_TOC}\n"
             f"<ul><li>Data File: {expected_file_name}</li>"
             f"<li>Issue Level: {issue_level}</li>"
-            f"<li>Description: {rule_descr}</li>"
+            f"<li>Description: {metadata.rule_descr_html}</li>"
             f"<li>Column: {column}</li>"
             "<li>Failing rows, id_values, and invalid values:"
             f"{self._list_to_html_table(failing_rows)}</li>{trunc_note}"
@@ -287,11 +660,28 @@ class ReportGenerator:
             "<li>All rows with invalid values shown: "
             f"{'Yes' if all_fails_recorded else 'No'}</li>\n"
             f"<li>{fail_set_completeness_msg}</li>\n"
+            f"{self._format_most_common_invalid_values(issue_details)}"
             "<li><details><summary>Valid values (click to show/hide):</summary>"
-            f"{valid_values_table}</details></li></ul>\n"
+            f"{metadata.valid_values_html}</details></li></ul>\n"
         )
         return (toc_descr, html_output)
 
+    def _get_row_rule_failing_values(self, issue: Dict) -> List[Any]:
+        """Returns the values recorded for each failing row of a row rule issue:
+        the values of the columns the rule reads, keyed by column name, which
+        are looked up by row number in the data format's table of failing rows
+        (or, in logs written by earlier versions, the whole row).
+        """
+        row_table = self.log_metadata.get("failing_rows", {}).get(
+            issue["data_format"], {}
+        )
+        return [
+            row_table.get(str(row_number), {}) if values is None else values
+            for row_number, _, values in issue["issue_details"][
+                "failing_rows_and_values"
+            ]
+        ]
+
     def _format_row_rule_validation_issue(
         self, issue: Dict, issue_number: int
     ) -> Tuple[str, str]:
@@ -307,44 +697,37 @@ class ReportGenerator:
         validation = issue_details["validation"]
         all_fails_recorded = issue_details["all_fails_recorded"]
         fail_set_completeness_msg = self._format_all_fails_recorded_message(
-            all_fails_recorded
-        )
-        validator_attrs = self._get_class_attributes(
-            module_name="bead_inspector.rules",
-            class_name=validation,
-        )
-        rule_descr = validator_attrs["rule_descr"]
-        short_descr = validator_attrs.get("short_descr", None)
-        col_indexes = {
-            c.replace("_index", ""): i
-            for c, i in filter(
-                lambda x: x[0].endswith("_index"), validator_attrs.items()
-            )
-        }
-        col_indexes = dict(sorted(col_indexes.items(), key=lambda x: x[1]))
+            all_fails_recorded, issue_details.get("failure_sampling")
+        )
+        metadata = get_validator_metadata("bead_inspector.rules", validation)
         failing_values = issue_details["failing_rows_and_values"]
         trunc_note, failing_values = self._format_id_column_into_fail_table(
             id_column, failing_values
         )
+        row_values = self._get_row_rule_failing_values(issue)
         failing_rows = []
-        for failing_value in failing_values:
+        for failing_value, values in zip(failing_values, row_values):
             relevant_values = dict()
             relevant_values["row"] = failing_value["row"]
             relevant_values[id_column] = failing_value[id_column]
-            for col, col_index in col_indexes.items():
-                try:
-                    value = failing_value["value"][col_index]
-                except IndexError:
+            for col, col_index in metadata.column_indexes.items():
+                if isinstance(values, dict):
+                    value = values.get(col, f"MISSING COLUMN NUMBER {col_index}")
+                elif col_index < len(values):
+                    value = values[col_index]
+                else:
                     value = f"MISSING COLUMN NUMBER {col_index}"
                 relevant_values[col] = value
             failing_rows.append(relevant_values)
-        toc_descr = f"{expected_file_name} :: {short_descr} :: Row rule broken"
+        toc_descr = (
+            f"{expected_file_name} :: {metadata.short_descr} :: Row rule broken"
+        )
         html_output = (
             f'<h3 id="issue-{issue_number}">{issue_number}. '
             f"{toc_descr}:</h3>{self.LINK_TO_TOC}"
             f"<ul><li>Data File: {expected_file_name}</li>"
             f"<li>Issue Level: {issue_level}</li>"
-            f"<li>Description: {html.escape(rule_descr)}</li>"
+            f"<li>Description: {metadata.rule_descr_html}</li>"
             "<li>Failing rows and values:"
             f"{self._list_to_html_table(failing_rows)}</li>{trunc_note}"
             "<li>Total rows with invalid values:"
@@ -383,7 +766,8 @@ class ReportGenerator:
             "<li>Failing rows and their uncastable values:"
             f"{self._list_to_html_table(failing_rows)}</li>{trunc_note}"
             "<li>Total number of rows with uncastable values: "
-            f"{n_uncastable}</li></ul>"
+            f"{n_uncastable}</li>"
+            f"{self._format_most_common_invalid_values(issue_details)}</ul>"
         )
         return (toc_descr, html_output)
 
@@ -595,7 +979,7 @@ class ReportGenerator:
             for fr in failing_rows
         ]
         fail_set_completeness_msg = self._format_all_fails_recorded_message(
-            all_fails_recorded
+            all_fails_recorded, issue_details.get("failure_sampling")
         )
         toc_descr = (
             f"{expected_file_name} :: Unallowed nulls found in column " f"'{column}'"
@@ -808,11 +1192,6 @@ class ReportGenerator:
             raise Exception(f"Unexpected issue_type encountered: {issue_type}")
         return (toc_line, formatted_issue)
 
-    def format_all_issues(self) -> None:
-        for inum, issue in enumerate(self.issues):
-            toc_line, formatted_issue = self.format_issue(issue, inum + 1)
-            self.formatted_issues.append((inum + 1, toc_line, formatted_issue))
-
     def _format_counter_counts(self, counts: Dict[str, int]) -> List[str]:
         k_width = max([len(k) for k in counts.keys()])
         v_width = max([len(str(k)) for k in counts.values()])
@@ -853,6 +1232,12 @@ class ReportGenerator:
                         for es in self.extra_stats
                         if es["data_format"] == data_format
                     ][0]
+                    # List- and dict-valued stats get their own tables.
+                    extra_stats = {
+                        k: v
+                        for k, v in extra_stats.items()
+                        if not isinstance(v, (list, dict))
+                    }
                     stats = {**stats, **extra_stats}
                 counts.append(stats)
             summary_stats.append(
@@ -863,69 +1248,339 @@ class ReportGenerator:
             )
         return "\n".join(summary_stats)
 
-    def prepare_table_of_contents(self) -> str:
-        toc = '<h2 id="toc">Table of Contents</h2>\n<ul>'
+    def format_issue_changes(self) -> str:
+        """Tabulates the issues fixed since the previous run, the new issues
+        and the remaining ones (with the failing rows fixed and newly failing,
+        matched by id value).
+        """
+        if self.issue_diff is None:
+            return ""
+        changes = []
+        for status in ISSUE_DIFF_STATUSES:
+            for entry in self.issue_diff[status]:
+                total_fails = entry["total_fails"]
+                previous_total_fails = entry.get("previous_total_fails")
+                if status == "fixed":
+                    total_fails, previous_total_fails = None, total_fails
+                rows_fixed, rows_newly_failing = "", ""
+                if status == "remaining":
+                    rows_fixed = len(entry["fixed_rows"])
+                    rows_newly_failing = len(entry["new_rows"])
+                    if not entry["all_rows_compared"]:
+                        rows_fixed = f"{rows_fixed}+"
+                        rows_newly_failing = f"{rows_newly_failing}+"
+                changes.append(
+                    {
+                        "status": status,
+                        "data_format": entry["data_format"],
+                        "issue_type": entry["issue_type"],
+                        "column": entry["column"] or "",
+                        "validation": entry["validation"] or "",
+                        "issue_level": entry["issue_level"],
+                        "previous_total_fails": (
+                            "" if previous_total_fails is None else previous_total_fails
+                        ),
+                        "total_fails": "" if total_fails is None else total_fails,
+                        "rows_fixed": rows_fixed,
+                        "rows_newly_failing": rows_newly_failing,
+                    }
+                )
+        counts = ", ".join(
+            f"{len(self.issue_diff[status])} {status}" for status in ISSUE_DIFF_STATUSES
+        )
+        previous_log_name = html.escape(Path(self.previous_issues_file_path).name)
+        return (
+            "<h2>Changes Since the Previous Run</h2>\n"
+            f"<p>Issues compared with those in {previous_log_name}: {counts}. "
+            "Failing rows are matched by their id value, among the rows each log "
+            "recorded; counts ending in '+' only cover the recorded rows (as not "
+            "every failing row was recorded).</p>"
+            f"{self._list_to_html_table(changes)}"
+        )
+
+    def format_rule_co_failures(self) -> str:
+        """Tabulates how many rows fail each pair of validations (from the
+        rule_co_failures extra stat), to show which issues tend to go together.
+        """
+        if self.extra_stats is None:
+            return ""
+        co_failures = []
+        for es in self.extra_stats:
+            for label, other_label, num_rows in es.get("rule_co_failures", []):
+                co_failures.append(
+                    {
+                        "data_format": es["data_format"],
+                        "validation": label,
+                        "other_validation": other_label,
+                        "rows_failing_both": num_rows,
+                    }
+                )
+        if len(co_failures) == 0:
+            return ""
+        co_failures = sorted(
+            co_failures, key=lambda x: (x["data_format"], -x["rows_failing_both"])
+        )
+        return (
+            "<h2>Validations Failing on the Same Rows</h2>\n"
+            "<p>The number of rows failing both of each pair of validations.</p>"
+            f"{self._list_to_html_table(co_failures)}"
+        )
+
+    def _get_column_profiles(self) -> Dict[str, Dict]:
+        if self.extra_stats is not None:
+            return {
+                es["data_format"]: es.get("column_profiles", {})
+                for es in self.extra_stats
+            }
+        return self.log_metadata.get("column_profiles", {})
+
+    def format_column_profiles(self) -> str:
+        """Tabulates summary stats for every column of each data file (from the
+        column_profiles extra stat, or the issue log's metadata).
+        """
+        profile_tables = []
+        for data_format, column_profiles in self._get_column_profiles().items():
+            if len(column_profiles) == 0:
+                continue
+            rows = []
+            for column, profile in column_profiles.items():
+                distinct_count = profile["distinct_count"]
+                if not profile["distinct_count_exact"]:
+                    distinct_count = f"~{distinct_count}"
+                rows.append(
+                    {
+                        "column": column,
+                        "null_ratio": profile["null_ratio"],
+                        "distinct_values": distinct_count,
+                        "min": "" if profile["min"] is None else profile["min"],
+                        "max": "" if profile["max"] is None else profile["max"],
+                        "min_length": profile["min_length"] or 0,
+                        "max_length": profile["max_length"] or 0,
+                    }
+                )
+            profile_tables.append(
+                f"<h3>{data_format}.csv</h3>{self._list_to_html_table(rows)}"
+            )
+        if len(profile_tables) == 0:
+            return ""
+        return (
+            "<h2>Column Profiles</h2>\n"
+            "<p>Summary stats for the values in each column. Counts of distinct "
+            "values starting with '~' are estimates. Min and max values are "
+            "only given for numeric and date columns.</p>\n"
+            + "\n".join(profile_tables)
+        )
+
+    def _format_stage_timings(self, format_performance: Dict) -> List[Dict]:
+        """Lists the time spent in each stage and validator of a data file's
+        validation, slowest first, with the time not spent in any of them.
+        """
+        timings = [
+            {"name": name, "kind": kind, "seconds": seconds}
+            for kind, kind_timings in [
+                ("stage", format_performance.get("stages", {})),
+                ("validator", format_performance.get("validators", {})),
+            ]
+            for name, seconds in kind_timings.items()
+        ]
+        total_seconds = format_performance["seconds"]
+        other_seconds = total_seconds - sum(t["seconds"] for t in timings)
+        if other_seconds > 0:
+            timings.append({"name": "other", "kind": "", "seconds": other_seconds})
+        timings = sorted(timings, key=lambda t: -t["seconds"])
+        for t in timings:
+            t["share_of_time"] = f"{t['seconds'] / total_seconds:.1%}"
+            t["seconds"] = round(t["seconds"], 3)
+        return timings
+
+    def format_performance(self) -> str:
+        """Tabulates how long each data file's validation took (in total and in
+        each stage and validator) and its throughput, and the peak memory used
+        by the run (from the issue log's performance metadata).
+        """
+        performance = self.log_metadata.get("performance")
+        if performance is None:
+            return ""
+        rows = []
+        stage_tables = []
+        for data_format, format_performance in performance["data_formats"].items():
+            row = {
+                "data_format": data_format,
+                "seconds": format_performance["seconds"],
+                "rows": format_performance["row_count"],
+                "rows_per_second": format_performance["rows_per_second"],
+            }
+            if format_performance["from_cache"] or row["seconds"] is None:
+                row["seconds"] = "N/A; results reused from the cache."
+            else:
+                row["seconds"] = round(row["seconds"], 3)
+            rows.append({k: "N/A" if v is None else v for k, v in row.items()})
+            if isinstance(row["seconds"], str) or format_performance["seconds"] <= 0:
+                continue
+            stage_timings = self._format_stage_timings(format_performance)
+            stage_tables.append(
+                f"<h3>{data_format}.csv</h3>{self._list_to_html_table(stage_timings)}"
+            )
+        run_stats = {
+            "header_probe_seconds": round(performance["header_probe_seconds"], 3),
+            "cross_file_check_seconds": round(
+                performance["cross_file_check_seconds"], 3
+            ),
+            "peak_memory_mb": performance["peak_memory_mb"] or "N/A",
+        }
+        performance_html = (
+            "<h2>Performance</h2>\n"
+            "<p>How long the validation of each data file took (in seconds), its "
+            "throughput.</p>"
+            f"{self._list_to_html_table(rows)}\n"
+            "<p>The time spent probing the headers of the data files and running "
+            "the checks across data files, and the peak memory used by the whole "
+            "run (memory isn't measured per data file, as files can be "
+            "validated in parallel and the peak only ever grows).</p>"
+            f"{self._list_to_html_table([run_stats])}"
+        )
+        if len(stage_tables) > 0:
+            performance_html += (
+                "\n<p>The time spent in each stage of each data file's validation "
+                "and in each validator, slowest first.</p>\n" + "\n".join(stage_tables)
+            )
+        return performance_html
+
+    def _get_fragment_cache_key(self, issue: Dict) -> str:
+        rendered_data = [issue]
+        if issue["issue_type"] == "row_rule_validation":
+            rendered_data.append(self._get_row_rule_failing_values(issue))
+        issue_json = json.dumps(rendered_data, sort_keys=True, default=str)
+        issue_hash = hashlib.sha256(issue_json.encode("utf-8")).hexdigest()
+        return self.fragment_cache.make_key(
+            issue["data_format"],
+            issue_hash,
+            report_fragment=True,
+            layout=self.layout,
+            max_error_rows=self.max_error_rows,
+            max_id_col_chars=self.max_id_col_chars,
+            failure_export_dir=(
+                str(self.failure_export_dir) if self.failure_export_dir else None
+            ),
+        )
+
+    def render_issue(self, issue: Dict) -> Tuple[str, str]:
+        """Returns an issue's table of contents line and HTML (with
+        ISSUE_NUMBER_PLACEHOLDER in place of its number), from the fragment
+        cache if it's there.
+        """
+        cache_key = None
+        if self.fragment_cache is not None:
+            cache_key = self._get_fragment_cache_key(issue)
+            entry = self.fragment_cache.get(cache_key)
+            if entry is not None:
+                return entry["toc_line"], entry["html"]
+        toc_line, formatted_issue = self.format_issue(issue, ISSUE_NUMBER_PLACEHOLDER)
+        if isinstance(formatted_issue, dict):
+            formatted_issue = json.dumps(formatted_issue, indent=4)
+        if cache_key is not None:
+            self.fragment_cache.put(
+                cache_key, {"toc_line": toc_line, "html": formatted_issue}
+            )
+        return toc_line, formatted_issue
+
+    def _number_issue(
+        self, issue_number: int, toc_line: str, formatted_issue: str
+    ) -> Tuple[str, str]:
+        return toc_line, formatted_issue.replace(
+            ISSUE_NUMBER_PLACEHOLDER, str(issue_number)
+        )
+
+    def _iter_rendered_issues(self) -> Iterator[Tuple[int, Dict, str, str]]:
+        """Renders the issues one at a time, yielding the number, issue, table
+        of contents line and HTML of each in order.
+        """
+        for i, issue in enumerate(self.issues, start=1):
+            yield (i, issue, *self._number_issue(i, *self.render_issue(issue)))
+
+    def write_issues(self, toc_file: TextIO, issues_file: TextIO) -> None:
+        """Renders the issues (see _iter_rendered_issues), writing each one to
+        issues_file and its entry in the table of contents to toc_file.
+        """
+
+        def iter_toc_entries() -> Iterator[Tuple[int, Dict, str, str]]:
+            for i, issue, toc_line, formatted_issue in self._iter_rendered_issues():
+                issues_file.write("\n\n")
+                issues_file.write(formatted_issue)
+                yield i, issue, toc_line, f"#issue-{i}"
+
+        for toc_html in self._iter_table_of_contents(iter_toc_entries()):
+            toc_file.write(toc_html)
+
+    def _iter_table_of_contents(
+        self, toc_entries: Iterable[Tuple[int, Dict, str, str]]
+    ) -> Iterator[str]:
+        """Yields the parts of the table of contents, given the number, issue,
+        description and link of each issue (in order).
+        """
+        yield '\n\n<h2 id="toc">Table of Contents</h2>\n<ul>'
         current_issue_level = None
         current_data_format = None
-        for i, toc_line, formatted_issue in self.formatted_issues:
-            issue = self.issues[i - 1]
+        for i, issue, toc_line, href in toc_entries:
             issue_level = issue["issue_level"]
             data_format = issue["data_format"]
             if issue_level != current_issue_level:
                 if current_data_format is not None:
-                    toc += "</ul></li>"
+                    yield "</ul></li>"
                 if current_issue_level is not None:
-                    toc += "</ul></li>"
-                toc += f"<li><h3>{issue_level.title()}-level issues:</h3><ul>"
+                    yield "</ul></li>"
+                yield f"<li><h3>{issue_level.title()}-level issues:</h3><ul>"
                 current_issue_level = issue_level
                 current_data_format = None
             if data_format != current_data_format:
                 if current_data_format is not None:
-                    toc += "</ul></li>"
-                toc += f"<li><h4>{data_format}.csv issues:</h4><ul>"
+                    yield "</ul></li>"
+                yield f"<li><h4>{data_format}.csv issues:</h4><ul>"
                 current_data_format = data_format
-            toc += f'<li><a href="#issue-{i}">Issue {i}: {toc_line}</a></li>\n'
-
+            yield f'<li><a href="{href}">Issue {i}: {toc_line}</a></li>\n'
         if current_data_format is not None:
-            toc += "</ul></li>"
+            yield "</ul></li>"
         if current_issue_level is not None:
-            toc += "</ul></li>"
-        toc += "</ul>"
-        return toc
-
-    def prepare_final_report(self) -> str:
-        self.format_all_issues()
-        toc = self.prepare_table_of_contents()
-        pretty_issues = []
-        for i, toc_line, formatted_issue in self.formatted_issues:
-            if isinstance(formatted_issue, dict):
-                pretty_issues.append(json.dumps(formatted_issue, indent=4))
-            else:
-                pretty_issues.append(formatted_issue)
+            yield "</ul></li>"
+        yield "</ul>"
+
+    def format_report_title(self) -> str:
         rundate_str = re.search(r"\d{8}_\d{6}", self.issues_file_path.name).group()
         date_dt = dt.datetime.strptime(rundate_str, "%Y%m%d_%H%M%S")
         fmtd_rundate_str = dt.datetime.strftime(date_dt, "%Y-%m-%d %H:%M:%S")
-        final_report = [
-            (
-                f"<h1>BEAD Data Validation Results from the {fmtd_rundate_str} "
-                "run:</h1>"
-            ),
-            self.format_summary_stats(),
-            toc,
-        ]
-        final_report.extend(pretty_issues)
-        return "\n\n".join(final_report)
+        return (
+            f"<h1>BEAD Data Validation Results from the {fmtd_rundate_str} "
+            "run:</h1>"
+        )
 
-    def _format_all_fails_recorded_message(self, all_fails_recorded: bool) -> str:
+    def _format_all_fails_recorded_message(
+        self, all_fails_recorded: bool, failure_sampling: Optional[str] = None
+    ) -> str:
+        if failure_sampling == "reservoir":
+            shown_msg = (
+                f"Only showing values from {self.max_error_rows} records with "
+                "invalid data: the first few, and a random sample of the rest.\n"
+            )
+        else:
+            shown_msg = (
+                f"Only showing values from the first {self.max_error_rows} "
+                "records with invalid data.\n"
+            )
         if all_fails_recorded:
             msg = "Showing all instances of the erroneous data raising this" " issue."
+        elif self.failure_export_dir is not None:
+            msg = (
+                f"{shown_msg}"
+                "All of the invalid values were exported to the files in "
+                f"{self.failure_export_dir}."
+            )
         else:
             msg = (
-                f"Only showing values from the first {self.max_error_rows} "
-                "records with invalid data.\n"
+                f"{shown_msg}"
                 "To see more of the values that need to be fixed, you can "
                 "either rerun the entire BEADChallengeDataValidator "
-                "with a larger --single_error_log_limit | -s argument, or "
+                "with a larger --single_error_log_limit | -s argument (or "
+                "with --export_failures to export all of them), or "
                 "fix these values (or the issue causing these invalid values) "
                 "and then rerun the BEADChallengeDataValidator."
             )
@@ -0,0 +1,145 @@
+import hashlib
+import heapq
+import json
+from typing import Any, Dict, List, Optional, Tuple
+
+FAILURE_SAMPLING_MODES = ["first", "reservoir"]
+
+# In reservoir mode, this many of the first failures are kept along with the
+#   sample of the rest.
+RESERVOIR_FIRST_FAILURES = 3
+
+
+def get_sample_key(
+    issue_type: str, column: Optional[str], validation: Optional[str]
+) -> str:
+    """Identifies the issue a failing row is sampled for, so each issue gets
+    an independent sample.
+    """
+    return f"{issue_type}:{column}:{validation}"
+
+
+def get_sample_priority(
+    seed: int, sample_key: str, failing_row: Tuple, line_offset: int = 0
+) -> int:
+    """Returns a pseudo-random priority for a failing row, derived from the seed,
+    the row's line number in the whole file (its row number plus line_offset,
+    the lines before the chunk it was found in) and its contents, so rows
+    with the same contents get different priorities. Keeping the rows with
+    the smallest priorities gives a uniform sample that's the same however
+    the file was split up.
+    """
+    row_number, id_value, value = failing_row
+    payload = json.dumps(
+        [seed, sample_key, row_number + line_offset, id_value, value], default=str
+    )
+    digest = hashlib.blake2b(payload.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big")
+
+
+def get_num_first_failures(limit: int) -> int:
+    return min(RESERVOIR_FIRST_FAILURES, limit)
+
+
+class FailureSample:
+    """The failing rows logged for an issue. In "first" mode these are the first
+    limit failing rows; in "reservoir" mode they're the first few failing rows
+    plus a uniform sample (without replacement) of the rest, kept in constant
+    memory as the limit - first few rows with the smallest priorities.
+
+    When sampling the failing rows of a chunk of a file, line_offset is the
+    number of lines before the chunk (which its row numbers don't count).
+    """
+
+    def __init__(
+        self,
+        limit: int,
+        mode: str = "first",
+        seed: int = 0,
+        sample_key: str = "",
+        line_offset: int = 0,
+    ) -> None:
+        if mode not in FAILURE_SAMPLING_MODES:
+            raise ValueError(
+                f"mode must be one of {FAILURE_SAMPLING_MODES}, not '{mode}'."
+            )
+        self.limit = max(limit, 0)
+        self.mode = mode
+        self.seed = seed
+        self.sample_key = sample_key
+        self.line_offset = line_offset
+        self.num_first = self.limit
+        if mode == "reservoir":
+            self.num_first = get_num_first_failures(self.limit)
+        self.first_rows = []
+        # A max-heap (by negated priority) of the sampled rows.
+        self._heap = []
+        self.num_seen = 0
+
+    def accepts_more(self) -> bool:
+        """Whether the next failing row could be kept (so callers only build the
+        rows that might be).
+        """
+        return self.mode == "reservoir" or len(self.first_rows) < self.limit
+
+    def add(self, failing_row: Tuple) -> None:
+        self.num_seen += 1
+        if len(self.first_rows) < self.num_first:
+            self.first_rows.append(failing_row)
+            return
+        if self.mode != "reservoir" or self.limit == self.num_first:
+            return
+        priority = get_sample_priority(
+            self.seed, self.sample_key, failing_row, self.line_offset
+        )
+        entry = (-priority, self.num_seen, failing_row)
+        if len(self._heap) < self.limit - self.num_first:
+            heapq.heappush(self._heap, entry)
+        elif priority < -self._heap[0][0]:
+            heapq.heapreplace(self._heap, entry)
+
+    @property
+    def failing_rows(self) -> List[Tuple]:
+        """The kept rows, in file order."""
+        sampled_rows = sorted(self._heap, key=lambda entry: entry[1])
+        return self.first_rows + [failing_row for _, _, failing_row in sampled_rows]
+
+    def get_details(self) -> Dict:
+        """Returns the issue_details entries describing how rows were sampled."""
+        if self.mode == "first":
+            return {}
+        return {"failure_sampling": self.mode, "failure_sampling_seed": self.seed}
+
+
+def merge_failing_rows(
+    failing_rows: List[Any],
+    other_failing_rows: List[Any],
+    limit: int,
+    seed: Optional[int] = None,
+    sample_key: str = "",
+) -> List[Any]:
+    """Merges the failing rows kept for an issue in two consecutive parts of a
+    file (with their line numbers in the whole file). With a seed (i.e. in
+    reservoir mode), the result is the first few failing rows and the sample
+    a single pass over both parts would've kept.
+    """
+    if seed is None:
+        return [*failing_rows, *other_failing_rows][:limit]
+    num_first = get_num_first_failures(limit)
+    # Each part's list starts with that part's first failing rows.
+    first_rows = [
+        *failing_rows[:num_first],
+        *other_failing_rows[:num_first],
+    ]
+    # The rest of the rows, in file order (so ties are broken the same way).
+    candidates = [
+        *failing_rows[num_first:],
+        *first_rows[num_first:],
+        *other_failing_rows[num_first:],
+    ]
+    sampled_rows = sorted(
+        candidates,
+        key=lambda failing_row: get_sample_priority(seed, sample_key, failing_row),
+    )[: limit - num_first]
+    sampled_rows = sorted(sampled_rows, key=lambda failing_row: failing_row[0])
+    return first_rows[:num_first] + sampled_rows
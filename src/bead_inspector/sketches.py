@@ -0,0 +1,192 @@
+import hashlib
+import heapq
+import math
+from typing import Any, Dict, Hashable, Iterable, List, Optional, Tuple
+
+# The number of distinct values a SpaceSaving sketch keeps counts for, and the
+#   number of (most common) values recorded in issue details.
+SKETCH_CAPACITY = 100
+TOP_K = 10
+
+
+class SpaceSaving:
+    """The Space-Saving heavy hitters sketch (Metwally et al., 2005), which
+    counts the most frequent values in a stream while keeping at most capacity
+    counters. When a new value arrives and every counter is taken, the value
+    with the smallest count is evicted and the new value inherits its count,
+    so counts can overestimate (by at most the evicted count) but any value
+    occurring more than n / capacity times in n values is always kept.
+
+    Until every counter is taken, this is just an exact count of each value.
+    The counters are only put in a min-heap (to find the smallest count in
+    O(log capacity)) once a value has to be evicted.
+    """
+
+    def __init__(self, capacity: int = SKETCH_CAPACITY) -> None:
+        self.capacity = capacity
+        self.counts = {}
+        # The overcounts of the values that inherited an evicted count (any
+        #   other value's count is exact).
+        self.overcounts = {}
+        self.total = 0
+        # (count, push number, value) entries, one per counter. A value's count
+        #   may have grown since its entry was pushed.
+        self._heap = None
+        self._num_pushes = 0
+
+    def add(self, value: Hashable, count: int = 1) -> None:
+        self.total += count
+        if value in self.counts:
+            self.counts[value] += count
+        elif len(self.counts) < self.capacity:
+            self.counts[value] = count
+        else:
+            min_value = self._pop_min_value()
+            min_count = self.counts.pop(min_value)
+            self.overcounts.pop(min_value, None)
+            self.counts[value] = min_count + count
+            self.overcounts[value] = min_count
+            self._push(value)
+
+    def _push(self, value: Hashable) -> None:
+        heapq.heappush(self._heap, (self.counts[value], self._num_pushes, value))
+        self._num_pushes += 1
+
+    def _pop_min_value(self) -> Hashable:
+        """Pops the value with the smallest count off the heap (building it
+        first if need be). Entries whose count is out of date are pushed back
+        with their current count, so there's still one entry per counter.
+        """
+        if self._heap is None:
+            self._heap = []
+            for value in self.counts:
+                self._push(value)
+        while True:
+            count, _, value = heapq.heappop(self._heap)
+            if self.counts[value] == count:
+                return value
+            self._push(value)
+
+    def update(self, values: Iterable[Hashable]) -> None:
+        for value in values:
+            self.add(value)
+
+    def merge(self, other: "SpaceSaving") -> None:
+        """Merges another sketch (e.g. of the values in another chunk of a file)
+        into this one, as in Agarwal et al.'s (2012) mergeable summaries. A
+        value missing from a full sketch may have occurred up to that
+        sketch's smallest count times, so that's added to its count (and to
+        its overcount); then only the capacity largest counts are kept.
+        """
+        values = dict.fromkeys([*self.counts, *other.counts])
+        counts = {}
+        overcounts = {}
+        for sketch in [self, other]:
+            min_count = sketch._get_min_count()
+            for value in values:
+                if value in sketch.counts:
+                    count = sketch.counts[value]
+                    overcount = sketch.overcounts.get(value, 0)
+                else:
+                    count = overcount = min_count
+                counts[value] = counts.get(value, 0) + count
+                overcounts[value] = overcounts.get(value, 0) + overcount
+        kept_values = sorted(counts, key=lambda value: -counts[value])[: self.capacity]
+        self.counts = {value: counts[value] for value in kept_values}
+        self.overcounts = {
+            value: overcounts[value] for value in kept_values if overcounts[value] > 0
+        }
+        self.total += other.total
+        self._heap = None
+
+    def _get_min_count(self) -> int:
+        """The most times a value missing from the sketch may have occurred."""
+        if len(self.counts) < self.capacity:
+            return 0
+        return min(self.counts.values())
+
+    def to_state(self) -> Dict:
+        return {
+            "capacity": self.capacity,
+            "total": self.total,
+            "counters": [
+                [value, count, self.overcounts.get(value, 0)]
+                for value, count in self.counts.items()
+            ],
+        }
+
+    @classmethod
+    def from_state(cls, state: Dict) -> "SpaceSaving":
+        sketch = cls(state["capacity"])
+        sketch.total = state["total"]
+        for value, count, overcount in state["counters"]:
+            sketch.counts[value] = count
+            if overcount > 0:
+                sketch.overcounts[value] = overcount
+        return sketch
+
+    @property
+    def is_exact(self) -> bool:
+        """Whether no value has been evicted, so every count is exact."""
+        return len(self.overcounts) == 0
+
+    def most_common(self, k: int = TOP_K) -> List[Tuple[Any, int]]:
+        return sorted(self.counts.items(), key=lambda item: -item[1])[:k]
+
+    def get_details(self, k: int = TOP_K) -> Dict:
+        """Returns the issue_details entries describing the most common values."""
+        return {
+            "most_common_invalid_values": [
+                [value, count] for value, count in self.most_common(k)
+            ],
+            "most_common_counts_exact": self.is_exact,
+        }
+
+
+def merge_value_counters(states: List[Dict]) -> Dict:
+    """Merges the saved sketches of the values in chunks of a file."""
+    sketch = SpaceSaving.from_state(states[0])
+    for state in states[1:]:
+        sketch.merge(SpaceSaving.from_state(state))
+    return sketch.to_state()
+
+
+class HyperLogLog:
+    """The HyperLogLog distinct-count sketch (Flajolet et al., 2007). Each value
+    is hashed to 64 bits; the first precision bits pick a register, which keeps
+    the longest run of leading zeros seen in the remaining bits. With the
+    default precision (4096 one-byte registers) the standard error of the
+    estimate is about 1.6%, whatever the number of values.
+    """
+
+    def __init__(self, precision: int = 12, registers: Optional[bytes] = None):
+        self.precision = precision
+        self.num_registers = 1 << precision
+        if registers is None:
+            self.registers = bytearray(self.num_registers)
+        else:
+            self.registers = bytearray(registers)
+
+    def add(self, value: str) -> None:
+        digest = hashlib.blake2b(value.encode("utf-8"), digest_size=8).digest()
+        hashed = int.from_bytes(digest, "big")
+        num_rest_bits = 64 - self.precision
+        index = hashed >> num_rest_bits
+        rest = hashed & ((1 << num_rest_bits) - 1)
+        rank = num_rest_bits - rest.bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def update(self, other: "HyperLogLog") -> None:
+        """Merges another sketch (with the same precision) into this one."""
+        self.registers = bytearray(map(max, self.registers, other.registers))
+
+    def count(self) -> int:
+        m = self.num_registers
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / sum(2.0**-r for r in self.registers)
+        num_empty_registers = self.registers.count(0)
+        if estimate <= 2.5 * m and num_empty_registers > 0:
+            # Linear counting is more accurate for small cardinalities.
+            estimate = m * math.log(m / num_empty_registers)
+        return round(estimate)
@@ -1,14 +1,48 @@
 import copy
 import datetime as dt
+import gzip
 import json
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
 from itertools import zip_longest
 from pathlib import Path
 import re
-from typing import Any, Dict, List, Optional, Union
-
-from bead_inspector import constants, rules
-from bead_inspector.file_utils import CSVData, EmptyFileError
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, Union
+
+from bead_inspector import constants, incremental, rules
+from bead_inspector.bitmaps import RowBitmap, popcount
+from bead_inspector.cache import ResultCache, hash_data_file
+from bead_inspector.export import (
+    FAILURE_EXPORT_FORMATS,
+    FailureExportWriter,
+    write_valid_and_rejected_rows,
+)
+from bead_inspector.file_utils import (
+    BOM_LENGTHS,
+    BOMLESS_ENCODINGS,
+    CSVData,
+    EmptyFileError,
+    ZipArchiveMember,
+    get_compression_suffix,
+    get_file_size,
+    list_data_files,
+    map_data_formats_to_paths,
+)
+from bead_inspector.history import RunHistory
+from bead_inspector.performance import StageTimer, get_peak_memory_mb
+from bead_inspector.profiling import (
+    ColumnProfile,
+    merge_column_profiles,
+    summarize_column_profiles,
+)
 from bead_inspector.reporting import ReportGenerator
+from bead_inspector.sampling import (
+    FAILURE_SAMPLING_MODES,
+    FailureSample,
+    get_sample_key,
+)
+from bead_inspector.sketches import SpaceSaving
 
 
 class ColumnValidation:
@@ -36,6 +70,183 @@ class RowValidation:
         validator_func = self.validation.validator()
         return validator_func(row)
 
+    @property
+    def column_indexes(self) -> Dict[str, int]:
+        """Maps the names of the columns the rule reads (rules name them in
+        attributes ending in '_index') to their positions, in column order.
+        """
+        indexes = {
+            attr[: -len("_index")]: getattr(self.validation, attr)
+            for attr in dir(self.validation)
+            if attr.endswith("_index")
+            and isinstance(getattr(self.validation, attr), int)
+        }
+        return dict(sorted(indexes.items(), key=lambda item: item[1]))
+
+    @property
+    def column_indices(self) -> List[int]:
+        """The positions of the columns the rule reads."""
+        return sorted(set(self.column_indexes.values()))
+
+    def get_failing_values(self, row: List[Any]) -> Dict[str, Any]:
+        """Returns the values of the columns the rule reads from a row that
+        broke it, keyed by column name (leaving out any the row is too short
+        to have).
+        """
+        return {
+            column: row[index]
+            for column, index in self.column_indexes.items()
+            if index < len(row)
+        }
+
+
+class TypedColumn:
+    def __init__(self) -> None:
+        # values[pos] is the cast value of the column in row pos. Null values
+        #   (in nullable columns), uncastable values, and the values of str
+        #   columns are left as read from the file; rows too short to have the
+        #   column get None.
+        self.values = []
+        self.uncastable_positions = []
+        self.short_row_positions = []
+        self.cast_exceptions = []
+        # Summary stats of the column's values, gathered while casting them.
+        self.profile = None
+
+
+class TypedColumns:
+    """Casts the columns of a file's data to their defined dtypes lazily: a
+    column is cast the first time it's needed and the values and the positions
+    of any errors are cached for the rest of the run. Columns nothing asks for
+    are never cast.
+    """
+
+    def __init__(self, file_validator: "SingleFileValidator") -> None:
+        self.file_validator = file_validator
+        self._columns = {}
+        # The columns that were checked rather than cast.
+        self._checked = {}
+        self._applied_to_rows = set()
+
+    def __getitem__(self, col_index: int) -> TypedColumn:
+        if col_index not in self._columns:
+            with self.file_validator.stage_timer.stage("type_casting"):
+                self._columns[col_index] = self._cast_column(col_index)
+        return self._columns[col_index]
+
+    def __contains__(self, col_index: int) -> bool:
+        return col_index in self._columns
+
+    def _cast_column(self, col_index: int) -> TypedColumn:
+        csv_data_object = self.file_validator.csv_data_object
+        column = csv_data_object.header[col_index]
+        dtype = self.file_validator.get_column_dtype(column) or str
+        column_can_be_null = column in self.file_validator.nullable_columns
+        typed_column = TypedColumn()
+        values = typed_column.values
+        # The values as read, for the column's profile (for str columns, these
+        #   are the values).
+        raw_values = values if dtype is str else []
+        for pos, row in enumerate(csv_data_object.data):
+            if col_index > (len(row) - 1):
+                typed_column.short_row_positions.append(pos)
+                values.append(None)
+                if dtype is not str:
+                    raw_values.append(None)
+                continue
+            value = row[col_index]
+            if dtype is str:
+                values.append(value)
+                continue
+            raw_values.append(value)
+            if column_can_be_null and (value is None or value == ""):
+                values.append(value)
+            else:
+                try:
+                    values.append(dtype(value))
+                except ValueError:
+                    typed_column.uncastable_positions.append(pos)
+                    values.append(value)
+                except Exception as e:
+                    typed_column.cast_exceptions.append((pos, e))
+                    values.append(value)
+        typed_column.profile = self._new_profile(col_index)
+        typed_column.profile.add_values(raw_values, values)
+        return typed_column
+
+    def _new_profile(self, col_index: int) -> ColumnProfile:
+        column = self.file_validator.csv_data_object.header[col_index]
+        return ColumnProfile(self.file_validator.get_profile_kind(column))
+
+    def check_column(self, col_index: int) -> TypedColumn:
+        """Finds the rows too short to have a column and the values that can't
+        be cast to its dtype, profiling the column in the same pass, without
+        casting every value: each distinct value is cast once, and the cast
+        values aren't kept (so the returned TypedColumn has no values). For
+        columns no validation asks for the values of.
+        """
+        csv_data_object = self.file_validator.csv_data_object
+        column = csv_data_object.header[col_index]
+        dtype = self.file_validator.get_column_dtype(column) or str
+        column_can_be_null = column in self.file_validator.nullable_columns
+        values = [
+            row[col_index] if col_index < len(row) else None
+            for row in csv_data_object.data
+        ]
+        typed_column = TypedColumn()
+        cast_values = []
+        uncastable_values = set()
+        cast_exceptions = {}
+        if dtype is not str:
+            for value in set(values):
+                if value is None or (column_can_be_null and value == ""):
+                    continue
+                try:
+                    cast_values.append(dtype(value))
+                except ValueError:
+                    uncastable_values.add(value)
+                except Exception as e:
+                    cast_exceptions[value] = e
+        if None in values or uncastable_values or cast_exceptions:
+            for pos, value in enumerate(values):
+                if value is None:
+                    typed_column.short_row_positions.append(pos)
+                elif value in uncastable_values:
+                    typed_column.uncastable_positions.append(pos)
+                elif value in cast_exceptions:
+                    typed_column.cast_exceptions.append((pos, cast_exceptions[value]))
+        typed_column.profile = self._new_profile(col_index)
+        typed_column.profile.add_values(values, cast_values)
+        self._checked[col_index] = typed_column
+        return typed_column
+
+    def get_profile(self, col_index: int) -> ColumnProfile:
+        """Returns the profile of a column's values, gathered while casting or
+        checking it.
+        """
+        if col_index in self._columns:
+            return self._columns[col_index].profile
+        if col_index not in self._checked:
+            self.check_column(col_index)
+        return self._checked[col_index].profile
+
+    def apply_to_rows(self, col_index: int) -> None:
+        """Writes the cast values of a column into the rows of the data, for
+        validations (i.e. row rules) that read whole rows.
+        """
+        if col_index in self._applied_to_rows:
+            return
+        self._applied_to_rows.add(col_index)
+        csv_data_object = self.file_validator.csv_data_object
+        if col_index >= len(csv_data_object.header):
+            return
+        column = csv_data_object.header[col_index]
+        if self.file_validator.get_column_dtype(column) in (None, str):
+            return
+        for row, value in zip(csv_data_object.data, self[col_index].values):
+            if len(row) > col_index:
+                row[col_index] = value
+
 
 class SingleFileValidator:
     def __init__(
@@ -49,26 +260,78 @@ class SingleFileValidator:
         row_validations: List[RowValidation],
         csv_header: Optional[List[str]] = None,
         single_error_log_limit: int = 20,
-        row_offset: int = 2,
+        header_only: bool = False,
+        csv_data_object: Optional[CSVData] = None,
+        failure_export: Optional[FailureExportWriter] = None,
+        failure_sampling: str = "first",
+        sampling_seed: int = 0,
+        stage_timer: Optional[StageTimer] = None,
+        line_offset: int = 0,
+        track_row_failures: bool = False,
     ) -> None:
+        """If a csv_data_object is given (e.g. a chunk of a file's records), it's
+        validated instead of loading the data from file_path.
+
+        The time spent in each stage (loading, type casting and each validation
+        method) and in each validator is accumulated in stage_timer, if given
+        (e.g. so the chunks of a file add to the same timer).
+
+        If a failure_export writer is given, every failing value is written to
+        it (not just the first single_error_log_limit per issue).
+
+        failure_sampling sets which failing rows are logged for each issue:
+        the first single_error_log_limit of them ("first"), or the first few
+        and a uniform random sample of the rest ("reservoir"), picked
+        deterministically for a given sampling_seed. When validating a chunk
+        of a file, line_offset is the number of lines before the chunk, so
+        rows are sampled by their line numbers in the whole file.
+
+        With track_row_failures=True, the rows failing each validation are
+        recorded in failure_bitmaps (for the row error stats, and to split or
+        fix records by what they failed).
+        """
         self.issues = []
         self.can_continue = True
         self.data_format = data_format
-        self.csv_data_object = self.get_csv_data_object(file_path, csv_header)
+        # header_only validators just read the header and run the structural
+        #   (column name and order) checks.
+        self.header_only = header_only
+        if stage_timer is None:
+            stage_timer = StageTimer()
+        self.stage_timer = stage_timer
+        if csv_data_object is None:
+            csv_data_object = self.get_csv_data_object(file_path, csv_header)
+        if csv_data_object is not None:
+            for stage_name, seconds in csv_data_object.load_timings.items():
+                self.stage_timer.add(stage_name, seconds)
+        self.csv_data_object = csv_data_object
         self.set_id_column(id_column)
         self.column_dtypes = column_dtypes
         self.nullable_columns = nullable_columns
+        self.typed_columns = TypedColumns(self)
+        # The sketches of each issue's invalid values, by the issue's position
+        #   in self.issues (saved with the issues of chunks, to merge them).
+        self.value_counters = {}
+        # The rows failing each validation, by validation label (if tracked).
+        self.track_row_failures = track_row_failures
+        self.failure_bitmaps = {}
+        self.failure_levels = {}
+        self.failure_export = failure_export
+        self.failure_sampling = failure_sampling
+        self.sampling_seed = sampling_seed
+        self.line_offset = line_offset
         self.column_validations = column_validations
         self.row_validations = row_validations
         # This param short circuits checking and logging any given issue.
         self.single_error_log_limit = single_error_log_limit
-        self.row_offset = row_offset
 
     def get_csv_data_object(
         self, file_path: Path, csv_header: Optional[List[str]] = None
     ) -> CSVData:
         try:
-            csv_data_object = CSVData(file_path, csv_header)
+            csv_data_object = CSVData(
+                file_path, csv_header, header_only=self.header_only
+            )
         except FileNotFoundError:
             self.issues.append(
                 {
@@ -166,16 +429,51 @@ class SingleFileValidator:
                 }
             )
 
+    def get_column_dtype(self, column: str) -> Optional[type]:
+        if column == self.csv_data_object.index_col:
+            return int
+        return self.column_dtypes.get(column)
+
+    def get_profile_kind(self, column: str) -> str:
+        if self.get_column_dtype(column) in (int, float):
+            return "numeric"
+        date_validations = [constants.DateValidator, constants.DateNullableValidator]
+        for col_validation in self.column_validations:
+            if (
+                col_validation.column_name == column
+                and col_validation.validation in date_validations
+            ):
+                return "date"
+        return "str"
+
+    def get_column_profiles(self) -> Dict[str, Dict]:
+        """Returns the (saved) profiles of the file's columns, in file order."""
+        header = self.csv_data_object.header
+        return {
+            header[col_index]: self.typed_columns.get_profile(col_index).to_state()
+            for col_index in range(len(header))
+            if header[col_index] != self.csv_data_object.index_col
+        }
+
+    def get_typed_column(self, column: str) -> "TypedColumn":
+        """Returns the values of a column cast to its defined dtype. Columns
+        are cast the first time any validation (or a later cross-file check or
+        report) asks for them, and the result is reused from then on.
+        """
+        return self.typed_columns[self.csv_data_object.header.index(column)]
+
     def validate_column_types(self) -> None:
-        """At present, this also has the stateful effect of casting column
-        values to the defined dtype.
+        """Logs the values that can't be cast to their column's dtype and the
+        rows too short to have each column. This runs after the other
+        validations: the columns they asked for were already cast (recording
+        these errors as they went), so only the columns nothing asked for are
+        checked here.
         """
         for i, column in enumerate(self.csv_data_object.header):
-            column_can_be_null = column in self.nullable_columns
             if column == self.csv_data_object.index_col:
-                valid_column_type = int
-            else:
-                valid_column_type = self.column_dtypes.get(column)
+                # The index column is generated (as ints) when loading the file.
+                continue
+            valid_column_type = self.get_column_dtype(column)
             if valid_column_type is None:
                 self.issues.append(
                     {
@@ -187,57 +485,73 @@ class SingleFileValidator:
                     }
                 )
                 valid_column_type = str
-            num_dtype_errors = 0
-            num_cols_in_row_errors = 0
-            dtype_failing_rows = []
-            row_col_failing_rows = []
-            for row in self.csv_data_object.data:
-                try:
-                    if i > (len(row) - 1):
-                        num_cols_in_row_errors += 1
-                        if num_cols_in_row_errors <= self.single_error_log_limit:
-                            row_col_failing_rows.append(
-                                (
-                                    row[0] + self.row_offset,
-                                    self._get_id_column_value(row),
-                                    i,
-                                )
-                            )
-                        continue
-                    if valid_column_type is not str:
-                        if column_can_be_null and (row[i] is None or row[i] == ""):
-                            continue
-                        row[i] = valid_column_type(row[i])
-                except (ValueError, IndexError):
-                    num_dtype_errors += 1
-                    if num_dtype_errors <= self.single_error_log_limit:
-                        try:
-                            value = row[i]
-                        except IndexError:
-                            value = f"Missing column number {i} in this row"
-                        dtype_failing_rows.append(
-                            (
-                                row[0] + self.row_offset,
-                                self._get_id_column_value(row),
-                                value,
-                            )
-                        )
-                except Exception as e:
-                    self.issues.append(
-                        {
-                            "data_format": self.data_format,
-                            "issue_type": "column_dtype_validation_misc",
-                            "issue_level": "error",
-                            "issue_sort_order": 4,
-                            "issue_details": {
-                                "row_number": row[0],
-                                "column": column,
-                                "error_msg": str(e),
-                                "error_type": str(type(e)),
-                            },
-                        }
-                    )
+            data = self.csv_data_object.data
+            if i in self.typed_columns:
+                # The errors were found when a validation had the column cast.
+                typed_column = self.typed_columns[i]
+            else:
+                typed_column = self.typed_columns.check_column(i)
+            short_row_positions = typed_column.short_row_positions
+            uncastable_positions = typed_column.uncastable_positions
+            cast_exceptions = typed_column.cast_exceptions
+            row_col_sample = self._new_failure_sample(
+                "enough_columns_validation", column
+            )
+            row_col_failing_rows = self._get_failing_rows_at(
+                short_row_positions,
+                lambda row: (
+                    self._get_row_number(row),
+                    self._get_id_column_value(row),
+                    i,
+                ),
+                row_col_sample,
+            )
+            dtype_sample = self._new_failure_sample("column_dtype_validation", column)
+            dtype_failing_rows = self._get_failing_rows_at(
+                uncastable_positions,
+                lambda row: (
+                    self._get_row_number(row),
+                    self._get_id_column_value(row),
+                    row[i],
+                ),
+                dtype_sample,
+            )
+            for pos, e in cast_exceptions:
+                self.issues.append(
+                    {
+                        "data_format": self.data_format,
+                        "issue_type": "column_dtype_validation_misc",
+                        "issue_level": "error",
+                        "issue_sort_order": 4,
+                        "issue_details": {
+                            "row_number": self._get_row_number(data[pos]),
+                            "column": column,
+                            "error_msg": str(e),
+                            "error_type": str(type(e)),
+                        },
+                    }
+                )
+            num_dtype_errors = len(uncastable_positions)
+            num_cols_in_row_errors = len(short_row_positions)
+            uncastable_values = SpaceSaving()
+            for pos in uncastable_positions:
+                uncastable_values.add(data[pos][i])
+                self._record_failure(
+                    f"{column} (dtype)", "error", data[pos], data[pos][i]
+                )
+            for pos, _ in cast_exceptions:
+                self._record_failure(
+                    f"{column} (dtype)", "error", data[pos], data[pos][i]
+                )
+            for pos in short_row_positions:
+                self._record_failure(
+                    f"{column} (missing column)",
+                    "error",
+                    data[pos],
+                    f"Missing column number {i} in this row",
+                )
             if num_dtype_errors > 0:
+                self.value_counters[len(self.issues)] = uncastable_values
                 self.issues.append(
                     {
                         "data_format": self.data_format,
@@ -251,6 +565,8 @@ class SingleFileValidator:
                             "number_of_uncastable_values": num_dtype_errors,
                             "total_fails": num_dtype_errors,
                             "intended_type": valid_column_type.__name__,
+                            **uncastable_values.get_details(),
+                            **self._get_sampling_details(dtype_sample),
                         },
                     }
                 )
@@ -269,18 +585,123 @@ class SingleFileValidator:
                             "number_of_rows_without_enough_columns": (
                                 row_col_failing_rows
                             ),
+                            **self._get_sampling_details(row_col_sample),
                         },
                     }
                 )
 
-    def _get_id_column_value(self, row: List) -> str:
+    def _new_failure_sample(
+        self,
+        issue_type: str,
+        column: Optional[str] = None,
+        validation: Optional[str] = None,
+    ) -> Optional[FailureSample]:
+        """Returns a FailureSample to pick the failing rows logged for an issue
+        in reservoir mode. In "first" mode, this returns None: the first
+        single_error_log_limit failing rows are just collected in a list.
+        """
+        if self.failure_sampling == "first":
+            return None
+        return FailureSample(
+            self.single_error_log_limit,
+            mode=self.failure_sampling,
+            seed=self.sampling_seed,
+            sample_key=get_sample_key(issue_type, column, validation),
+            line_offset=self.line_offset,
+        )
+
+    def _get_failing_rows_at(
+        self,
+        positions: List[int],
+        get_failing_row: Callable[[List], Tuple],
+        failure_sample: Optional[FailureSample],
+    ) -> List[Tuple]:
+        """Returns the failing rows logged for the rows at the given positions
+        in the data: the first single_error_log_limit of them, or the ones
+        failure_sample keeps.
+        """
+        data = self.csv_data_object.data
+        if failure_sample is None:
+            return [
+                get_failing_row(data[pos])
+                for pos in positions[: self.single_error_log_limit]
+            ]
+        for pos in positions:
+            failure_sample.add(get_failing_row(data[pos]))
+        return failure_sample.failing_rows
+
+    def _get_sampling_details(self, failure_sample: Optional[FailureSample]) -> Dict:
+        if failure_sample is None:
+            return {}
+        return failure_sample.get_details()
+
+    def _record_failure(
+        self, label: str, issue_level: str, row: List, value: Any
+    ) -> None:
+        """Records that a row failed the validation with the given label (if
+        tracking row failures) and, if exporting failures, writes out the
+        failing value.
+        """
+        if self.track_row_failures:
+            if label not in self.failure_bitmaps:
+                self.failure_bitmaps[label] = RowBitmap(
+                    len(self.csv_data_object.data)
+                )
+                self.failure_levels[label] = issue_level
+            self.failure_bitmaps[label].add(row[0])
+        if self.failure_export is not None:
+            self.failure_export.write(
+                self.data_format,
+                self._get_row_number(row),
+                self._get_id_column_value(row),
+                issue_level,
+                label,
+                value,
+            )
+
+    def get_row_error_stats(self) -> Optional[Dict]:
+        """Rolls the per-validation failure bitmaps up into the number of rows
+        with any error-level issue, the number with only info-level issues, and
+        the number of rows failing each pair of validations (or returns None if
+        row failures weren't tracked).
+        """
+        if not self.track_row_failures:
+            return None
+        error_rows = 0
+        info_rows = 0
+        bitmap_ints = {}
+        for label, bitmap in self.failure_bitmaps.items():
+            bitmap_ints[label] = bitmap.to_int()
+            if self.failure_levels[label] == "error":
+                error_rows |= bitmap_ints[label]
+            else:
+                info_rows |= bitmap_ints[label]
+        labels = sorted(bitmap_ints.keys())
+        co_failures = []
+        for i, label in enumerate(labels):
+            for other_label in labels[i + 1 :]:
+                num_rows = popcount(bitmap_ints[label] & bitmap_ints[other_label])
+                if num_rows > 0:
+                    co_failures.append([label, other_label, num_rows])
+        return {
+            "rows_with_errors": popcount(error_rows),
+            "rows_with_only_info_issues": popcount(info_rows & ~error_rows),
+            "co_failures": co_failures,
+        }
+
+    def _get_row_number(self, row: List) -> int:
+        """Returns the physical line number in the file that a row starts on."""
+        return self.csv_data_object.get_line_number(row[0])
+
+    def _get_id_column_value(self, row: List) -> Any:
+        """Returns a row's id, cast to the id column's dtype."""
         try:
             id_col_value = row[self.id_column_index]
         except (IndexError, TypeError):
-            id_col_value = (
-                f"Missing the id_column (column number {self.id_column_index})"
-            )
-        return id_col_value
+            return f"Missing the id_column (column number {self.id_column_index})"
+        if self.get_column_dtype(self.id_column) in (None, str):
+            return id_col_value
+        return self.typed_columns[self.id_column_index].values[row[0]]
 
     def validate_column_non_nullness(self) -> None:
         for i, column in enumerate(self.csv_data_object.header):
@@ -289,19 +710,31 @@ class SingleFileValidator:
                 or column not in self.column_dtypes.keys()
             ):
                 continue
-            rows_w_null_col_val = []
+            null_sample = self._new_failure_sample(
+                "required_column_not_null_validation", column
+            )
+            null_rows = []
             num_null = 0
             for row in self.csv_data_object.data:
                 try:
                     if row[i] is None or row[i] == "":
                         num_null += 1
-                        if num_null <= self.single_error_log_limit:
-                            row_details = (
-                                row[0] + self.row_offset,
+                        self._record_failure(
+                            f"{column} (null)", "error", row, row[i]
+                        )
+                        if (
+                            num_null <= self.single_error_log_limit
+                            or null_sample is not None
+                        ):
+                            failing_row = (
+                                self._get_row_number(row),
                                 self._get_id_column_value(row),
                                 row[i],
                             )
-                            rows_w_null_col_val.append(row_details)
+                            if null_sample is None:
+                                null_rows.append(failing_row)
+                            else:
+                                null_sample.add(failing_row)
                 except IndexError:
                     # This catches the case where a row has fewer than the
                     #   expected number of columns. This issue is recorded in
@@ -309,6 +742,8 @@ class SingleFileValidator:
                     #   here.
                     continue
             if num_null > 0:
+                if null_sample is not None:
+                    null_rows = null_sample.failing_rows
                 self.issues.append(
                     {
                         "data_format": self.data_format,
@@ -318,120 +753,231 @@ class SingleFileValidator:
                         "issue_details": {
                             "column": column,
                             "id_column": self.id_column,
-                            "rows_where_column_is_null": rows_w_null_col_val,
+                            "rows_where_column_is_null": null_rows,
                             "total_fails": num_null,
                             "all_fails_recorded": num_null
                             <= self.single_error_log_limit,
+                            **self._get_sampling_details(null_sample),
                         },
                     }
                 )
 
     def validate_column_contents(self) -> None:
         for col_validation in self.column_validations:
-            num_errors = 0
-            column = col_validation.column_name
-            failing_rows = []
-            try:
-                col_index = self.csv_data_object.header.index(column)
-                for row in self.csv_data_object.data:
-                    try:
-                        if not col_validation.validate(row[col_index]):
-                            num_errors += 1
-                            if num_errors <= self.single_error_log_limit:
-                                failing_rows.append(
-                                    (
-                                        row[0] + self.row_offset,
-                                        self._get_id_column_value(row),
-                                        row[col_index],
-                                    )
-                                )
-                    except IndexError:
-                        # This catches the case where a row has fewer than the
-                        #   expected number of columns. This issue is recorded
-                        #   in the validate_column_types() method, so we
-                        #   ignore it here.
-                        continue
-                if num_errors > 0:
-                    self.issues.append(
-                        {
-                            "data_format": self.data_format,
-                            "issue_type": "column_contents_validation",
-                            "issue_level": col_validation.issue_level,
-                            "issue_sort_order": 10,
-                            "issue_details": {
-                                "column": column,
-                                "id_column": self.id_column,
-                                "validation": (col_validation.validation.__name__),
-                                "failing_rows_and_values": failing_rows,
-                                "total_fails": num_errors,
-                                "all_fails_recorded": num_errors
-                                <= self.single_error_log_limit,
-                            },
-                        }
-                    )
-            except ValueError:
-                self.issues.append(
-                    {
-                        "data_format": self.data_format,
-                        "issue_type": "column_missing",
-                        "issue_level": col_validation.issue_level,
-                        "issue_sort_order": 1,
-                        "issue_details": {
-                            "column": column,
-                        },
-                    }
-                )
-
-    def validate_row_contents(self) -> None:
-        for row_validation in self.row_validations:
-            num_errors = 0
-            failing_rows = []
-            for row in self.csv_data_object.data:
-                if not row_validation.validate(row):
+            with self.stage_timer.stage(col_validation.validation.__name__, True):
+                self._validate_column_contents(col_validation)
+
+    def _validate_column_contents(self, col_validation: ColumnValidation) -> None:
+        num_errors = 0
+        column = col_validation.column_name
+        failure_sample = self._new_failure_sample(
+            "column_contents_validation",
+            column,
+            col_validation.validation.__name__,
+        )
+        failing_rows = []
+        invalid_values = SpaceSaving()
+        try:
+            col_index = self.csv_data_object.header.index(column)
+            typed_values = self.typed_columns[col_index].values
+            for row, value in zip(self.csv_data_object.data, typed_values):
+                if len(row) <= col_index:
+                    # This catches the case where a row has fewer than the
+                    #   expected number of columns. This issue is recorded
+                    #   in the validate_column_types() method, so we
+                    #   ignore it here.
+                    continue
+                if not col_validation.validate(value):
                     num_errors += 1
-                    if num_errors <= self.single_error_log_limit:
-                        failing_rows.append(
-                            (
-                                row[0] + self.row_offset,
-                                self._get_id_column_value(row),
-                                row,
-                            )
+                    invalid_values.add(value)
+                    self._record_failure(
+                        f"{column} ({col_validation.validation.__name__})",
+                        col_validation.issue_level,
+                        row,
+                        value,
+                    )
+                    if (
+                        num_errors <= self.single_error_log_limit
+                        or failure_sample is not None
+                    ):
+                        failing_row = (
+                            self._get_row_number(row),
+                            self._get_id_column_value(row),
+                            value,
                         )
+                        if failure_sample is None:
+                            failing_rows.append(failing_row)
+                        else:
+                            failure_sample.add(failing_row)
             if num_errors > 0:
+                if failure_sample is not None:
+                    failing_rows = failure_sample.failing_rows
+                self.value_counters[len(self.issues)] = invalid_values
                 self.issues.append(
                     {
                         "data_format": self.data_format,
-                        "issue_type": "row_rule_validation",
-                        "issue_level": row_validation.issue_level,
-                        "issue_sort_order": 15,
+                        "issue_type": "column_contents_validation",
+                        "issue_level": col_validation.issue_level,
+                        "issue_sort_order": 10,
                         "issue_details": {
-                            "rule_descr": row_validation.validation.rule_descr,
+                            "column": column,
                             "id_column": self.id_column,
-                            "validation": row_validation.validation.__name__,
+                            "validation": col_validation.validation.__name__,
                             "failing_rows_and_values": failing_rows,
                             "total_fails": num_errors,
                             "all_fails_recorded": num_errors
                             <= self.single_error_log_limit,
+                            **invalid_values.get_details(),
+                            **self._get_sampling_details(failure_sample),
                         },
                     }
                 )
+        except ValueError:
+            self.issues.append(
+                {
+                    "data_format": self.data_format,
+                    "issue_type": "column_missing",
+                    "issue_level": col_validation.issue_level,
+                    "issue_sort_order": 1,
+                    "issue_details": {
+                        "column": column,
+                    },
+                }
+            )
+
+    def validate_row_contents(self) -> None:
+        for row_validation in self.row_validations:
+            with self.stage_timer.stage(row_validation.validation.__name__, True):
+                self._validate_row_contents(row_validation)
+
+    def _validate_row_contents(self, row_validation: RowValidation) -> None:
+        for col_index in row_validation.column_indices:
+            self.typed_columns.apply_to_rows(col_index)
+        num_errors = 0
+        failing_rows = []
+        failure_sample = self._new_failure_sample(
+            "row_rule_validation",
+            validation=row_validation.validation.__name__,
+        )
+        for row in self.csv_data_object.data:
+            if not row_validation.validate(row):
+                num_errors += 1
+                self._record_failure(
+                    row_validation.validation.__name__,
+                    row_validation.issue_level,
+                    row,
+                    row[1:],
+                )
+                if (
+                    num_errors <= self.single_error_log_limit
+                    or failure_sample is not None
+                ):
+                    failing_row = (
+                        self._get_row_number(row),
+                        self._get_id_column_value(row),
+                        row_validation.get_failing_values(row),
+                    )
+                    if failure_sample is None:
+                        failing_rows.append(failing_row)
+                    else:
+                        failure_sample.add(failing_row)
+        if num_errors > 0:
+            if failure_sample is not None:
+                failing_rows = failure_sample.failing_rows
+            self.issues.append(
+                {
+                    "data_format": self.data_format,
+                    "issue_type": "row_rule_validation",
+                    "issue_level": row_validation.issue_level,
+                    "issue_sort_order": 15,
+                    "issue_details": {
+                        "rule_descr": row_validation.validation.rule_descr,
+                        "id_column": self.id_column,
+                        "validation": row_validation.validation.__name__,
+                        "failing_rows_and_values": failing_rows,
+                        "total_fails": num_errors,
+                        "all_fails_recorded": num_errors
+                        <= self.single_error_log_limit,
+                        **self._get_sampling_details(failure_sample),
+                    },
+                }
+            )
+
+    def get_issue_position(self, issue: Dict) -> Tuple[int, int]:
+        """Returns where an issue comes in the order the validations find
+        issues of its type (i.e. by column, column validation, or row rule).
+        """
+        details = issue["issue_details"]
+        if issue["issue_type"] == "row_rule_validation":
+            rule_names = [rv.validation.__name__ for rv in self.row_validations]
+            return (rule_names.index(details["validation"]), 0)
+        if issue["issue_type"] == "column_contents_validation":
+            column_validations = [
+                (cv.column_name, cv.validation.__name__)
+                for cv in self.column_validations
+            ]
+            position = column_validations.index(
+                (details["column"], details["validation"])
+            )
+            return (position, 0)
+        column_position = self.csv_data_object.header.index(details["column"])
+        return (column_position, details.get("row_number", 0))
 
     def run_single_file_validations(self) -> None:
         validation_funcs = [
             self.validate_column_names,
             self.validate_column_order,
-            self.validate_column_types,
-            self.validate_column_non_nullness,
-            self.validate_column_contents,
-            self.validate_row_contents,
         ]
+        if not self.header_only:
+            validation_funcs.extend(
+                [
+                    self.validate_column_non_nullness,
+                    self.validate_column_contents,
+                    self.validate_row_contents,
+                    self.validate_column_types,
+                ]
+            )
         for validation_func in validation_funcs:
             if not self.can_continue:
                 break
-            validation_func()
+            with self.stage_timer.stage(validation_func.__name__):
+                validation_func()
+
+
+class DataFormatValidator:
+    """Base class for the validators of each data format. Subclasses only
+    declare the format's schema; any extra keyword arguments are passed on to
+    the SingleFileValidator.
+    """
+
+    DATA_FORMAT: str
+    ID_COLUMN: str
+    COLUMN_DTYPES: Dict
+    NULLABLE_COLUMNS: List[str] = []
+    COLUMN_VALIDATIONS: List[ColumnValidation] = []
+    ROW_VALIDATIONS: List[RowValidation] = []
+    CSV_HEADER: Optional[List[str]] = None
 
+    def __init__(
+        self, file_path: Path, single_error_log_limit: int = 20, **kwargs
+    ) -> None:
+        self.file_validator = SingleFileValidator(
+            data_format=self.DATA_FORMAT,
+            file_path=file_path,
+            id_column=self.ID_COLUMN,
+            column_dtypes=self.COLUMN_DTYPES,
+            nullable_columns=self.NULLABLE_COLUMNS,
+            column_validations=self.COLUMN_VALIDATIONS,
+            row_validations=self.ROW_VALIDATIONS,
+            csv_header=self.CSV_HEADER,
+            single_error_log_limit=single_error_log_limit,
+            **kwargs,
+        )
+        self.file_validator.run_single_file_validations()
 
-class ChallengerDataValidator:
+
+class ChallengerDataValidator(DataFormatValidator):
+    DATA_FORMAT = "challenger"
     ID_COLUMN = "challenger"
     COLUMN_DTYPES = {
         "challenger": str,
@@ -458,21 +1004,9 @@ class ChallengerDataValidator:
         RowValidation(rules.ChallengersISPProviderIdRuleValidator),
     ]
 
-    def __init__(self, file_path: Path, single_error_log_limit: int = 20) -> None:
-        self.file_validator = SingleFileValidator(
-            data_format="challenger",
-            file_path=file_path,
-            id_column=self.ID_COLUMN,
-            column_dtypes=self.COLUMN_DTYPES,
-            nullable_columns=self.NULLABLE_COLUMNS,
-            column_validations=self.COLUMN_VALIDATIONS,
-            row_validations=self.ROW_VALIDATIONS,
-            single_error_log_limit=single_error_log_limit,
-        )
-        self.file_validator.run_single_file_validations()
-
 
-class ChallengesDataValidator:
+class ChallengesDataValidator(DataFormatValidator):
+    DATA_FORMAT = "challenges"
     ID_COLUMN = "challenge"
     COLUMN_DTYPES = {
         "challenge": str,
@@ -559,21 +1093,8 @@ class ChallengesDataValidator:
         RowValidation(rules.ChallengesRebuttalAndResolutionDateRuleValidator),
     ]
 
-    def __init__(self, file_path: Path, single_error_log_limit: int = 20) -> None:
-        self.file_validator = SingleFileValidator(
-            data_format="challenges",
-            file_path=file_path,
-            id_column=self.ID_COLUMN,
-            column_dtypes=self.COLUMN_DTYPES,
-            nullable_columns=self.NULLABLE_COLUMNS,
-            column_validations=self.COLUMN_VALIDATIONS,
-            row_validations=self.ROW_VALIDATIONS,
-            single_error_log_limit=single_error_log_limit,
-        )
-        self.file_validator.run_single_file_validations()
-
 
-class PostChallengeCAIDataValidator:
+class PostChallengeCAIDataValidator(DataFormatValidator):
     ID_COLUMN = "entity_name"
     COLUMN_DTYPES = {
         "type": str,
@@ -636,19 +1157,6 @@ class PostChallengeCAIDataValidator:
 
     DATA_FORMAT = "post_challenge_cai"
 
-    def __init__(self, file_path: Path, single_error_log_limit: int = 20) -> None:
-        self.file_validator = SingleFileValidator(
-            data_format=self.DATA_FORMAT,
-            file_path=file_path,
-            id_column=self.ID_COLUMN,
-            column_dtypes=self.COLUMN_DTYPES,
-            nullable_columns=self.NULLABLE_COLUMNS,
-            column_validations=self.COLUMN_VALIDATIONS,
-            row_validations=self.ROW_VALIDATIONS,
-            single_error_log_limit=single_error_log_limit,
-        )
-        self.file_validator.run_single_file_validations()
-
 
 class CAIDataValidator(PostChallengeCAIDataValidator):
     """
@@ -658,7 +1166,8 @@ class CAIDataValidator(PostChallengeCAIDataValidator):
     DATA_FORMAT = "cai"
 
 
-class CAIChallengeDataValidator:
+class CAIChallengeDataValidator(DataFormatValidator):
+    DATA_FORMAT = "cai_challenges"
     ID_COLUMN = "challenge"
     COLUMN_DTYPES = {
         "challenge": str,
@@ -732,21 +1241,9 @@ class CAIChallengeDataValidator:
         RowValidation(rules.CaiChallengeFRNGivenType, issue_level="info"),
     ]
 
-    def __init__(self, file_path: Path, single_error_log_limit: int = 20) -> None:
-        self.file_validator = SingleFileValidator(
-            data_format="cai_challenges",
-            file_path=file_path,
-            id_column=self.ID_COLUMN,
-            column_dtypes=self.COLUMN_DTYPES,
-            nullable_columns=self.NULLABLE_COLUMNS,
-            column_validations=self.COLUMN_VALIDATIONS,
-            row_validations=self.ROW_VALIDATIONS,
-            single_error_log_limit=single_error_log_limit,
-        )
-        self.file_validator.run_single_file_validations()
 
-
-class PostChallengeLocationDataValidator:
+class PostChallengeLocationDataValidator(DataFormatValidator):
+    DATA_FORMAT = "post_challenge_locations"
     ID_COLUMN = "location_id"
     COLUMN_DTYPES = {
         "location_id": int,
@@ -759,69 +1256,30 @@ class PostChallengeLocationDataValidator:
     ]
     ROW_VALIDATIONS = []
 
-    def __init__(self, file_path: Path, single_error_log_limit: int = 20) -> None:
-        self.file_validator = SingleFileValidator(
-            data_format="post_challenge_locations",
-            file_path=file_path,
-            id_column=self.ID_COLUMN,
-            column_dtypes=self.COLUMN_DTYPES,
-            nullable_columns=self.NULLABLE_COLUMNS,
-            column_validations=self.COLUMN_VALIDATIONS,
-            row_validations=self.ROW_VALIDATIONS,
-            single_error_log_limit=single_error_log_limit,
-        )
-        self.file_validator.run_single_file_validations()
-
 
-class UnservedDataValidator:
+class UnservedDataValidator(DataFormatValidator):
+    DATA_FORMAT = "unserved"
     ID_COLUMN = "location_id"
     COLUMN_DTYPES = {"location_id": int}
+    CSV_HEADER = ["location_id"]
     NULLABLE_COLUMNS = []
     COLUMN_VALIDATIONS = [
         ColumnValidation("location_id", constants.BSLLocationIdValidator),
     ]
     ROW_VALIDATIONS = []
 
-    def __init__(self, file_path: Path, single_error_log_limit: int = 20) -> None:
-        self.file_validator = SingleFileValidator(
-            data_format="unserved",
-            file_path=file_path,
-            id_column=self.ID_COLUMN,
-            csv_header=["location_id"],
-            column_dtypes=self.COLUMN_DTYPES,
-            nullable_columns=self.NULLABLE_COLUMNS,
-            column_validations=self.COLUMN_VALIDATIONS,
-            row_validations=self.ROW_VALIDATIONS,
-            single_error_log_limit=single_error_log_limit,
-            row_offset=1,
-        )
-        self.file_validator.run_single_file_validations()
-
 
-class UnderservedDataValidator:
+class UnderservedDataValidator(DataFormatValidator):
+    DATA_FORMAT = "underserved"
     ID_COLUMN = "location_id"
     COLUMN_DTYPES = {"location_id": int}
+    CSV_HEADER = ["location_id"]
     NULLABLE_COLUMNS = []
     COLUMN_VALIDATIONS = [
         ColumnValidation("location_id", constants.BSLLocationIdValidator),
     ]
     ROW_VALIDATIONS = []
 
-    def __init__(self, file_path: Path, single_error_log_limit: int = 20) -> None:
-        self.file_validator = SingleFileValidator(
-            data_format="underserved",
-            file_path=file_path,
-            id_column=self.ID_COLUMN,
-            csv_header=["location_id"],
-            column_dtypes=self.COLUMN_DTYPES,
-            nullable_columns=self.NULLABLE_COLUMNS,
-            column_validations=self.COLUMN_VALIDATIONS,
-            row_validations=self.ROW_VALIDATIONS,
-            single_error_log_limit=single_error_log_limit,
-            row_offset=1,
-        )
-        self.file_validator.run_single_file_validations()
-
 
 class BEADChallengeDataValidator:
     EXPECTED_DATA_FORMATS = constants.EXPECTED_DATA_FORMATS
@@ -835,6 +1293,17 @@ class BEADChallengeDataValidator:
         "unserved": UnservedDataValidator,
         "underserved": UnderservedDataValidator,
     }
+    STRUCTURE_FAILURE_ACTIONS = ["continue", "skip", "abort"]
+    ISSUE_LOG_FORMATS = ["json", "ndjson", "ndjson.gz"]
+    # The rule of thumb we give users, used to estimate time saved by skipping
+    #   files when no file has been fully validated in a run.
+    SECONDS_PER_BYTE_ESTIMATE = 1.5 / 2**20
+    # The columns the multi-file checks compare across data formats.
+    KEY_SET_COLUMNS = {
+        "cai_challenges": ["challenger"],
+        "challenges": ["challenger"],
+        "challengers": ["challenger"],
+    }
 
     def __init__(
         self,
@@ -842,9 +1311,152 @@ class BEADChallengeDataValidator:
         expected_data_formats: Union[str, List[str]] = "*",
         results_dir: Optional[Path] = None,
         single_error_log_limit: int = 20,
+        max_workers: int = 1,
+        on_structure_failure: str = "continue",
+        cache_dir: Optional[Path] = None,
+        append_only: bool = False,
+        export_failures_dir: Optional[Path] = None,
+        export_format: str = "csv",
+        split_output_dir: Optional[Path] = None,
+        failure_sampling: str = "first",
+        sampling_seed: int = 0,
+        log_format: str = "json",
+        report_layout: str = "single",
+        history_db: Optional[Path] = None,
+        history_label: Optional[str] = None,
+        row_stats: bool = False,
     ):
+        """data_directory can be a directory of data files or a .zip archive
+        of them. Logs and reports are written to results_dir, which defaults
+        to data_directory (or, for an archive, the directory containing it).
+
+        With max_workers > 1, data files are validated in a pool of threads.
+
+        Before the full validations, the header of every file is probed and
+        checked for the expected column names and order. on_structure_failure
+        sets what happens to files that fail those checks:
+          - "continue": validate them fully anyway,
+          - "skip": skip the (slow) row-level validations for those files,
+          - "abort": skip the row-level validations for all files.
+
+        If a cache_dir is given, the results for each data file are cached
+        there and reused in later runs for files whose contents haven't
+        changed. The multi-file checks are always rerun. The rendered HTML of
+        each issue is cached there too, so reports only render new issues.
+
+        With append_only=True (which needs a cache_dir), files that have only
+        had records appended to them since the last run have just the new
+        records validated, and the results are combined with the saved results
+        for the earlier records.
+
+        If an export_failures_dir is given, every failing value in each data
+        file (not just the first single_error_log_limit per issue) is written
+        to a {data_format}_failures.csv (or .ndjson, per export_format) file
+        there.
+
+        If a split_output_dir is given, the records of each data file are
+        split into {data_format}.valid.csv (the records passing every
+        error-level single-file validation) and {data_format}.rejected.csv
+        (the rest, with a "reasons" column listing what they failed) there.
+
+        Exporting failures and splitting records need every row to be
+        validated, so cached results aren't reused for either.
+
+        failure_sampling sets which failing rows are logged for each issue:
+        the first single_error_log_limit of them ("first"), or the first few
+        and a uniform random sample of the rest ("reservoir"). Reservoir
+        samples are deterministic for a given sampling_seed, and are the same
+        whether a file is validated whole, in chunks, or from cached results.
+
+        log_format sets how the issue log is written: as one JSON document at
+        the end of the run ("json"), or as newline-delimited JSON ("ndjson",
+        or gzip-compressed "ndjson.gz"), which has the issues of each data file
+        appended as soon as it's validated, so the log of a run that crashed
+        can still be read.
+
+        report_layout sets whether the report is one HTML file ("single"), or
+        a directory of pages ("paginated"; see ReportGenerator), which stays
+        usable in a browser with very many failing rows.
+
+        If a history_db is given, the run is recorded in that SQLite database
+        (see RunHistory), labelled with history_label (which defaults to the
+        name of the data directory or archive).
+
+        With row_stats=True, the rows failing each single-file validation are
+        tracked, so the summary stats include the number of rows with errors
+        (or only info-level issues) and the validations failing on the same
+        rows. This takes time and memory for files with many failures, so it's
+        off by default.
+        """
+        start_time = time.perf_counter()
+        if on_structure_failure not in self.STRUCTURE_FAILURE_ACTIONS:
+            raise ValueError(
+                f"on_structure_failure must be one of "
+                f"{self.STRUCTURE_FAILURE_ACTIONS}, not '{on_structure_failure}'."
+            )
         self.issues = []
         self.single_error_log_limit = single_error_log_limit
+        if failure_sampling not in FAILURE_SAMPLING_MODES:
+            raise ValueError(
+                f"failure_sampling must be one of {FAILURE_SAMPLING_MODES}, not "
+                f"'{failure_sampling}'."
+            )
+        self.failure_sampling = failure_sampling
+        self.sampling_seed = sampling_seed
+        if log_format not in self.ISSUE_LOG_FORMATS:
+            raise ValueError(
+                f"log_format must be one of {self.ISSUE_LOG_FORMATS}, not "
+                f"'{log_format}'."
+            )
+        self.log_format = log_format
+        self.num_logged_issues = 0
+        self.num_logged_row_tables = 0
+        if report_layout not in ReportGenerator.REPORT_LAYOUTS:
+            raise ValueError(
+                f"report_layout must be one of {ReportGenerator.REPORT_LAYOUTS}, "
+                f"not '{report_layout}'."
+            )
+        self.report_layout = report_layout
+        self.max_workers = max_workers
+        self.on_structure_failure = on_structure_failure
+        self.skipped_data_formats = []
+        self.timings = {"validation": {}}
+        # The time spent in each stage and validator of each data file's
+        #   validation.
+        self.stage_timers = {}
+        if append_only and cache_dir is None:
+            raise ValueError("append_only mode needs a cache_dir to save its state in.")
+        if cache_dir is not None:
+            self.result_cache = ResultCache(cache_dir)
+        else:
+            self.result_cache = None
+        self.append_only = append_only
+        if export_format not in FAILURE_EXPORT_FORMATS:
+            raise ValueError(
+                f"export_format must be one of {FAILURE_EXPORT_FORMATS}, not "
+                f"'{export_format}'."
+            )
+        if export_failures_dir is not None:
+            export_failures_dir = Path(export_failures_dir)
+            export_failures_dir.mkdir(exist_ok=True, parents=True)
+        self.export_failures_dir = export_failures_dir
+        self.export_format = export_format
+        self.failure_export_paths = {}
+        if split_output_dir is not None:
+            split_output_dir = Path(split_output_dir)
+            split_output_dir.mkdir(exist_ok=True, parents=True)
+        self.split_output_dir = split_output_dir
+        self.split_row_counts = {}
+        self.row_stats = row_stats
+        self.cached_data_formats = []
+        self.file_hashes = {}
+        self.row_counts = {}
+        self.row_error_stats = {}
+        self.column_profiles = {}
+        # The values of the rows that break row rules, by data format and row
+        #   number (see move_failing_row_values).
+        self.failing_rows = {}
+        self.key_sets = {}
         self.run_time = dt.datetime.now().strftime("%Y%m%d_%H%M%S")
         self.data_format_validators = copy.deepcopy(self.DATA_FORMAT_VALIDATORS)
         if expected_data_formats == "*":
@@ -852,16 +1464,30 @@ class BEADChallengeDataValidator:
         self.expected_data_formats = expected_data_formats
         self.missing_data_formats = set()
         self.data_dir = Path(data_directory).resolve()
+        self.is_archive = self.data_dir.is_file() and zipfile.is_zipfile(self.data_dir)
+        self.set_results_dir(results_dir)
         self.setup_issue_logging()
         self.set_data_format_to_path_map()
         self.check_for_missing_formats()
+        self.run_header_probes()
         self.run_data_validations()
         self.generate_report()
+        if history_db is not None:
+            self.record_run_history(
+                history_db, history_label, time.perf_counter() - start_time
+            )
+
+    @property
+    def writes_row_level_outputs(self) -> bool:
+        """Whether the run writes out something for every failing row, which
+        needs a full validation of each file.
+        """
+        return self.export_failures_dir is not None or self.split_output_dir is not None
 
     @property
     def log_path(self) -> Path:
         return self.issue_logs_dir.joinpath(
-            f"validation_issue_logs_{self.run_time}.json"
+            f"validation_issue_logs_{self.run_time}.{self.log_format}"
         )
 
     def _prepare_extra_summary_stats(self) -> List[Dict]:
@@ -869,32 +1495,105 @@ class BEADChallengeDataValidator:
         for data_format in self.expected_data_formats:
             stats = {}
             stats["data_format"] = data_format
-            try:
-                total_rows_in_file = len(
-                    self.data_format_validators[
-                        data_format
-                    ].file_validator.csv_data_object.data
-                )
-            except AttributeError:
-                total_rows_in_file = "N/A; file missing."
+            total_rows_in_file = self.row_counts.get(data_format, "N/A; file missing.")
+            if data_format in self.skipped_data_formats:
+                total_rows_in_file = "N/A; file not fully validated."
             stats["total_rows_in_file"] = total_rows_in_file
+            row_error_stats = self.row_error_stats.get(data_format)
+            if row_error_stats is None or data_format in self.skipped_data_formats:
+                stats["rows_with_errors"] = "N/A"
+                stats["rows_with_only_info_issues"] = "N/A"
+                stats["rule_co_failures"] = []
+            else:
+                stats["rows_with_errors"] = row_error_stats["rows_with_errors"]
+                stats["rows_with_only_info_issues"] = row_error_stats[
+                    "rows_with_only_info_issues"
+                ]
+                stats["rule_co_failures"] = row_error_stats["co_failures"]
+            column_profiles = self.column_profiles.get(data_format)
+            if column_profiles is None or data_format in self.skipped_data_formats:
+                stats["column_profiles"] = {}
+            else:
+                stats["column_profiles"] = summarize_column_profiles(column_profiles)
             # if there are other stats to calculate and insert, do that here
             extra_stats.append(stats)
         return extra_stats
 
     def generate_report(self) -> None:
+        """Reports the issues (from memory) while the issue log is written."""
         extra_stats = self._prepare_extra_summary_stats()
-        self.reporter = ReportGenerator(
-            self.log_path,
-            extra_stats=extra_stats,
-            max_error_rows=self.single_error_log_limit,
-        )
-
-    def _get_data_format(self, file_path: Path) -> str:
-        return file_path.name.lower().replace(".csv", "")
+        fragment_cache_dir = None
+        if self.result_cache is not None:
+            fragment_cache_dir = self.result_cache.cache_dir.joinpath(
+                "report_fragments"
+            )
+        start_time = time.perf_counter()
+        try:
+            self.reporter = ReportGenerator(
+                self.log_path,
+                extra_stats=extra_stats,
+                max_error_rows=self.single_error_log_limit,
+                failure_export_dir=self.export_failures_dir,
+                issues=self.issues,
+                log_metadata={**self.log_metadata, "failing_rows": self.failing_rows},
+                layout=self.report_layout,
+                fragment_cache_dir=fragment_cache_dir,
+            )
+        finally:
+            if self.log_write is not None:
+                self.log_write.result()
+        self.timings["report_rendering"] = time.perf_counter() - start_time
+        print(f"Rendered the report in {self.timings['report_rendering']:.3f} seconds.")
+
+    def record_run_history(
+        self, history_db: Path, label: Optional[str], duration_seconds: float
+    ) -> None:
+        """Records the run's summary, its data files (with their hashes, row
+        counts and validation times) and its issues in a run history database.
+        """
+        if label is None:
+            label = re.sub(r"\.zip$", "", self.data_dir.name, flags=re.IGNORECASE)
+        files = []
+        for data_format, file_path in self.data_format_to_path_map.items():
+            if data_format not in self.file_hashes:
+                self.file_hashes[data_format] = hash_data_file(file_path)
+            row_error_stats = self.row_error_stats.get(data_format) or {}
+            files.append(
+                {
+                    "data_format": data_format,
+                    "file_hash": self.file_hashes[data_format],
+                    "row_count": self.row_counts.get(data_format),
+                    "rows_with_errors": row_error_stats.get("rows_with_errors"),
+                    "validation_seconds": self.timings["validation"].get(
+                        data_format
+                    ),
+                    "from_cache": data_format in self.cached_data_formats,
+                }
+            )
+        run_time = dt.datetime.strptime(self.run_time, "%Y%m%d_%H%M%S")
+        run = {
+            "label": label,
+            "run_time": run_time.isoformat(sep=" "),
+            "data_directory": str(self.data_dir),
+            "issue_log": (
+                str(self.log_path) if self.issue_logs_dir is not None else None
+            ),
+            "duration_seconds": duration_seconds,
+        }
+        with RunHistory(history_db) as history:
+            history.record_run(run, files, self.issues)
+
+    def set_results_dir(self, results_dir: Optional[Path] = None) -> None:
+        if results_dir is not None:
+            self.results_dir = Path(results_dir).resolve()
+            self.results_dir.mkdir(exist_ok=True, parents=True)
+        elif self.is_archive:
+            self.results_dir = self.data_dir.parent
+        else:
+            self.results_dir = self.data_dir
 
     def setup_issue_logging(self) -> None:
-        self.issue_logs_dir = self.data_dir.joinpath("logs")
+        self.issue_logs_dir = self.results_dir.joinpath("logs")
         try:
             self.issue_logs_dir.mkdir(exist_ok=True, parents=False)
         except FileExistsError:
@@ -913,12 +1612,9 @@ class BEADChallengeDataValidator:
             )
 
     def set_data_format_to_path_map(self) -> None:
-        self.data_format_to_path_map = {
-            p.name.lower().replace(".csv", ""): p
-            for p in self.data_dir.iterdir()
-            if p.is_file()
-            and p.name.lower().replace(".csv", "") in self.expected_data_formats
-        }
+        self.data_format_to_path_map = map_data_formats_to_paths(
+            list_data_files(self.data_dir), self.expected_data_formats
+        )
 
     def check_for_missing_formats(self) -> None:
         missing_formats = [
@@ -938,6 +1634,7 @@ class BEADChallengeDataValidator:
                         "issue_details": {"data_dir": str(self.data_dir)},
                     }
                 )
+            self.append_to_issue_log()
 
     def run_data_validations(self) -> None:
         print(
@@ -945,55 +1642,633 @@ class BEADChallengeDataValidator:
             "  Note: it may take a few minutes to run; expect 1 to 2 seconds\n"
             "        per 1MB of data."
         )
-        for data_format, file_path in self.data_format_to_path_map.items():
-            data_validator_cls = self.data_format_validators.get(data_format)
-            try:
-                data_validator = data_validator_cls(
-                    file_path, single_error_log_limit=self.single_error_log_limit
-                )
-            except Exception:
-                print(
-                    "Encountered an unexpected error while attempting to validate the "
-                    f"{data_format}.csv data file. Please provide this error traceback"
-                    " to the bead_inspector maintainers via a GitHub Issue.\n"
-                    "https://github.com/uchicago-dsi/"
-                    "uchicago-bead-challenge-validation-tool/issues"
-                )
-                raise
-            new_issues = data_validator.file_validator.issues
-            if data_validator.file_validator.can_continue:
-                print(f"Ran single-file validations for the {data_format} format.")
-            else:
-                print(
-                    "Failed to run single-file validations for the "
-                    f"{data_format} format.\n"
-                )
-                if len(new_issues) > 0:
-                    print("Issues found:")
-                    for issue in new_issues:
-                        print(json.dumps(issue, indent=4))
-                    print()
-            if len(new_issues) > 0:
-                self.issues.extend(new_issues)
-            self.data_format_validators[data_format] = data_validator
+        data_formats = [
+            df
+            for df in self.data_format_to_path_map.keys()
+            if df not in self.skipped_data_formats
+        ]
+        formats_to_validate = [
+            df for df in data_formats if not self.load_cached_result(df)
+        ]
+        if len(self.cached_data_formats) > 0:
+            print(
+                "Reused cached results for the unchanged data files: "
+                f"{', '.join(f'{df}.csv' for df in self.cached_data_formats)}"
+            )
+            self.append_to_issue_log()
+        # Results are handled (and their issues logged) as each data file's
+        #   validation finishes, in order.
+        format_results = self.iter_format_results(formats_to_validate)
+        for data_format, (data_validator, result) in zip(
+            formats_to_validate, format_results
+        ):
+            self.handle_format_result(data_format, data_validator, result)
+        self.add_skipped_format_issues()
+        self.append_to_issue_log()
 
-        present_files = list(self.data_format_to_path_map.keys())
+        present_files = data_formats
+        start_time = time.perf_counter()
         if all([fn in present_files for fn in ["challenges", "challengers"]]):
             self.run_challenges_and_challengers_validations()
         if all([fn in present_files for fn in ["cai_challenges", "challengers"]]):
             self.run_cai_challenges_and_challengers_validations()
+        self.timings["cross_file_checks"] = time.perf_counter() - start_time
         self.output_results()
 
+    def iter_format_results(
+        self, data_formats: List[str]
+    ) -> Iterator[Tuple[Any, Dict]]:
+        """Yields the validator and results of each data file, in order. With
+        max_workers > 1, the files are validated in a pool of threads;
+        otherwise (including max_workers <= 0) one at a time.
+        """
+        if self.max_workers <= 1:
+            yield from map(self.run_format_validation, data_formats)
+            return
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            yield from executor.map(self.run_format_validation, data_formats)
+
+    def handle_format_result(
+        self, data_format: str, data_validator: Any, result: Dict
+    ) -> None:
+        """Reports on, caches and logs the results of a data file's validation."""
+        if data_validator is None and "appended" in result:
+            print(
+                f"Ran single-file validations for the {data_format} format "
+                f"(validated {result['appended']['row_count']} new rows)."
+            )
+        elif data_validator is None:
+            print(
+                f"Ran single-file validations for the {data_format} format "
+                f"(revalidated {result['chunks']['revalidated']} of "
+                f"{result['chunks']['total']} chunks)."
+            )
+        elif data_validator.file_validator.can_continue:
+            print(f"Ran single-file validations for the {data_format} format.")
+        else:
+            print(
+                "Failed to run single-file validations for the "
+                f"{data_format} format.\n"
+            )
+            if len(result["issues"]) > 0:
+                print("Issues found:")
+                for issue in result["issues"]:
+                    print(json.dumps(issue, indent=4))
+                print()
+        if data_validator is not None:
+            self.data_format_validators[data_format] = data_validator
+        self.apply_format_result(data_format, result)
+        cache_key = self._get_cache_key(data_format)
+        if cache_key is not None:
+            self.result_cache.put(cache_key, result)
+        self.append_to_issue_log()
+
+    @property
+    def failure_log_settings(self) -> Dict[str, Any]:
+        """The settings that determine which failing rows are logged and
+        tracked, which are passed to each data format validator and are part of
+        every cache key.
+        """
+        return {
+            "single_error_log_limit": self.single_error_log_limit,
+            "failure_sampling": self.failure_sampling,
+            "sampling_seed": self.sampling_seed,
+            "track_row_failures": self.row_stats or self.split_output_dir is not None,
+        }
+
+    def _get_cache_key(self, data_format: str) -> Optional[str]:
+        if self.result_cache is None:
+            return None
+        if data_format not in self.file_hashes:
+            file_path = self.data_format_to_path_map[data_format]
+            self.file_hashes[data_format] = hash_data_file(file_path)
+        return self.result_cache.make_key(
+            data_format,
+            self.file_hashes[data_format],
+            **self.failure_log_settings,
+        )
+
+    def load_cached_result(self, data_format: str) -> bool:
+        """Reuses the cached results for a data file if the file hasn't changed
+        since they were cached. Returns whether cached results were used.
+        """
+        cache_key = self._get_cache_key(data_format)
+        if cache_key is None or self.writes_row_level_outputs:
+            return False
+        entry = self.result_cache.get(cache_key)
+        if entry is None:
+            return False
+        self.apply_format_result(data_format, entry)
+        self.cached_data_formats.append(data_format)
+        return True
+
+    def apply_format_result(self, data_format: str, result: Dict) -> None:
+        """Adds a data format's results (from a validation or the cache) to
+        those of the run.
+        """
+        failing_rows = {}
+        self.issues.extend(move_failing_row_values(result["issues"], failing_rows))
+        if len(failing_rows) > 0:
+            self.failing_rows[data_format] = failing_rows
+        if result["row_count"] is not None:
+            self.row_counts[data_format] = result["row_count"]
+        self.key_sets[data_format] = {
+            column: set(values) for column, values in result["key_sets"].items()
+        }
+        if result.get("row_error_stats") is not None:
+            self.row_error_stats[data_format] = result["row_error_stats"]
+        if result.get("column_profiles") is not None:
+            self.column_profiles[data_format] = result["column_profiles"]
+
+    def _get_key_sets(
+        self, data_format: str, csv_data_object: CSVData
+    ) -> Dict[str, List[str]]:
+        key_sets = {}
+        for column in self.KEY_SET_COLUMNS.get(data_format, []):
+            if column in csv_data_object.header:
+                key_sets[column] = sorted(
+                    set(el.lower() for el in csv_data_object[column])
+                )
+        return key_sets
+
+    def run_format_validation(self, data_format: str) -> Tuple[Any, Dict]:
+        """Validates a data file, returning its validator and its results
+        (the issues, row count and key sets for the multi-file checks). When
+        caching, files are validated in chunks where possible (and then no
+        validator is returned).
+        """
+        if self.result_cache is not None and not self.writes_row_level_outputs:
+            start_time = time.perf_counter()
+            try:
+                result = None
+                if self.append_only:
+                    result = self.validate_data_format_appended(data_format)
+                if result is None:
+                    result = self.validate_data_format_in_chunks(data_format)
+            except Exception:
+                self._print_maintainer_error_msg(data_format)
+                raise
+            if result is not None:
+                self.timings["validation"][data_format] = (
+                    time.perf_counter() - start_time
+                )
+                return None, result
+        data_validator = self.validate_data_format(data_format)
+        csv_data_object = data_validator.file_validator.csv_data_object
+        result = {
+            "data_format": data_format,
+            "issues": data_validator.file_validator.issues,
+            "row_count": None,
+            "key_sets": {},
+            "row_error_stats": None,
+            "column_profiles": None,
+        }
+        if csv_data_object is not None:
+            result["row_count"] = len(csv_data_object.data)
+            result["key_sets"] = self._get_key_sets(data_format, csv_data_object)
+            result["row_error_stats"] = (
+                data_validator.file_validator.get_row_error_stats()
+            )
+            result["column_profiles"] = (
+                data_validator.file_validator.get_column_profiles()
+            )
+        return data_validator, result
+
+    def _get_stage_timer(self, data_format: str) -> StageTimer:
+        return self.stage_timers.setdefault(data_format, StageTimer())
+
+    def _detect_encoding(self, data_format: str) -> str:
+        file_path = self.data_format_to_path_map[data_format]
+        with self._get_stage_timer(data_format).stage("encoding_detection"):
+            return CSVData.detect_encoding(file_path)
+
+    def _read_header_info(
+        self, data_format: str, encoding: str
+    ) -> Optional[Tuple[List[str], int, int]]:
+        """Returns a data file's header, the byte offset its records start at,
+        and the number of lines its header spans (or None for empty files).
+        """
+        file_path = self.data_format_to_path_map[data_format]
+        csv_header = self.DATA_FORMAT_VALIDATORS[data_format].CSV_HEADER
+        if csv_header is not None:
+            return csv_header, BOM_LENGTHS.get(encoding, 0), 0
+        with self._get_stage_timer(data_format).stage("parsing"):
+            header, data_offset, num_header_lines = incremental.read_header_record(
+                file_path, encoding
+            )
+        if header is None:
+            return None
+        return header, data_offset, num_header_lines
+
+    def _validate_chunk(
+        self,
+        data_format: str,
+        header: List[str],
+        encoding: str,
+        chunk_bytes: bytes,
+        byte_offset: int,
+        line_offset: int = 0,
+    ) -> Any:
+        file_path = self.data_format_to_path_map[data_format]
+        return self.DATA_FORMAT_VALIDATORS[data_format](
+            file_path,
+            **self.failure_log_settings,
+            csv_data_object=CSVData.from_chunk(
+                file_path, header, encoding, chunk_bytes, byte_offset
+            ),
+            stage_timer=self._get_stage_timer(data_format),
+            line_offset=line_offset,
+        )
+
+    def _get_header_issues(self, header_validator: Any) -> List[Dict]:
+        return [
+            i
+            for i in header_validator.file_validator.issues
+            if not incremental.is_row_level_issue(i)
+        ]
+
+    def _get_chunk_partial(self, data_format: str, chunk_validator: Any) -> Dict:
+        file_validator = chunk_validator.file_validator
+        csv_data_object = file_validator.csv_data_object
+        issues = []
+        for position, issue in enumerate(file_validator.issues):
+            if not incremental.is_row_level_issue(issue):
+                continue
+            if position in file_validator.value_counters:
+                value_counters = file_validator.value_counters[position].to_state()
+                issue = {
+                    **issue,
+                    "issue_details": {
+                        **issue["issue_details"],
+                        "invalid_value_counters": value_counters,
+                    },
+                }
+            issues.append(issue)
+        return {
+            "issues": issues,
+            "row_count": len(csv_data_object.data),
+            "line_count": csv_data_object.num_lines,
+            "key_sets": self._get_key_sets(data_format, csv_data_object),
+            "row_error_stats": file_validator.get_row_error_stats(),
+            "column_profiles": file_validator.get_column_profiles(),
+        }
+
+    def _get_empty_key_sets(self, data_format: str, header_validator: Any) -> Dict:
+        header = header_validator.file_validator.csv_data_object.header
+        return {
+            column: set()
+            for column in self.KEY_SET_COLUMNS.get(data_format, [])
+            if column in header
+        }
+
+    def validate_data_format_appended(self, data_format: str) -> Optional[Dict]:
+        """Validates only the records appended to a data file since the last
+        append_only run, combining their results with the saved state of the
+        earlier records (their issues, with up to single_error_log_limit
+        failing rows each, row and line counts, and key sets). Returns None if
+        the file can't be validated this way (e.g. it's compressed, or it was
+        changed rather than appended to).
+        """
+        file_path = self.data_format_to_path_map[data_format]
+        if (
+            isinstance(file_path, ZipArchiveMember)
+            or get_compression_suffix(file_path) is not None
+        ):
+            return None
+        state_key = self.result_cache.make_key(
+            data_format,
+            str(file_path),
+            append_state=True,
+            **self.failure_log_settings,
+        )
+        state = self.result_cache.get(state_key)
+        if state is not None and (
+            state["offset"] > get_file_size(file_path)
+            or incremental.fingerprint_file_prefix(file_path, state["offset"])
+            != state["fingerprint"]
+        ):
+            state = None
+        if state is None:
+            encoding = self._detect_encoding(data_format)
+            if not incremental.can_chunk(encoding):
+                return None
+            header_info = self._read_header_info(data_format, encoding)
+            if header_info is None:
+                return None
+            header, data_offset, num_header_lines = header_info
+            state = {
+                "encoding": encoding,
+                "header": header,
+                "offset": data_offset,
+                "row_count": 0,
+                "line_count": num_header_lines,
+                "issues": [],
+                "key_sets": {},
+                "row_error_stats": incremental.merge_row_error_stats([]),
+                "column_profiles": {},
+            }
+        encoding, header = state["encoding"], state["header"]
+        tail = incremental.read_file_tail(file_path, state["offset"])
+        try:
+            tail.decode(BOMLESS_ENCODINGS.get(encoding, encoding))
+        except UnicodeDecodeError:
+            # The new records need a different encoding than the earlier ones.
+            return None
+        header_validator = self._validate_chunk(
+            data_format, header, encoding, b"", state["offset"]
+        )
+        key_sets = self._get_empty_key_sets(data_format, header_validator)
+        for column, values in state["key_sets"].items():
+            key_sets[column].update(values)
+        complete_records, incomplete_record = incremental.split_complete_records(tail)
+        row_count, line_count = state["row_count"], state["line_count"]
+        chunk_issues = [state["issues"]]
+        row_error_stats = state["row_error_stats"]
+        column_profiles = state["column_profiles"]
+        offset = state["offset"]
+        for i, records in enumerate([complete_records, incomplete_record]):
+            if len(records) == 0:
+                continue
+            chunk_validator = self._validate_chunk(
+                data_format, header, encoding, records, offset, line_count
+            )
+            partial = self._get_chunk_partial(data_format, chunk_validator)
+            chunk_issues.append(
+                incremental.rebase_issues(partial["issues"], line_count)
+            )
+            row_count += partial["row_count"]
+            line_count += partial["line_count"]
+            offset += len(records)
+            for column, values in partial["key_sets"].items():
+                key_sets[column].update(values)
+            row_error_stats = incremental.merge_row_error_stats(
+                [row_error_stats, partial["row_error_stats"]]
+            )
+            column_profiles = merge_column_profiles(
+                [column_profiles, partial["column_profiles"]]
+            )
+            row_issues = incremental.merge_chunk_issues(
+                chunk_issues,
+                self.single_error_log_limit,
+                header_validator.file_validator.get_issue_position,
+            )
+            if i == 0:
+                # Only complete records are saved, so that a record still being
+                #   written when this run read the file is validated again.
+                self.result_cache.put(
+                    state_key,
+                    {
+                        **state,
+                        "offset": offset,
+                        "fingerprint": incremental.fingerprint_file_prefix(
+                            file_path, offset
+                        ),
+                        "row_count": row_count,
+                        "line_count": line_count,
+                        "issues": row_issues,
+                        "row_error_stats": row_error_stats,
+                        "column_profiles": column_profiles,
+                        "key_sets": {
+                            column: sorted(values)
+                            for column, values in key_sets.items()
+                        },
+                    },
+                )
+            chunk_issues = [row_issues]
+        return {
+            "data_format": data_format,
+            "issues": self._get_header_issues(header_validator)
+            + incremental.drop_value_counters(chunk_issues[0]),
+            "row_count": row_count,
+            "key_sets": {column: sorted(values) for column, values in key_sets.items()},
+            "row_error_stats": row_error_stats,
+            "column_profiles": column_profiles,
+            "appended": {
+                "row_count": row_count - state["row_count"],
+                "byte_count": len(tail),
+            },
+        }
+
+    def validate_data_format_in_chunks(self, data_format: str) -> Optional[Dict]:
+        """Validates a data file chunk by chunk, reusing the cached results for
+        chunks whose contents were validated in an earlier run (e.g. when only
+        a few rows of a large file were fixed since the last run). Returns
+        None if the file can't be split into chunks.
+        """
+        file_path = self.data_format_to_path_map[data_format]
+        encoding = self._detect_encoding(data_format)
+        if not incremental.can_chunk(encoding):
+            return None
+        header_info = self._read_header_info(data_format, encoding)
+        if header_info is None:
+            return None
+        header, data_offset, num_header_lines = header_info
+        # Issues about the file's header come from validating no rows at all.
+        header_validator = self._validate_chunk(
+            data_format, header, encoding, b"", data_offset
+        )
+        issues = self._get_header_issues(header_validator)
+        chunk_issues = []
+        chunk_row_error_stats = []
+        chunk_column_profiles = []
+        chunk_digests = []
+        num_revalidated = 0
+        row_count = 0
+        line_count = num_header_lines
+        key_sets = self._get_empty_key_sets(data_format, header_validator)
+        for chunk in incremental.iter_record_chunks(file_path, data_offset):
+            chunk_digests.append(chunk.digest)
+            # Failing rows are sampled by their line numbers in the whole file,
+            #   so sampled results only hold for a chunk at the same position.
+            chunk_position = {}
+            if self.failure_sampling == "reservoir":
+                chunk_position["line_offset"] = line_count
+            chunk_key = self.result_cache.make_key(
+                data_format,
+                chunk.digest,
+                chunk=True,
+                encoding=encoding,
+                header=header,
+                **self.failure_log_settings,
+                **chunk_position,
+            )
+            partial = self.result_cache.get(chunk_key)
+            if partial is None:
+                num_revalidated += 1
+                chunk_validator = self._validate_chunk(
+                    data_format,
+                    header,
+                    encoding,
+                    chunk.chunk_bytes,
+                    chunk.byte_offset,
+                    line_count,
+                )
+                partial = self._get_chunk_partial(data_format, chunk_validator)
+                self.result_cache.put(chunk_key, partial)
+            chunk_issues.append(
+                incremental.rebase_issues(partial["issues"], line_count)
+            )
+            row_count += partial["row_count"]
+            line_count += partial["line_count"]
+            chunk_row_error_stats.append(partial["row_error_stats"])
+            chunk_column_profiles.append(partial["column_profiles"])
+            for column, values in partial["key_sets"].items():
+                key_sets.setdefault(column, set()).update(values)
+        row_issues = incremental.merge_chunk_issues(
+            chunk_issues,
+            self.single_error_log_limit,
+            header_validator.file_validator.get_issue_position,
+        )
+        issues.extend(incremental.drop_value_counters(row_issues))
+        return {
+            "data_format": data_format,
+            "issues": issues,
+            "row_count": row_count,
+            "key_sets": {column: sorted(values) for column, values in key_sets.items()},
+            "row_error_stats": incremental.merge_row_error_stats(chunk_row_error_stats),
+            "column_profiles": merge_column_profiles(chunk_column_profiles),
+            "chunks": {
+                "total": len(chunk_digests),
+                "revalidated": num_revalidated,
+                "merkle_root": incremental.merkle_root(chunk_digests),
+            },
+        }
+
+    def run_header_probes(self) -> None:
+        """Reads just the header of every data file and runs the structural
+        checks on it, so files with the wrong columns are found in
+        milliseconds rather than after a full pass over every row.
+        """
+        start_time = time.perf_counter()
+        self.header_probes = {
+            data_format: self.validate_data_format(data_format, header_only=True)
+            for data_format in self.data_format_to_path_map.keys()
+        }
+        self.timings["header_probe"] = time.perf_counter() - start_time
+        failing_formats = [
+            data_format
+            for data_format, probe in self.header_probes.items()
+            if any(i["issue_level"] == "error" for i in probe.file_validator.issues)
+        ]
+        print(
+            f"Probed the headers of {len(self.header_probes)} data files in "
+            f"{self.timings['header_probe']:.3f} seconds."
+        )
+        if len(failing_formats) == 0:
+            return
+        print(
+            "These data files failed the structural (column name/order) "
+            f"checks: {', '.join(f'{df}.csv' for df in failing_formats)}"
+        )
+        if self.on_structure_failure == "skip":
+            self.skipped_data_formats = failing_formats
+        elif self.on_structure_failure == "abort":
+            self.skipped_data_formats = list(self.header_probes.keys())
+        if len(self.skipped_data_formats) > 0:
+            print(
+                "Skipping the row-level validations for: "
+                f"{', '.join(f'{df}.csv' for df in self.skipped_data_formats)}"
+            )
+
+    def add_skipped_format_issues(self) -> None:
+        """Records the structural issues found for skipped data files and
+        reports roughly how much time skipping them saved.
+        """
+        if len(self.skipped_data_formats) == 0:
+            return
+        for data_format in self.skipped_data_formats:
+            probe = self.header_probes[data_format]
+            self.issues.extend(probe.file_validator.issues)
+            self.data_format_validators[data_format] = probe
+        validated_formats = list(self.timings["validation"].keys())
+        validated_bytes = sum(
+            get_file_size(self.data_format_to_path_map[df]) for df in validated_formats
+        )
+        if validated_bytes > 0:
+            seconds_per_byte = (
+                sum(self.timings["validation"].values()) / validated_bytes
+            )
+        else:
+            seconds_per_byte = self.SECONDS_PER_BYTE_ESTIMATE
+        skipped_bytes = sum(
+            get_file_size(self.data_format_to_path_map[df])
+            for df in self.skipped_data_formats
+        )
+        self.timings["estimated_time_saved"] = skipped_bytes * seconds_per_byte
+        print(
+            f"Skipping {len(self.skipped_data_formats)} data files "
+            f"({skipped_bytes / 2**20:.1f} MB) saved an estimated "
+            f"{self.timings['estimated_time_saved']:.1f} seconds."
+        )
+
+    def validate_data_format(self, data_format: str, header_only: bool = False) -> Any:
+        file_path = self.data_format_to_path_map[data_format]
+        data_validator_cls = self.data_format_validators.get(data_format)
+        if not isinstance(data_validator_cls, type):
+            data_validator_cls = type(data_validator_cls)
+        failure_export = None
+        if self.export_failures_dir is not None and not header_only:
+            export_path = self.export_failures_dir.joinpath(
+                f"{data_format}_failures.{self.export_format}"
+            )
+            failure_export = FailureExportWriter(export_path, self.export_format)
+            self.failure_export_paths[data_format] = export_path
+        start_time = time.perf_counter()
+        try:
+            data_validator = data_validator_cls(
+                file_path,
+                **self.failure_log_settings,
+                header_only=header_only,
+                failure_export=failure_export,
+                stage_timer=None if header_only else self._get_stage_timer(data_format),
+            )
+        except Exception:
+            self._print_maintainer_error_msg(data_format)
+            raise
+        finally:
+            if failure_export is not None:
+                failure_export.close()
+        if self.split_output_dir is not None and not header_only:
+            self.write_split_output(data_format, data_validator.file_validator)
+        if not header_only:
+            self.timings["validation"][data_format] = time.perf_counter() - start_time
+        return data_validator
+
+    def write_split_output(
+        self, data_format: str, file_validator: SingleFileValidator
+    ) -> None:
+        """Writes the valid and rejected records of a fully validated file to
+        the split_output_dir.
+        """
+        if not file_validator.can_continue or file_validator.csv_data_object is None:
+            return
+        num_valid, num_rejected = write_valid_and_rejected_rows(
+            file_validator.csv_data_object,
+            file_validator.failure_bitmaps,
+            file_validator.failure_levels,
+            valid_path=self.split_output_dir.joinpath(f"{data_format}.valid.csv"),
+            rejected_path=self.split_output_dir.joinpath(
+                f"{data_format}.rejected.csv"
+            ),
+        )
+        self.split_row_counts[data_format] = {
+            "valid": num_valid,
+            "rejected": num_rejected,
+        }
+
+    def _print_maintainer_error_msg(self, data_format: str) -> None:
+        print(
+            "Encountered an unexpected error while attempting to validate the "
+            f"{data_format}.csv data file. Please provide this error traceback"
+            " to the bead_inspector maintainers via a GitHub Issue.\n"
+            "https://github.com/uchicago-dsi/"
+            "uchicago-bead-challenge-validation-tool/issues"
+        )
+
     def run_challenges_and_challengers_validations(self) -> None:
         try:
-            challenges_data = self.data_format_validators["challenges"]
-            challenges_challengers = challenges_data.file_validator.csv_data_object[
-                "challenger"
-            ]
-            challengers_data = self.data_format_validators["challengers"]
-            challenger_challengers = challengers_data.file_validator.csv_data_object[
-                "challenger"
-            ]
+            challenges_challengers = self.key_sets["challenges"]["challenger"]
+            challenger_challengers = self.key_sets["challengers"]["challenger"]
         except KeyError:
             self.issues.append(
                 {
@@ -1017,14 +2292,10 @@ class BEADChallengeDataValidator:
                 }
             )
             return
-        challengers_in_challenges = list(
-            set(el.lower() for el in challenges_challengers)
-        )
-        registered_challengers = list(set(el.lower() for el in challenger_challengers))
         unregistered_yet_submitting_challengers = list(
             {"missing_challenger_ids": c}
-            for c in challengers_in_challenges
-            if c not in registered_challengers
+            for c in sorted(challenges_challengers)
+            if c not in challenger_challengers
         )
         if len(unregistered_yet_submitting_challengers) > 0:
             self.issues.append(
@@ -1050,14 +2321,8 @@ class BEADChallengeDataValidator:
 
     def run_cai_challenges_and_challengers_validations(self) -> None:
         try:
-            cai_challenges_data = self.data_format_validators["cai_challenges"]
-            cai_challenges_challengers = (
-                cai_challenges_data.file_validator.csv_data_object["challenger"]
-            )
-            challengers_data = self.data_format_validators["challengers"]
-            challenger_challengers = challengers_data.file_validator.csv_data_object[
-                "challenger"
-            ]
+            cai_challenges_challengers = self.key_sets["cai_challenges"]["challenger"]
+            challenger_challengers = self.key_sets["challengers"]["challenger"]
         except KeyError:
             self.issues.append(
                 {
@@ -1081,14 +2346,10 @@ class BEADChallengeDataValidator:
                 }
             )
             return
-        challengers_in_cai_challenges = list(
-            set(el.lower() for el in cai_challenges_challengers)
-        )
-        registered_challengers = list(set(el.lower() for el in challenger_challengers))
         unregistered_yet_submitting_challengers = list(
             {"missing_challenger_ids": c}
-            for c in challengers_in_cai_challenges
-            if c not in registered_challengers
+            for c in sorted(cai_challenges_challengers)
+            if c not in challenger_challengers
         )
         if len(unregistered_yet_submitting_challengers) > 0:
             self.issues.append(
@@ -1112,10 +2373,89 @@ class BEADChallengeDataValidator:
                 }
             )
 
+    def _prepare_performance_stats(self) -> Dict:
+        """Returns how long each data file's validation took (in total, and
+        in each stage and validator) and its throughput in rows per second,
+        along with the time spent on the header probes and cross-file checks
+        and the run's peak memory. The peak memory is the process's peak
+        resident memory, which only ever grows and is shared by files
+        validated in parallel, so it's only reported for the whole run.
+        """
+        data_formats = {}
+        for data_format in self.data_format_to_path_map.keys():
+            if data_format in self.skipped_data_formats:
+                continue
+            seconds = self.timings["validation"].get(data_format)
+            if seconds is not None:
+                seconds = round(seconds, 6)
+            row_count = self.row_counts.get(data_format)
+            rows_per_second = None
+            if seconds and row_count is not None:
+                rows_per_second = round(row_count / seconds, 1)
+            stage_timer = self.stage_timers.get(data_format, StageTimer())
+            data_formats[data_format] = {
+                "from_cache": data_format in self.cached_data_formats,
+                "seconds": seconds,
+                "row_count": row_count,
+                "rows_per_second": rows_per_second,
+                **stage_timer.to_dict(),
+            }
+        return {
+            "header_probe_seconds": round(self.timings["header_probe"], 6),
+            "cross_file_check_seconds": round(self.timings["cross_file_checks"], 6),
+            "peak_memory_mb": get_peak_memory_mb(),
+            "data_formats": data_formats,
+        }
+
+    def _prepare_log_metadata(self) -> Dict:
+        """Returns the run's metadata for the issue log: the column profiles,
+        the summary stats (but for the column profiles) and report layout (so
+        the report can be rebuilt from the log), and the run's performance.
+        """
+        return {
+            "report_layout": self.report_layout,
+            "summary_stats": [
+                {k: v for k, v in stats.items() if k != "column_profiles"}
+                for stats in self._prepare_extra_summary_stats()
+            ],
+            "column_profiles": {
+                data_format: summarize_column_profiles(column_profiles)
+                for data_format, column_profiles in self.column_profiles.items()
+                if data_format not in self.skipped_data_formats
+            },
+            "performance": self._prepare_performance_stats(),
+        }
+
+    def append_to_issue_log(self) -> None:
+        """Appends the issues found since the last append to an NDJSON issue
+        log, each data format's table of failing rows going before its issues
+        (a JSON issue log is only written once, by output_results).
+        """
+        if not self.log_format.startswith("ndjson"):
+            return
+        new_row_tables = list(self.failing_rows.items())[self.num_logged_row_tables :]
+        new_records = [
+            {"failing_rows": {data_format: failing_rows}}
+            for data_format, failing_rows in new_row_tables
+        ]
+        new_records.extend(self.issues[self.num_logged_issues :])
+        if len(new_records) > 0:
+            append_to_ndjson_log(new_records, self.log_path)
+        self.num_logged_issues = len(self.issues)
+        self.num_logged_row_tables = len(self.failing_rows)
+
     def output_results(self) -> None:
+        """Finishes the issue log. A JSON log is written (with the issues
+        sorted) in a background thread, so the report can be generated at the
+        same time; generate_report waits for the log to be written. An NDJSON
+        log gets its remaining issues and then the run's metadata appended.
+        """
+        self.log_write = None
+        self.log_metadata = self._prepare_log_metadata()
         if self.issue_logs_dir is None:
             print(self.issues)
         else:
+            self.append_to_issue_log()
             self.issues = sorted(
                 self.issues,
                 key=lambda x: (
@@ -1125,10 +2465,78 @@ class BEADChallengeDataValidator:
                     x["issue_type"],
                 ),
             )
-            write_issues_to_json(issues=self.issues, file_path=self.log_path)
+            if self.log_format == "json":
+                log_writer = ThreadPoolExecutor(max_workers=1)
+                self.log_write = log_writer.submit(
+                    write_issues_to_json,
+                    issues=self.issues,
+                    file_path=self.log_path,
+                    metadata={**self.log_metadata, "failing_rows": self.failing_rows},
+                    compact=True,
+                )
+                log_writer.shutdown(wait=False)
+            else:
+                append_to_ndjson_log([{"metadata": self.log_metadata}], self.log_path)
         print(f"Number of issues (or types of issues) found: {len(self.issues)}")
 
 
-def write_issues_to_json(issues: List[Dict], file_path: Path) -> None:
+def move_failing_row_values(
+    issues: List[Dict], failing_rows: Dict[str, Dict[str, Any]]
+) -> List[Dict]:
+    """Moves the values that a data format's row rule issues record for their
+    failing rows into a table of the format's failing rows, keyed by row
+    number (as a str, as in the issue log), so a row that breaks several
+    rules is only stored once. Returns copies of the issues in which each
+    failing row has None in place of its values, which are looked up in the
+    table by the row number.
+    """
+    moved_issues = []
+    for issue in issues:
+        if issue["issue_type"] != "row_rule_validation":
+            moved_issues.append(issue)
+            continue
+        details = dict(issue["issue_details"])
+        failing_rows_and_values = []
+        for row_number, id_value, values in details["failing_rows_and_values"]:
+            failing_rows.setdefault(str(row_number), {}).update(values)
+            failing_rows_and_values.append((row_number, id_value, None))
+        details["failing_rows_and_values"] = failing_rows_and_values
+        moved_issues.append({**issue, "issue_details": details})
+    return moved_issues
+
+
+def append_to_ndjson_log(records: List[Dict], file_path: Path) -> None:
+    """Appends records (issues, or the run's metadata) to an NDJSON issue log,
+    one per line. Each append to a gzipped log is written as a separate gzip
+    member, so everything appended before a crash can still be read.
+    """
+    if str(file_path).endswith(".gz"):
+        log_file = gzip.open(file_path, "at", encoding="utf-8")
+    else:
+        log_file = open(file_path, "a", encoding="utf-8")
+    with log_file:
+        for record in records:
+            log_file.write(json.dumps(record, separators=(",", ":")) + "\n")
+
+
+def write_issues_to_json(
+    issues: List[Dict],
+    file_path: Path,
+    metadata: Optional[Dict] = None,
+    compact: bool = False,
+) -> None:
+    """Writes an issue log: just the list of issues, or, if metadata about the
+    run is given, a dict with the "metadata" and the "issues".
+
+    A compact log has no indentation or spaces, and is serialized in one go
+    (which uses json's much faster C encoder).
+    """
+    if metadata is None:
+        issue_log = issues
+    else:
+        issue_log = {"metadata": metadata, "issues": issues}
     with open(file_path, "w") as json_file:
-        json.dump(issues, json_file, indent=4)
+        if compact:
+            json_file.write(json.dumps(issue_log, separators=(",", ":")))
+        else:
+            json.dump(issue_log, json_file, indent=4)
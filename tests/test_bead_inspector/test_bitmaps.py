@@ -0,0 +1,25 @@
+from bead_inspector.bitmaps import RowBitmap, popcount
+
+
+def test_RowBitmap():
+    bitmap = RowBitmap(20)
+    for row_index in [0, 7, 8, 19]:
+        bitmap.add(row_index)
+    assert list(bitmap) == [0, 7, 8, 19]
+    assert len(bitmap) == 4
+    assert 8 in bitmap and 9 not in bitmap
+    other = RowBitmap(20)
+    other.add(8)
+    other.add(9)
+    assert popcount(bitmap.to_int() & other.to_int()) == 1
+
+
+def test_RowBitmap_update():
+    bitmap = RowBitmap(20)
+    bitmap.add(3)
+    other = RowBitmap(20)
+    other.add(3)
+    other.add(19)
+    bitmap.update(other)
+    assert list(bitmap) == [3, 19]
+    assert list(other) == [3, 19]
@@ -0,0 +1,98 @@
+from bead_inspector.diffing import diff_issues, format_issue_diff, get_issue_key
+
+
+def _get_issue(column, validation, id_values, all_fails_recorded=True):
+    return {
+        "data_format": "challenges",
+        "issue_type": "column_contents_validation",
+        "issue_level": "error",
+        "issue_sort_order": 10,
+        "issue_details": {
+            "column": column,
+            "validation": validation,
+            "id_column": "challenge",
+            "failing_rows_and_values": [
+                (i + 2, id_value, "bad") for i, id_value in enumerate(id_values)
+            ],
+            "total_fails": len(id_values),
+            "all_fails_recorded": all_fails_recorded,
+        },
+    }
+
+
+def _get_missing_file_issue(data_format):
+    return {
+        "data_format": data_format,
+        "issue_type": "missing_data_file",
+        "issue_level": "error",
+        "issue_sort_order": 0,
+        "issue_details": {"description": f"No {data_format}.csv"},
+    }
+
+
+def test_get_issue_key():
+    assert get_issue_key(_get_issue("latency", "LatencyValidator", [])) == (
+        "challenges",
+        "column_contents_validation",
+        "latency",
+        "LatencyValidator",
+    )
+    assert get_issue_key(_get_missing_file_issue("cai")) == (
+        "cai",
+        "missing_data_file",
+        None,
+        None,
+    )
+
+
+def test_diff_issues():
+    old_issues = [
+        _get_missing_file_issue("cai"),
+        _get_issue("latency", "LatencyValidator", ["a", "b", "c"]),
+        _get_issue("unit", "UnitValidator", ["a"]),
+    ]
+    new_issues = [
+        # The issues are matched whatever order they're logged in.
+        _get_issue("latency", "LatencyValidator", ["d", "c", "b"]),
+        _get_issue("unit", "TechnologyValidator", ["a"]),
+    ]
+    issue_diff = diff_issues(old_issues, new_issues)
+    assert [(i["data_format"], i["validation"]) for i in issue_diff["fixed"]] == [
+        ("cai", None),
+        ("challenges", "UnitValidator"),
+    ]
+    assert [i["validation"] for i in issue_diff["new"]] == ["TechnologyValidator"]
+    (remaining,) = issue_diff["remaining"]
+    assert remaining["validation"] == "LatencyValidator"
+    # Failing rows are matched by id value, not row number.
+    assert remaining["fixed_rows"] == [[2, "a"]]
+    assert remaining["new_rows"] == [[2, "d"]]
+    assert remaining["num_remaining_rows"] == 2
+    assert remaining["all_rows_compared"]
+
+    summary = format_issue_diff(issue_diff, labels=("old.json", "new.json"))
+    assert summary.splitlines()[0] == (
+        "Comparing the issues in old.json to those in new.json."
+    )
+    assert "Fixed issues: 2" in summary
+    assert (
+        "  - challenges :: column_contents_validation :: latency :: "
+        "LatencyValidator (error): 1 failing rows fixed, 1 new"
+    ) in summary
+
+
+def test_diff_issues_with_shared_keys_and_unrecorded_rows():
+    old_issues = [_get_missing_file_issue("cai")]
+    new_issues = [
+        _get_missing_file_issue("cai"),
+        _get_missing_file_issue("cai"),
+    ]
+    issue_diff = diff_issues(old_issues, new_issues)
+    assert len(issue_diff["remaining"]) == 1
+    assert len(issue_diff["new"]) == 1
+
+    issue_diff = diff_issues(
+        [_get_issue("latency", "LatencyValidator", ["a"], all_fails_recorded=False)],
+        [_get_issue("latency", "LatencyValidator", ["a"])],
+    )
+    assert not issue_diff["remaining"][0]["all_rows_compared"]
@@ -0,0 +1,117 @@
+import gzip
+import io
+from pathlib import Path
+
+import pytest
+
+from bead_inspector.file_utils import (
+    CSVData,
+    iter_records,
+    map_data_formats_to_paths,
+    split_line_ending,
+)
+
+
+@pytest.fixture
+def temp_dir(tmpdir_factory):
+    return tmpdir_factory.mktemp("data")
+
+
+MULTILINE_CSV_CONTENT = (
+    "location_id,note\r\n"
+    "1000000001,plain\r\n"
+    '1000000002,"spans\r\ntwo lines"\r\n'
+    '1000000003,"Niño, ""quoted"""\r\n'
+    "1000000004,last\r\n"
+)
+MULTILINE_CSV_RECORDS = MULTILINE_CSV_CONTENT.splitlines(keepends=True)[1:]
+MULTILINE_CSV_RECORDS[1:3] = ["".join(MULTILINE_CSV_RECORDS[1:3])]
+
+
+def get_raw_rows(csv_data, file_bytes):
+    """Slices each record out of the file's bytes by the byte offset index."""
+    offsets = csv_data.row_byte_offsets
+    return [
+        file_bytes[start:end].decode(csv_data._row_encoding)
+        for start, end in zip(offsets, offsets[1:])
+    ]
+
+
+@pytest.mark.parametrize("encoding", ["utf-8", "utf-8-sig", "cp1252", "utf-16"])
+def test_CSVData_row_index_with_multiline_records(temp_dir, encoding):
+    file_path = temp_dir.join("multiline.csv")
+    with open(file_path, "wb") as f:
+        f.write(MULTILINE_CSV_CONTENT.encode(encoding))
+    csv_data = CSVData(file_path)
+    assert len(csv_data.data) == 4
+    assert [csv_data.get_line_number(i) for i in range(4)] == [2, 3, 5, 6]
+    with open(file_path, "rb") as f:
+        assert get_raw_rows(csv_data, f.read()) == MULTILINE_CSV_RECORDS
+
+
+def test_CSVData_row_index_with_compressed_file(temp_dir):
+    file_path = temp_dir.join("multiline.csv.gz")
+    with gzip.open(file_path, "wb") as f:
+        f.write(MULTILINE_CSV_CONTENT.encode("utf-8"))
+    csv_data = CSVData(file_path)
+    assert [csv_data.get_line_number(i) for i in range(4)] == [2, 3, 5, 6]
+    with gzip.open(file_path, "rb") as f:
+        assert get_raw_rows(csv_data, f.read()) == MULTILINE_CSV_RECORDS
+
+
+def test_CSVData_row_index_with_provided_header(temp_dir):
+    file_path = temp_dir.join("unserved.csv")
+    with open(file_path, "w", newline="") as f:
+        f.write("1000000001\n1000000002\n")
+    csv_data = CSVData(file_path, header=["location_id"])
+    assert [csv_data.get_line_number(i) for i in range(2)] == [1, 2]
+    with open(file_path, "rb") as f:
+        assert get_raw_rows(csv_data, f.read()) == ["1000000001\n", "1000000002\n"]
+
+
+@pytest.mark.parametrize("as_bytes", [False, True])
+def test_iter_records_with_multiline_records(as_bytes):
+    text = 'a,b\r\n1,"x\r\ny"\r\n2,"""q"""\n3,"open'
+    expected = [
+        ("a,b\r\n", 1),
+        ('1,"x\r\ny"\r\n', 2),
+        ('2,"""q"""\n', 1),
+        ('3,"open', 1),
+    ]
+    if as_bytes:
+        lines = io.BytesIO(text.encode())
+        expected = [(record.encode(), num_lines) for record, num_lines in expected]
+    else:
+        lines = io.StringIO(text, newline="")
+    assert list(iter_records(lines)) == expected
+
+
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        ("1,2\r\n", ("1,2", "\r\n")),
+        ("1,2\n", ("1,2", "\n")),
+        ("1,2\r", ("1,2", "\r")),
+        ("1,2", ("1,2", "")),
+    ],
+)
+def test_split_line_ending(text, expected):
+    assert split_line_ending(text) == expected
+
+
+def test_map_data_formats_to_paths(temp_dir):
+    data_files = [
+        Path(temp_dir.join(name))
+        for name in ["Challenges.csv", "challengers.csv.gz", "notes.txt", "cai.csv"]
+    ]
+    data_format_to_path_map = map_data_formats_to_paths(
+        data_files, ["challenges", "challengers"]
+    )
+    assert data_format_to_path_map == {
+        "challenges": data_files[0],
+        "challengers": data_files[1],
+    }
+    with pytest.raises(ValueError, match="multiple files for the challenges format"):
+        map_data_formats_to_paths(
+            [*data_files, Path(temp_dir.join("challenges.csv.bz2"))], ["challenges"]
+        )
@@ -0,0 +1,105 @@
+import pytest
+
+from bead_inspector.history import RunHistory, format_history_table
+
+
+@pytest.fixture
+def temp_dir(tmpdir_factory):
+    return tmpdir_factory.mktemp("data")
+
+
+def _get_issue(data_format, validation, total_fails, issue_level="error"):
+    return {
+        "data_format": data_format,
+        "issue_type": "column_contents_validation",
+        "issue_level": issue_level,
+        "issue_sort_order": 10,
+        "issue_details": {
+            "column": "latency",
+            "validation": validation,
+            "total_fails": total_fails,
+        },
+    }
+
+
+def _record_run(history, label, issues, run_time="2024-07-22 14:24:03"):
+    return history.record_run(
+        {"label": label, "run_time": run_time, "duration_seconds": 1.5},
+        [{"data_format": "challenges", "file_hash": "abc", "row_count": 100}],
+        issues,
+    )
+
+
+def test_RunHistory_trend(temp_dir):
+    with RunHistory(temp_dir.join("history.db")) as history:
+        for total_fails in [30, 20, 10]:
+            _record_run(
+                history,
+                "Texas",
+                [
+                    _get_issue("challenges", "LatencyValidator", total_fails),
+                    _get_issue("cai", "LatencyValidator", 1),
+                    _get_issue("cai", "LatencyValidator", 5, issue_level="info"),
+                ],
+            )
+        _record_run(history, "Ohio", [_get_issue("cai", "LatencyValidator", 7)])
+        _record_run(history, "Texas", [])
+
+    # The database persists between connections.
+    with RunHistory(temp_dir.join("history.db")) as history:
+        trend = history.get_trend("Texas", last=3)
+        assert [(r["num_issues"], r["total_fails"]) for r in trend] == [
+            (2, 21),
+            (2, 11),
+            (0, 0),
+        ]
+        assert trend[0]["run_id"] < trend[-1]["run_id"]
+        trend = history.get_trend("Texas", data_format="cai", issue_level="info")
+        assert [r["total_fails"] for r in trend] == [5, 5, 5, 0]
+        assert history.get_trend("Utah") == []
+        with pytest.raises(ValueError):
+            history.get_trend("Texas", issue_level="warning")
+        run_files = history.connection.execute("SELECT * FROM run_files").fetchall()
+        assert len(run_files) == 5
+        assert run_files[0]["file_hash"] == "abc"
+
+
+def test_RunHistory_worst_offenders(temp_dir):
+    with RunHistory(temp_dir.join("history.db")) as history:
+        _record_run(history, "Texas", [_get_issue("challenges", "A", 50)])
+        _record_run(history, "Texas", [_get_issue("challenges", "A", 5)])
+        _record_run(
+            history,
+            "Ohio",
+            [_get_issue("challenges", "A", 7), _get_issue("challenges", "B", 3)],
+        )
+        _record_run(history, "Utah", [])
+        worst = history.get_worst_offenders()
+        # Only the latest run of each label counts.
+        assert [(r["label"], r["total_fails"]) for r in worst] == [
+            ("Ohio", 10),
+            ("Texas", 5),
+            ("Utah", 0),
+        ]
+        worst = history.get_worst_offenders(by="validation", top=1)
+        assert [(r["validation"], r["num_labels"]) for r in worst] == [("A", 2)]
+        with pytest.raises(ValueError):
+            history.get_worst_offenders(by="column")
+        table = format_history_table(worst).splitlines()
+        assert table[0].split() == [
+            "data_format",
+            "issue_type",
+            "column_name",
+            "validation",
+            "num_labels",
+            "total_fails",
+        ]
+        assert table[1].split() == [
+            "challenges",
+            "column_contents_validation",
+            "latency",
+            "A",
+            "2",
+            "12",
+        ]
+    assert format_history_table([]) == "No runs found."
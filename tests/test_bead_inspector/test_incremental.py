@@ -0,0 +1,58 @@
+import hashlib
+
+import pytest
+
+from bead_inspector import incremental
+
+
+@pytest.fixture
+def temp_dir(tmpdir_factory):
+    return tmpdir_factory.mktemp("data")
+
+
+def test_iter_record_chunks_boundaries_are_content_defined(temp_dir):
+    rows = [f'{i},"value\n{i}",x\n'.encode() for i in range(500)]
+    file_path = temp_dir.join("data.csv")
+    file_path.write_binary(b"".join(rows))
+    chunks = list(incremental.iter_record_chunks(file_path, 0, 8, 2, 64))
+    assert sum(c.num_records for c in chunks) == 500
+    assert b"".join(c.chunk_bytes for c in chunks) == b"".join(rows)
+
+    rows.insert(250, b'new,"inserted\nrow",x\n')
+    file_path.write_binary(b"".join(rows))
+    new_chunks = list(incremental.iter_record_chunks(file_path, 0, 8, 2, 64))
+    changed_digests = {c.digest for c in new_chunks} - {c.digest for c in chunks}
+    assert 1 <= len(changed_digests) <= 2
+
+
+def test_merkle_root():
+    digests = [hashlib.sha256(bytes([i])).hexdigest() for i in range(5)]
+    assert incremental.merkle_root(digests) == incremental.merkle_root(list(digests))
+    assert incremental.merkle_root(digests) != incremental.merkle_root(digests[:4])
+
+
+def test_split_complete_records():
+    complete = b'1,a\r\n2,"multi\nline"\n'
+    assert incremental.split_complete_records(complete) == (complete, b"")
+    assert incremental.split_complete_records(complete + b"3,b") == (complete, b"3,b")
+    assert incremental.split_complete_records(complete + b'3,"b\n') == (
+        complete,
+        b'3,"b\n',
+    )
+
+
+def test_fingerprint_file_prefix_covers_the_whole_prefix(temp_dir, monkeypatch):
+    monkeypatch.setattr(incremental, "FINGERPRINT_READ_SIZE", 1000)
+    rows = [f"{i},value_{i}\n".encode() for i in range(20000)]
+    file_path = temp_dir.join("fingerprinted.csv")
+    file_path.write_binary(b"".join(rows))
+    end_offset = len(b"".join(rows[:15000]))
+    fingerprint = incremental.fingerprint_file_prefix(file_path, end_offset)
+    # Appending to the file doesn't change the fingerprint of its prefix.
+    with open(file_path, "ab") as f:
+        f.write(b"20000,value_20000\n")
+    assert incremental.fingerprint_file_prefix(file_path, end_offset) == fingerprint
+    # But a same-length edit in the middle of the prefix does.
+    rows[7500] = rows[7500].replace(b"value", b"VALUE")
+    file_path.write_binary(b"".join(rows))
+    assert incremental.fingerprint_file_prefix(file_path, end_offset) != fingerprint
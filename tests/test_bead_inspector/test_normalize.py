@@ -0,0 +1,127 @@
+import csv
+
+import pytest
+
+from bead_inspector import normalize
+from bead_inspector.normalize import fix_data_files
+
+
+@pytest.fixture
+def temp_dir(tmpdir_factory):
+    return tmpdir_factory.mktemp("data")
+
+
+@pytest.mark.parametrize(
+    "normalizer, value, expected",
+    [
+        (normalize.normalize_compact_date, "20230701", "2023-07-01"),
+        (normalize.normalize_compact_date, "20231399", "20231399"),
+        (normalize.normalize_compact_date, "2023-07-01", "2023-07-01"),
+        (normalize.pad_zip_code, "2134", "02134"),
+        (normalize.pad_zip_code, "12", "12"),
+        (normalize.pad_coordinate_precision, "41.8", "41.800000"),
+        (normalize.pad_coordinate_precision, "-76", "-76.000000"),
+        (normalize.pad_coordinate_precision, "-76.1234567", "-76.1234567"),
+        (normalize.pad_coordinate_precision, "north", "north"),
+    ],
+)
+def test_normalizers(normalizer, value, expected):
+    assert normalizer(value) == expected
+
+
+CHALLENGES_CONTENT = (
+    "challenge,challenge_type,challenger,challenge_date,rebuttal_date,"
+    "resolution_date,disposition,provider_id,technology,location_id,unit,"
+    "reason_code,evidence_file_id,response_file_id,resolution,"
+    "advertised_download_speed,download_speed,advertised_upload_speed,"
+    "upload_speed,latency\r\n"
+    "2,S,2,2024-03-29,2024-05-24,2024-07-04,S,717410,10,2754984828,,,age.pdf,"
+    'as.pdf,"Lorem,\r\nipsum",106,1123,68,791,100.2\r\n'
+    "3, n ,3,20240519,,2024-07-01,A,579751,10,6982608163,,,wife.pdf,"
+    ",Scientist you to that open.,,333,,491,96.41\r\n"
+    "4,X,,2024-02-23,20240510,20241399,M,796614,0,8733869095,,,energy.pdf,"
+    "night.pdf,,365,82,1011,1071,164.25\r\n"
+    "5,t,5,2024-04-23,,2024-05-04,A,776568,60,1497861472,,,budget.pdf,"
+    ",Front much interview total executive hit.,1195,495,1032,295,43.764\r\n"
+)
+
+
+def test_fix_data_files(temp_dir, monkeypatch):
+    monkeypatch.setattr(normalize, "REVALIDATION_BATCH_RECORDS", 2)
+    data_dir = temp_dir.join("to_fix")
+    data_dir.mkdir()
+    with open(data_dir.join("challenges.csv"), "w", newline="") as f:
+        f.write(CHALLENGES_CONTENT)
+    with open(data_dir.join("cai.csv"), "w", newline="") as f:
+        f.write(
+            "type,entity_name,entity_number,CMS number,frn,location_id,"
+            "address_primary,city,state,zip_code,longitude,latitude,explanation,"
+            "need,availability\n"
+            "C,2,,,,,5741 Warren St,Timothyport,NJ,7855,,,Words.,1000,530\n"
+            "H,4,,4854869256,9122416326,,,,ME,,-76.88442,40.2737,,1000,350\n"
+            "S,5,,,1336068487,,,,AZ,,-94.740490,32.500700,Field,1000,450\n"
+        )
+    output_dir = temp_dir.join("fixed")
+    stats = fix_data_files(data_dir, output_dir=output_dir)
+    assert stats["challenges"] == {
+        "rows_read": 4,
+        "rows_changed": 3,
+        "values_changed": 4,
+        "changed_rows_still_failing": 1,
+    }
+    assert stats["cai"]["rows_changed"] == 2
+    assert stats["cai"]["values_changed"] == 3
+
+    with open(output_dir.join("challenges.csv"), newline="") as f:
+        fixed_content = f.read()
+    fixed_lines = fixed_content.split("\r\n")
+    # Unchanged records (including multiline ones) keep their original text.
+    assert fixed_content.startswith(CHALLENGES_CONTENT.split("3, n ,")[0])
+    assert fixed_lines[3].startswith("3,N,3,2024-05-19,,2024-07-01,A,")
+    # The invalid resolution date can't be fixed, so it's left as is.
+    assert fixed_lines[4].startswith("4,X,,2024-02-23,2024-05-10,20241399,")
+    assert fixed_lines[5].startswith("5,T,5,")
+
+    with open(output_dir.join("challenges_changes.csv"), newline="") as f:
+        changes = list(csv.DictReader(f))
+    assert [(c["row_number"], c["column"], c["fixed_value"]) for c in changes] == [
+        ("4", "challenge_type", "N"),
+        ("4", "challenge_date", "2024-05-19"),
+        ("5", "rebuttal_date", "2024-05-10"),
+        ("6", "challenge_type", "T"),
+    ]
+    assert changes[0]["normalizers"] == "enum_whitespace; enum_case"
+    assert changes[0]["remaining_failures"] == ""
+    assert "resolution_date (DateNullableValidator)" in changes[2][
+        "remaining_failures"
+    ]
+
+    with open(output_dir.join("cai.csv"), newline="") as f:
+        fixed_cai = list(csv.DictReader(f))
+    assert fixed_cai[0]["zip_code"] == "07855"
+    assert fixed_cai[1]["longitude"] == "-76.884420"
+    assert fixed_cai[1]["latitude"] == "40.273700"
+    assert fixed_cai[2]["latitude"] == "32.500700"
+
+
+def test_fix_data_files_with_selected_normalizers(temp_dir):
+    data_dir = temp_dir.join("to_fix_dates")
+    data_dir.mkdir()
+    with open(data_dir.join("challenges.csv"), "w", newline="") as f:
+        f.write(CHALLENGES_CONTENT)
+    stats = fix_data_files(data_dir, normalizer_names=["compact_dates"])
+    assert stats["challenges"]["values_changed"] == 2
+    assert data_dir.join("fixed", "challenges_changes.csv").exists()
+    with pytest.raises(ValueError):
+        fix_data_files(data_dir, normalizer_names=["spelling"])
+
+
+def test_fix_data_files_with_multiple_files_for_a_format(temp_dir):
+    data_dir = temp_dir.join("to_fix_twice")
+    data_dir.mkdir()
+    for file_name in ["challenges.csv", "Challenges.csv.gz"]:
+        with open(data_dir.join(file_name), "w", newline="") as f:
+            f.write(CHALLENGES_CONTENT)
+    with pytest.raises(ValueError, match="multiple files for the challenges"):
+        fix_data_files(data_dir)
+    assert not data_dir.join("fixed").exists()
@@ -0,0 +1,46 @@
+from bead_inspector import performance
+from bead_inspector.performance import StageTimer, get_peak_memory_mb
+
+
+def test_StageTimer_excludes_nested_stages(monkeypatch):
+    clock = [0.0]
+
+    def sleep(seconds):
+        clock[0] += seconds
+
+    monkeypatch.setattr(performance.time, "perf_counter", lambda: clock[0])
+    timer = StageTimer()
+    for _ in range(2):
+        with timer.stage("parsing"):
+            sleep(0.01)
+            with timer.stage("type_casting"):
+                sleep(0.02)
+            timer.start("DateValidator", is_validator=True)
+            sleep(0.01)
+            timer.stop()
+    timer.add("encoding_detection", 0.5)
+    assert list(timer.stages) == ["parsing", "type_casting", "encoding_detection"]
+    assert list(timer.validators) == ["DateValidator"]
+    # The time spent in type_casting and DateValidator isn't counted in parsing.
+    assert timer.to_dict() == {
+        "stages": {"parsing": 0.02, "type_casting": 0.04, "encoding_detection": 0.5},
+        "validators": {"DateValidator": 0.02},
+    }
+
+
+def test_StageTimer_stops_stages_that_raise():
+    timer = StageTimer()
+    try:
+        with timer.stage("parsing"):
+            raise ValueError("bad record")
+    except ValueError:
+        pass
+    with timer.stage("type_casting"):
+        pass
+    assert set(timer.stages) == {"parsing", "type_casting"}
+    assert timer._running == []
+
+
+def test_get_peak_memory_mb():
+    peak_memory = get_peak_memory_mb()
+    assert peak_memory is None or peak_memory > 0
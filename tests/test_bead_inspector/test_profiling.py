@@ -0,0 +1,77 @@
+import pytest
+
+from bead_inspector import profiling
+from bead_inspector.profiling import ColumnProfile, merge_column_profiles
+from bead_inspector.sketches import HyperLogLog
+
+
+def test_ColumnProfile():
+    profile = ColumnProfile("numeric")
+    for value in ["10", "", "2.5", "ten", "10"]:
+        try:
+            typed_value = float(value)
+        except ValueError:
+            typed_value = value
+        profile.add(value, typed_value)
+    assert profile.summarize() == {
+        "null_ratio": 0.2,
+        "distinct_count": 3,
+        "distinct_count_exact": True,
+        "min": 2.5,
+        "max": 10.0,
+        "min_length": 2,
+        "max_length": 3,
+    }
+
+
+def test_ColumnProfile_date_range():
+    profile = ColumnProfile("date")
+    for value in ["2024-03-01", "20240101", "2024-02-29", ""]:
+        profile.add(value)
+    summary = profile.summarize()
+    assert (summary["min"], summary["max"]) == ("2024-02-29", "2024-03-01")
+
+
+def test_HyperLogLog_estimate():
+    hll = HyperLogLog()
+    for i in range(50000):
+        hll.add(str(i))
+    assert abs(hll.count() - 50000) < 50000 * 0.05
+
+
+def test_ColumnProfile_switches_to_hll_and_merges(monkeypatch):
+    monkeypatch.setattr(profiling, "DISTINCT_EXACT_LIMIT", 100)
+    whole = ColumnProfile()
+    chunks = [ColumnProfile(), ColumnProfile()]
+    for i in range(150):
+        whole.add(f"value_{i % 120}")
+        chunks[i // 75].add(f"value_{i % 120}")
+    assert whole.hll is not None
+    assert chunks[0].hll is None
+    merged = merge_column_profiles(
+        [{"col": chunk.to_state()} for chunk in chunks]
+    )
+    assert merged == {"col": whole.to_state()}
+    assert not whole.summarize()["distinct_count_exact"]
+    assert abs(whole.summarize()["distinct_count"] - 120) <= 3
+
+
+@pytest.mark.parametrize("kind", ["numeric", "date", "str"])
+def test_ColumnProfile_add_values_matches_add(kind, monkeypatch):
+    monkeypatch.setattr(profiling, "DISTINCT_EXACT_LIMIT", 5)
+    values = ["10", "", None, "2.5", "ten", "2024-03-01", "20240101", "10"] * 2
+    values += [f"{i}" for i in range(10)]
+    typed_values = []
+    for value in values:
+        try:
+            typed_values.append(float(value))
+        except (TypeError, ValueError):
+            typed_values.append(value)
+    one_at_a_time = ColumnProfile(kind)
+    for value, typed_value in zip(values, typed_values):
+        if value is not None:
+            one_at_a_time.add(value, typed_value)
+    all_at_once = ColumnProfile(kind)
+    all_at_once.add_values(values[:8], typed_values[:8])
+    all_at_once.add_values(values[8:], typed_values[8:])
+    assert all_at_once.to_state() == one_at_a_time.to_state()
@@ -1,3 +1,8 @@
+import base64
+import gzip
+import json
+import re
+
 import pytest
 
 from bead_inspector.validator import write_issues_to_json
@@ -47,3 +52,240 @@ def test__format_column_dtype_validation_misc_issue(
         issue=dtype_misc_issues[0],
         issue_number=1,
     )
+
+
+def test_write_report_streams_issues_after_the_table_of_contents(temp_dir):
+    issues = [
+        {
+            "data_format": data_format,
+            "issue_type": "column_dtype_validation_misc",
+            "issue_level": issue_level,
+            "issue_sort_order": 4,
+            "issue_details": {
+                "row_number": row_number,
+                "column": "download_speed",
+                "error_msg": "<bad>",
+                "error_type": "TypeError",
+            },
+        }
+        for issue_level in ["error", "warning"]
+        for data_format in ["cai", "challenges"]
+        for row_number in range(2, 5)
+    ]
+    logs_dir = temp_dir.mkdir("streamed").mkdir("logs")
+    file_path = logs_dir.join("validation_issue_logs_20240722_142403.json")
+    write_issues_to_json(issues, file_path)
+    reporter = reporting.ReportGenerator(file_path)
+    report = reporter.final_report
+    assert report.startswith(
+        "<h1>BEAD Data Validation Results from the 2024-07-22 14:24:03 run:</h1>"
+    )
+    toc_start = report.index('<h2 id="toc">')
+    issues_start = report.index('<h3 id="issue-1">')
+    assert toc_start < issues_start
+    toc = report[toc_start:issues_start]
+    assert toc.count("<h3>Error-level issues:</h3>") == 1
+    assert toc.count("<h4>challenges.csv issues:</h4>") == 2
+    assert toc.count("<a href=") == 12
+    assert report.count('<h3 id="issue-') == 12
+    assert "&lt;bad&gt;" in report
+    # Only the report is left in the reports dir.
+    assert [p.name for p in reporter.report_dir.iterdir()] == [
+        "BEAD_Data_Validation_Report_20240722_142403.html"
+    ]
+
+
+def _get_enough_columns_issue(data_format, num_rows):
+    return {
+        "data_format": data_format,
+        "issue_type": "enough_columns_validation",
+        "issue_level": "error",
+        "issue_sort_order": 3,
+        "issue_details": {
+            "column": "latency",
+            "id_column": "challenge",
+            "failing_rows_and_values": [
+                (i + 2, f"id_{i}", 19) for i in range(num_rows)
+            ],
+            "total_fails": num_rows,
+        },
+    }
+
+
+def test_report_on_changes_since_a_previous_run(temp_dir):
+    logs_dir = temp_dir.mkdir("changes").mkdir("logs")
+    previous_file_path = logs_dir.join("validation_issue_logs_20240721_142403.json")
+    previous_issues = [
+        _get_enough_columns_issue("cai", 3),
+        _get_enough_columns_issue("challenges", 2),
+    ]
+    write_issues_to_json(previous_issues, previous_file_path)
+    file_path = logs_dir.join("validation_issue_logs_20240722_142403.json")
+    write_issues_to_json([_get_enough_columns_issue("challenges", 4)], file_path)
+    report = reporting.ReportGenerator(
+        file_path, previous_issues_file_path=previous_file_path
+    ).final_report
+    assert "<h2>Changes Since the Previous Run</h2>" in report
+    assert "20240721_142403.json: 1 fixed, 0 new, 1 remaining." in report
+    # 2 rows still fail, and 2 more do now.
+    assert "<td>2</td><td>4</td><td>0</td><td>2</td></tr>" in report
+    assert "<td>&#x27;fixed&#x27;</td><td>&#x27;cai&#x27;</td>" in report
+
+    report = reporting.ReportGenerator(file_path, overwrite_report=True).final_report
+    assert "Changes Since the Previous Run" not in report
+
+
+def test_report_performance(temp_dir):
+    logs_dir = temp_dir.mkdir("performance").mkdir("logs")
+    file_path = logs_dir.join("validation_issue_logs_20240722_142403.json")
+    performance = {
+        "header_probe_seconds": 0.0012,
+        "cross_file_check_seconds": 0.25,
+        "peak_memory_mb": 120.5,
+        "data_formats": {
+            "challenges": {
+                "from_cache": False,
+                "seconds": 2.0,
+                "row_count": 1000,
+                "rows_per_second": 500.0,
+                "stages": {"parsing": 0.5, "type_casting": 1.0},
+                "validators": {"DateValidator": 0.3},
+            },
+            "challengers": {
+                "from_cache": True,
+                "seconds": None,
+                "row_count": 10,
+                "rows_per_second": None,
+                "stages": {},
+                "validators": {},
+            },
+        },
+    }
+    write_issues_to_json(
+        [_get_enough_columns_issue("challenges", 2)],
+        file_path,
+        metadata={"performance": performance},
+    )
+    report = reporting.ReportGenerator(file_path).final_report
+    assert "<h2>Performance</h2>" in report
+    assert (
+        "<td>&#x27;challenges&#x27;</td><td>2.0</td><td>1000</td><td>500.0</td></tr>"
+    ) in report
+    assert "<td>0.001</td><td>0.25</td><td>120.5</td>" in report
+    # Stages are listed slowest first, with the time not spent in any of them.
+    stage_rows = re.findall(r"<tr><td>&#x27;(\w+)&#x27;</td><td>&#x27;(\w*)", report)
+    assert stage_rows[-4:] == [
+        ("type_casting", "stage"),
+        ("parsing", "stage"),
+        ("DateValidator", "validator"),
+        ("other", ""),
+    ]
+    assert "<td>&#x27;50.0%&#x27;</td>" in report
+    assert "<h3>challengers.csv</h3>" not in report
+    assert "N/A; results reused from the cache." in report
+
+    write_issues_to_json([_get_enough_columns_issue("challenges", 2)], file_path)
+    report = reporting.ReportGenerator(file_path, overwrite_report=True).final_report
+    assert "Performance" not in report
+
+
+def test_write_paginated_report(temp_dir):
+    issues = [
+        _get_enough_columns_issue("cai", 3),
+        _get_enough_columns_issue("challenges", 300),
+        _get_enough_columns_issue("challenges", 6000),
+    ]
+    logs_dir = temp_dir.mkdir("paginated").mkdir("logs")
+    file_path = logs_dir.join("validation_issue_logs_20240722_142403.json")
+    write_issues_to_json(issues, file_path)
+    reporter = reporting.ReportGenerator(
+        file_path, max_error_rows=6000, layout="paginated"
+    )
+    page_dir = reporter.report_file_path.parent
+    assert page_dir.name == "BEAD_Data_Validation_Report_20240722_142403"
+    assert sorted(p.name for p in page_dir.iterdir()) == [
+        "cai.html",
+        "challenges.html",
+        "index.html",
+        "issue-3.html",
+    ]
+    index = reporter.final_report
+    assert '<a href="cai.html#issue-1">' in index
+    assert '<a href="challenges.html#issue-2">' in index
+    assert '<a href="issue-3.html#issue-3">' in index
+
+    with open(page_dir.joinpath("cai.html"), encoding="utf-8") as f:
+        cai_page = f.read()
+    assert "<td>&#x27;id_2&#x27;</td>" in cai_page
+    assert 'href="index.html#toc"' in cai_page
+    with open(page_dir.joinpath("challenges.html"), encoding="utf-8") as f:
+        challenges_page = f.read()
+    assert 'id="issue-3"' not in challenges_page
+    (encoded_rows,) = re.findall(
+        r'<script type="application/gzip\+base64">(.*?)</script>', challenges_page
+    )
+    rows = json.loads(gzip.decompress(base64.b64decode(encoded_rows)))
+    assert len(rows) == 300
+    assert rows[0] == ["2", "'id_0'", "19"]
+
+    with pytest.raises(ValueError):
+        reporting.ReportGenerator(file_path, layout="tabbed")
+
+
+def test_get_validator_metadata():
+    metadata = reporting.get_validator_metadata(
+        "bead_inspector.rules", "ChallengesRebuttalDateAndFileRuleValidator"
+    )
+    assert metadata is reporting.get_validator_metadata(
+        "bead_inspector.rules", "ChallengesRebuttalDateAndFileRuleValidator"
+    )
+    assert metadata.column_indexes == {"rebuttal_date": 5, "response_file_id": 14}
+    assert metadata.short_descr == (
+        "Inconsistent nullness of rebuttal_date and response_file_id"
+    )
+    assert metadata.valid_values == []
+
+    metadata = reporting.get_validator_metadata("bead_inspector.constants", "State")
+    assert len(metadata.valid_values) == 56
+    assert metadata.valid_values_html.count("<tr>") == 57
+    assert metadata.column_indexes == {}
+
+
+def test_ReportGenerator_caches_rendered_issues(temp_dir, monkeypatch):
+    issues = [_get_enough_columns_issue("challenges", n) for n in [1, 2, 3]]
+    logs_dir = temp_dir.mkdir("fragments").mkdir("logs")
+    fragment_cache_dir = temp_dir.join("fragments", "cache")
+    file_path = logs_dir.join("validation_issue_logs_20240722_142403.json")
+    write_issues_to_json(issues, file_path)
+    reporter = reporting.ReportGenerator(
+        file_path, fragment_cache_dir=fragment_cache_dir
+    )
+    report = reporter.final_report
+    assert len(fragment_cache_dir.listdir()) == 3
+
+    rendered_issues = []
+    format_issue = reporting.ReportGenerator.format_issue
+
+    def counting_format_issue(self, issue, issue_number):
+        rendered_issues.append(issue)
+        return format_issue(self, issue, issue_number)
+
+    monkeypatch.setattr(
+        reporting.ReportGenerator, "format_issue", counting_format_issue
+    )
+    reporter = reporting.ReportGenerator(
+        file_path,
+        overwrite_report=True,
+        fragment_cache_dir=fragment_cache_dir,
+    )
+    assert rendered_issues == []
+    assert reporter.final_report == report
+
+    # Only the new issue is rendered, and the cached issues are renumbered.
+    write_issues_to_json([*issues, _get_enough_columns_issue("cai", 4)], file_path)
+    reporter = reporting.ReportGenerator(
+        file_path, overwrite_report=True, fragment_cache_dir=fragment_cache_dir
+    )
+    assert [i["data_format"] for i in rendered_issues] == ["cai"]
+    assert '<h3 id="issue-4">4. challenges.csv' in reporter.final_report
+    assert reporting.ISSUE_NUMBER_PLACEHOLDER not in reporter.final_report
@@ -0,0 +1,115 @@
+from collections import Counter
+
+import pytest
+
+from bead_inspector.sampling import (
+    FailureSample,
+    get_sample_priority,
+    merge_failing_rows,
+)
+
+
+def _get_failing_rows(num_rows, start=0):
+    return [(i + 2, f"id_{i}", f"value_{i}") for i in range(start, start + num_rows)]
+
+
+def test_FailureSample_first_mode_keeps_the_first_rows():
+    sample = FailureSample(limit=5)
+    failing_rows = _get_failing_rows(100)
+    for failing_row in failing_rows:
+        if not sample.accepts_more():
+            break
+        sample.add(failing_row)
+    assert sample.failing_rows == failing_rows[:5]
+    assert sample.get_details() == {}
+
+
+def test_FailureSample_reservoir_mode():
+    failing_rows = _get_failing_rows(1000)
+    samples = []
+    for _ in range(2):
+        sample = FailureSample(limit=10, mode="reservoir", seed=7, sample_key="a")
+        for failing_row in failing_rows:
+            sample.add(failing_row)
+        samples.append(sample.failing_rows)
+    assert samples[0] == samples[1]
+    assert len(samples[0]) == 10
+    assert samples[0][:3] == failing_rows[:3]
+    assert samples[0] == sorted(samples[0])
+    assert samples[0][-1][0] > 100
+    assert sample.get_details() == {
+        "failure_sampling": "reservoir",
+        "failure_sampling_seed": 7,
+    }
+
+    other_sample = FailureSample(limit=10, mode="reservoir", seed=8, sample_key="a")
+    for failing_row in failing_rows:
+        other_sample.add(failing_row)
+    assert other_sample.failing_rows[:3] == failing_rows[:3]
+    assert other_sample.failing_rows != samples[0]
+
+
+def test_FailureSample_reservoir_mode_is_uniform():
+    failing_rows = _get_failing_rows(100)
+    counts = Counter()
+    for seed in range(400):
+        sample = FailureSample(limit=13, mode="reservoir", seed=seed)
+        for failing_row in failing_rows:
+            sample.add(failing_row)
+        counts.update(row_number for row_number, _, _ in sample.failing_rows[3:])
+    # Each of the 97 rows after the first 3 is sampled with probability 10 / 97.
+    assert set(counts) == {row_number for row_number, _, _ in failing_rows[3:]}
+    assert max(counts.values()) < 3 * 400 * 10 / 97
+
+
+def test_FailureSample_rejects_unknown_mode():
+    with pytest.raises(ValueError):
+        FailureSample(limit=10, mode="last")
+
+
+@pytest.mark.parametrize("split_at", [1, 3, 5, 50, 99])
+def test_merge_failing_rows_matches_a_single_pass(split_at):
+    failing_rows = _get_failing_rows(100)
+    full_sample = FailureSample(limit=8, mode="reservoir", seed=3, sample_key="k")
+    part_samples = [
+        FailureSample(limit=8, mode="reservoir", seed=3, sample_key="k")
+        for _ in range(2)
+    ]
+    for failing_row in failing_rows:
+        full_sample.add(failing_row)
+        part_samples[failing_row[0] - 2 >= split_at].add(failing_row)
+    merged = merge_failing_rows(
+        part_samples[0].failing_rows,
+        part_samples[1].failing_rows,
+        8,
+        seed=3,
+        sample_key="k",
+    )
+    assert merged == full_sample.failing_rows
+
+
+def test_merge_failing_rows_without_a_seed_keeps_the_first_rows():
+    merged = merge_failing_rows(_get_failing_rows(3), _get_failing_rows(5, 3), 6)
+    assert merged == _get_failing_rows(6)
+
+
+def test_FailureSample_reservoir_mode_samples_rows_with_the_same_contents():
+    failing_rows = [(i + 2, "6861164234", "6861164234") for i in range(100)]
+    counts = Counter()
+    for seed in range(400):
+        sample = FailureSample(limit=13, mode="reservoir", seed=seed)
+        for failing_row in failing_rows:
+            sample.add(failing_row)
+        counts.update(row_number for row_number, _, _ in sample.failing_rows[3:])
+    assert set(counts) == {row_number for row_number, _, _ in failing_rows[3:]}
+    assert max(counts.values()) < 3 * 400 * 10 / 97
+
+
+def test_get_sample_priority_line_offset_matches_the_whole_file():
+    for row_number in range(2, 40):
+        assert get_sample_priority(
+            5, "k", (row_number, "id", "value"), line_offset=30
+        ) == get_sample_priority(5, "k", (row_number + 30, "id", "value"))
+    assert get_sample_priority(5, "k", (2, "id", "value")) != get_sample_priority(
+        5, "k", (3, "id", "value")
+    )
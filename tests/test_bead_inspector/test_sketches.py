@@ -0,0 +1,91 @@
+import random
+
+from bead_inspector.sketches import SpaceSaving, merge_value_counters
+
+
+def test_SpaceSaving_is_exact_without_evictions():
+    sketch = SpaceSaving(capacity=5)
+    sketch.update(["N", "x", "N", "n", "N", "x"])
+    assert sketch.most_common(2) == [("N", 3), ("x", 2)]
+    assert sketch.is_exact
+    assert sketch.get_details(k=2) == {
+        "most_common_invalid_values": [["N", 3], ["x", 2]],
+        "most_common_counts_exact": True,
+    }
+
+
+def test_SpaceSaving_keeps_heavy_hitters():
+    rng = random.Random(0)
+    values = ["bad_code"] * 3000 + [f"rare_{i}" for i in range(7000)]
+    rng.shuffle(values)
+    sketch = SpaceSaving(capacity=20)
+    sketch.update(values)
+    assert len(sketch.counts) == 20
+    assert not sketch.is_exact
+    (top_value, top_count), *_ = sketch.most_common(1)
+    assert top_value == "bad_code"
+    # Counts can only overestimate, by at most the overcount.
+    assert 3000 <= top_count <= 3000 + sketch.overcounts.get("bad_code", 0)
+
+
+def test_SpaceSaving_evicts_the_smallest_count():
+    rng = random.Random(0)
+    values = [f"v{int(rng.paretovariate(1.2))}" for _ in range(5000)]
+    sketch = SpaceSaving(capacity=10)
+    true_counts = {}
+    for value in values:
+        min_count = min(sketch.counts.values(), default=0)
+        evicts = value not in sketch.counts and len(sketch.counts) == 10
+        sketch.add(value)
+        true_counts[value] = true_counts.get(value, 0) + 1
+        if evicts:
+            # A new value in a full sketch inherits the smallest count.
+            assert sketch.counts[value] == min_count + 1
+            assert sketch.overcounts[value] == min_count
+    assert sketch.total == 5000
+    for value, count in sketch.counts.items():
+        overcount = sketch.overcounts.get(value, 0)
+        assert count - overcount <= true_counts[value] <= count
+
+
+def test_merge_value_counters():
+    chunk_states = []
+    for chunk in [["a", "a", "b"], ["b", "b", "c"]]:
+        sketch = SpaceSaving()
+        sketch.update(chunk)
+        chunk_states.append(sketch.to_state())
+    merged = SpaceSaving.from_state(merge_value_counters(chunk_states))
+    assert merged.get_details() == {
+        "most_common_invalid_values": [["b", 3], ["a", 2], ["c", 1]],
+        "most_common_counts_exact": True,
+    }
+    assert merged.total == 6
+
+
+def test_merge_value_counters_finds_values_outside_each_chunks_top_values():
+    chunk_states = []
+    for prefix in ["a", "b"]:
+        sketch = SpaceSaving()
+        sketch.update([f"{prefix}_{i}" for i in range(10)] * 5 + ["x"] * 4)
+        assert ("x", 4) not in sketch.most_common()
+        chunk_states.append(sketch.to_state())
+    merged = SpaceSaving.from_state(merge_value_counters(chunk_states))
+    assert merged.most_common(1) == [("x", 8)]
+    assert merged.is_exact
+
+
+def test_merge_value_counters_bounds_the_counts_of_evicted_values():
+    rng = random.Random(0)
+    chunk_states = []
+    for _ in range(4):
+        values = ["bad_code"] * 300 + [f"rare_{rng.random()}" for _ in range(700)]
+        rng.shuffle(values)
+        sketch = SpaceSaving(capacity=20)
+        sketch.update(values)
+        chunk_states.append(sketch.to_state())
+    merged = SpaceSaving.from_state(merge_value_counters(chunk_states))
+    assert len(merged.counts) == 20
+    assert not merged.is_exact
+    (top_value, top_count), *_ = merged.most_common(1)
+    assert top_value == "bad_code"
+    assert 1200 <= top_count <= 1200 + merged.overcounts.get("bad_code", 0)
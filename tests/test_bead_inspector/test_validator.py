@@ -1,10 +1,18 @@
+import bz2
 import csv
+import gzip
+import io
+import json
+import lzma
 from pathlib import Path
 import pytest
+import sys
 import tempfile
+import zipfile
 from typing import Optional
 
-from bead_inspector import validator
+from bead_inspector import incremental, main, reporting, validator
+from bead_inspector.history import RunHistory
 
 
 @pytest.fixture
@@ -374,6 +382,105 @@ def test_BEADChallengeDataValidator_with_files_with_utf_32_be_bom_char(temp_dir)
     )
 
 
+def test_row_numbers_with_multiline_quoted_fields():
+    csv_content = (
+        "challenger,category,organization,webpage,provider_id,contact_name,"
+        "contact_email,contact_phone\n"
+        '2,B,"ISP\nLLC",,123456,,,\n'
+        '3,B,"Spans\nthree\nlines",,,,,\n'
+        "4,B,,,,,,\n"
+    )
+    with tempfile.NamedTemporaryFile(delete=False, mode="w+", newline="") as tf:
+        tf.write(csv_content)
+        tf.seek(0)
+        _validator = validator.ChallengerDataValidator(tf.name, 1000)
+        issues = _validator.file_validator.issues
+        row_fails = [
+            i["issue_details"]["failing_rows_and_values"]
+            for i in issues
+            if i["issue_type"] == "row_rule_validation"
+        ]
+        assert len(row_fails) == 1
+        assert [row for row, id_col, col in row_fails[0]] == [4, 7]
+
+
+#########################################################
+# ############ Compressed Data Files ################## #
+#########################################################
+
+
+@pytest.mark.parametrize(
+    "suffix, opener",
+    [(".gz", gzip.open), (".bz2", bz2.open), (".xz", lzma.open)],
+)
+def test_BEADChallengeDataValidator_with_compressed_files(temp_dir, suffix, opener):
+    csv_content = (
+        "challenger,category,organization,webpage,provider_id,contact_name,"
+        "contact_email,contact_phone\n"
+        "2,B,ISP LLC,http://web.co,403388,Nic Packet,NIC@route.net,127-001-4040\n"
+        "3,B,Icw Act,http://icwa.in,,Barby Grill,b@icwa.in,197-202-1548\n"
+    )
+    with opener(temp_dir.join(f"challengers.csv{suffix}"), "wb") as f:
+        f.write(csv_content.encode("utf-8"))
+    with opener(temp_dir.join(f"unserved.csv{suffix}"), "wb") as f:
+        f.write(b"6861164234\n9858021981\n")
+    bcdv = validator.BEADChallengeDataValidator(temp_dir)
+    assert set(bcdv.data_format_to_path_map.keys()) == {"challengers", "unserved"}
+    challengers_data = bcdv.data_format_validators["challengers"]
+    assert len(challengers_data.file_validator.csv_data_object.data) == 2
+    row_rule_issues = [
+        i for i in bcdv.issues if i["issue_type"] == "row_rule_validation"
+    ]
+    assert len(row_rule_issues) == 1
+    assert row_rule_issues[0]["issue_details"]["failing_rows_and_values"][0][0] == 3
+    missing_formats = {
+        i["data_format"] for i in bcdv.issues if i["issue_type"] == "missing_data_file"
+    }
+    assert "challengers" not in missing_formats
+    assert "unserved" not in missing_formats
+
+
+def test_BEADChallengeDataValidator_with_duplicate_format_files(temp_dir):
+    with open(temp_dir.join("unserved.csv"), "w") as f:
+        f.write("6861164234\n")
+    with gzip.open(temp_dir.join("unserved.csv.gz"), "wb") as f:
+        f.write(b"6861164234\n")
+    with pytest.raises(ValueError):
+        validator.BEADChallengeDataValidator(temp_dir)
+
+
+def test_BEADChallengeDataValidator_with_zip_archive(tmpdir_factory):
+    archive_dir = tmpdir_factory.mktemp("archive")
+    results_dir = tmpdir_factory.mktemp("results")
+    archive_path = archive_dir.join("submission.zip")
+    challengers_content = (
+        "challenger,category,organization,webpage,provider_id,contact_name,"
+        "contact_email,contact_phone\n"
+        "2,B,ISP LLC,http://web.co,403388,Nic Packet,NIC@route.net,127-001-4040\n"
+        "3,B,Icw Act,http://icwa.in,,Barby Grill,b@icwa.in,197-202-1548\n"
+    )
+    with zipfile.ZipFile(archive_path, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr("submission/challengers.csv", challengers_content)
+        zf.writestr("submission/unserved.csv.gz", gzip.compress(b"6861164234\n"))
+        zf.writestr("__MACOSX/submission/._challengers.csv", b"")
+    bcdv = validator.BEADChallengeDataValidator(
+        archive_path, results_dir=results_dir, max_workers=2
+    )
+    assert set(bcdv.data_format_to_path_map.keys()) == {"challengers", "unserved"}
+    unserved_data = bcdv.data_format_validators["unserved"]
+    assert unserved_data.file_validator.csv_data_object.data == [[0, "6861164234"]]
+    typed_column = unserved_data.file_validator.get_typed_column("location_id")
+    assert typed_column.values == [6861164234]
+    row_rule_issues = [
+        i for i in bcdv.issues if i["issue_type"] == "row_rule_validation"
+    ]
+    assert len(row_rule_issues) == 1
+    assert bcdv.log_path.parent == Path(results_dir).joinpath("logs")
+    assert bcdv.log_path.is_file()
+    assert Path(results_dir).joinpath("reports").is_dir()
+    assert sorted(p.basename for p in archive_dir.listdir()) == ["submission.zip"]
+
+
 #########################################################
 # ########### Data Files Missing Columns ############## #
 #########################################################
@@ -2588,6 +2695,30 @@ def test_challenges_row_rule__rebuttal_date_and_file():
         assert all(r in rule_breaking_rows for r in failing_rows)
 
 
+def test_challenges_row_rule_failures_record_the_rule_columns():
+    csv_content = (
+        "challenge,challenge_type,challenger,challenge_date,rebuttal_date,"
+        "resolution_date,disposition,provider_id,technology,location_id,unit,"
+        "reason_code,evidence_file_id,response_file_id,resolution,"
+        "advertised_download_speed,download_speed,advertised_upload_speed,"
+        "upload_speed,latency\n"
+        "2,,,2024-03-18,2024-04-22,,,,,,,,,,a long resolution,,,,,\n"
+    )
+    with tempfile.NamedTemporaryFile(delete=False, mode="w+", newline="") as tf:
+        tf.write(csv_content)
+        tf.seek(0)
+        _validator = validator.ChallengesDataValidator(tf.name, 1000)
+        (row_fails,) = [
+            i["issue_details"]["failing_rows_and_values"]
+            for i in _validator.file_validator.issues
+            if i["issue_details"].get("validation")
+            == "ChallengesRebuttalDateAndFileRuleValidator"
+        ]
+        assert row_fails == [
+            (2, "2", {"rebuttal_date": "2024-04-22", "response_file_id": ""})
+        ]
+
+
 def test_challenges_row_rule__latency_given_challenge_type():
     csv_content = (
         "challenge,challenge_type,challenger,challenge_date,rebuttal_date,"
@@ -6157,3 +6288,933 @@ def test_underserved_col_content__location_id():
         assert len(row_fails) == 1
         failing_rows = [row for row, id_col, col in row_fails[0]]
         assert all(r in failing_rows for r in invalid_value_rows)
+
+
+@pytest.fixture
+def challenges_file_with_wrong_columns(temp_dir):
+    file_path = temp_dir.join("challenges.csv")
+    csv_content = (
+        "challenge,challenge_type,challenger,challenge_date,rebuttal_date,"
+        "resolution_date,disposition,provider_id,technology,location_id,unit,"
+        "reason_code,evidence_file_id,response_file_id,resolution,"
+        "advertised_download_speed,download_speed,advertised_upload_speed,"
+        "upload_speed,latency_ms\n"
+        "2,,,,,,,,,,,,,,,,,,,\n"
+    )
+    csv_lines = [line.split(",") for line in csv_content.split("\n") if line]
+    create_csv_file(file_path, csv_lines)
+    return file_path
+
+
+def test_ChallengesDataValidator_header_only(challenges_file_with_wrong_columns):
+    dv = validator.ChallengesDataValidator(
+        challenges_file_with_wrong_columns, header_only=True
+    )
+    issue_types = {i["issue_type"] for i in dv.file_validator.issues}
+    assert "column_name_validation" in issue_types
+    assert dv.file_validator.csv_data_object.data == []
+
+
+@pytest.mark.parametrize(
+    "on_structure_failure, skipped_formats",
+    [
+        ("continue", []),
+        ("skip", ["challenges"]),
+        ("abort", ["challengers", "challenges"]),
+    ],
+)
+def test_BEADChallengeDataValidator_on_structure_failure(
+    temp_dir,
+    challengers_empty_file,
+    challenges_file_with_wrong_columns,
+    on_structure_failure,
+    skipped_formats,
+):
+    bcdv = validator.BEADChallengeDataValidator(
+        temp_dir, on_structure_failure=on_structure_failure
+    )
+    assert sorted(bcdv.skipped_data_formats) == skipped_formats
+    issue_types = {i["issue_type"] for i in bcdv.issues}
+    assert "column_name_validation" in issue_types
+    assert "header_probe" in bcdv.timings
+    if on_structure_failure != "continue":
+        assert bcdv.timings["estimated_time_saved"] >= 0
+
+
+def test_TypedColumns_casts_columns_lazily_and_once(temp_dir):
+    file_path = temp_dir.join("challengers.csv")
+    csv_lines = [
+        ["challenger", "category", "organization", "webpage", "provider_id"],
+        ["c1", "B", "Org", "", "123456"],
+    ]
+    create_csv_file(file_path, csv_lines)
+    fv = validator.SingleFileValidator(
+        data_format="test",
+        file_path=file_path,
+        id_column="challenger",
+        column_dtypes={
+            "challenger": str,
+            "category": str,
+            "organization": int,
+            "webpage": str,
+            "provider_id": int,
+        },
+        nullable_columns=["webpage"],
+        column_validations=[],
+        row_validations=[],
+    )
+    header = fv.csv_data_object.header
+    assert header.index("provider_id") not in fv.typed_columns
+    provider_ids = fv.get_typed_column("provider_id")
+    assert provider_ids.values == [123456]
+    assert fv.get_typed_column("provider_id") is provider_ids
+    organizations = fv.get_typed_column("organization")
+    assert organizations.uncastable_positions == [0]
+    assert organizations.values == ["Org"]
+    # Only the columns asked for were cast.
+    assert header.index("webpage") not in fv.typed_columns
+
+
+def test_validate_column_types_does_not_cast_unused_columns(temp_dir):
+    file_path = temp_dir.join("challengers.csv")
+    csv_lines = [
+        ["challenger", "category", "organization", "webpage", "provider_id"],
+        ["c1", "B", "Org", "", "123456"],
+        ["c2", "B", "Org"],
+        ["c3", "B", "7", "", "654321"],
+    ]
+    create_csv_file(file_path, csv_lines)
+    fv = validator.SingleFileValidator(
+        data_format="test",
+        file_path=file_path,
+        id_column="challenger",
+        column_dtypes={
+            "challenger": str,
+            "category": str,
+            "organization": int,
+            "webpage": str,
+            "provider_id": int,
+        },
+        nullable_columns=["webpage"],
+        column_validations=[],
+        row_validations=[],
+    )
+    fv.validate_column_types()
+    header = fv.csv_data_object.header
+    for column in ["category", "organization", "webpage", "provider_id"]:
+        assert header.index(column) not in fv.typed_columns
+    # The errors are still found in the columns that weren't cast.
+    missing_columns = {
+        i["issue_details"]["column"]
+        for i in fv.issues
+        if i["issue_type"] == "enough_columns_validation"
+    }
+    assert missing_columns == {"webpage", "provider_id"}
+    dtype_issues = [
+        i for i in fv.issues if i["issue_type"] == "column_dtype_validation"
+    ]
+    assert len(dtype_issues) == 1
+    assert dtype_issues[0]["issue_details"]["column"] == "organization"
+    assert dtype_issues[0]["issue_details"]["failing_rows_and_values"] == [
+        (2, "c1", "Org"),
+        (3, "c2", "Org"),
+    ]
+    # And every column is still profiled.
+    profiles = fv.get_column_profiles()
+    assert profiles["webpage"]["num_nulls"] == 2
+    assert profiles["category"]["distinct_values"] == ["B"]
+    assert profiles["provider_id"]["min_value"] == 123456
+    assert profiles["provider_id"]["max_value"] == 654321
+    # Casting a column after it was checked finds the same errors.
+    organizations = fv.get_typed_column("organization")
+    assert organizations.uncastable_positions == [0, 1]
+    assert organizations.values == ["Org", "Org", 7]
+
+
+def test_failing_rows_have_typed_ids(temp_dir):
+    file_path = temp_dir.join("locations.csv")
+    create_csv_file(
+        file_path, [["location_id", "code"], ["1000000001", ""], ["x", ""]]
+    )
+    fv = validator.SingleFileValidator(
+        data_format="test",
+        file_path=file_path,
+        id_column="location_id",
+        column_dtypes={"location_id": int, "code": str},
+        nullable_columns=[],
+        column_validations=[],
+        row_validations=[],
+    )
+    fv.run_single_file_validations()
+    null_issue = next(
+        i for i in fv.issues if i["issue_type"] == "required_column_not_null_validation"
+    )
+    assert null_issue["issue_details"]["rows_where_column_is_null"] == [
+        (2, 1000000001, ""),
+        (3, "x", ""),
+    ]
+
+
+def test_BEADChallengeDataValidator_with_result_cache(
+    temp_dir,
+    challengers_data_file,
+    challenges_data_file,
+):
+    cache_dir = temp_dir.join("cache")
+    first_run = validator.BEADChallengeDataValidator(
+        temp_dir, results_dir=temp_dir.join("first_run"), cache_dir=cache_dir
+    )
+    assert first_run.cached_data_formats == []
+
+    second_run = validator.BEADChallengeDataValidator(
+        temp_dir, results_dir=temp_dir.join("second_run"), cache_dir=cache_dir
+    )
+    assert sorted(second_run.cached_data_formats) == ["challengers", "challenges"]
+    assert json.loads(json.dumps(first_run.issues)) == second_run.issues
+    assert second_run.row_counts == first_run.row_counts
+
+    with open(challengers_data_file, "a", newline="") as f:
+        f.write("606,T,New Org,http://new.org,,Ann,ann@new.org,312-555-0100\n")
+    third_run = validator.BEADChallengeDataValidator(
+        temp_dir, results_dir=temp_dir.join("third_run"), cache_dir=cache_dir
+    )
+    assert third_run.cached_data_formats == ["challenges"]
+    multi_file_issues = [
+        i for i in third_run.issues if i["issue_type"] == "multi_file_validation"
+    ]
+    invalid_values = multi_file_issues[0]["issue_details"]["invalid_values"]
+    assert [i["missing_challenger_ids"] for i in invalid_values] == [""]
+
+
+def _write_large_challenges_file(file_path, extra_rows=()):
+    header = (
+        "challenge,challenge_type,challenger,challenge_date,rebuttal_date,"
+        "resolution_date,disposition,provider_id,technology,location_id,unit,"
+        "reason_code,evidence_file_id,response_file_id,resolution,"
+        "advertised_download_speed,download_speed,advertised_upload_speed,"
+        "upload_speed,latency\n"
+    )
+    row_templates = [
+        "{},S,2,2024-03-29,2024-05-24,2024-07-04,S,717410,10,2754984828,,,age.pdf,"
+        'as.pdf,"Lorem,\nipsum",106,1123,68,791,100.2\n',
+        "{},N,3,2024-05-19,,2024-07-01,A,579751,10,6982608163,,,wife.pdf,"
+        ",Scientist you to that open.,,333,,491,96.41\n",
+        "{},X,,2024-02-23,2024-05-10,2024-08-21,M,796614,0,8733869095,,,energy.pdf,"
+        "night.pdf,,365,82,1011,1071,164.25\n",
+        "{},A,8,2024-05-13,2024-07-27,2024-11-19,M,935179,70,9913299240,,9,mouth.pdf,"
+        "treatment.pdf,Against daughter amount to play.,274,,226,,129.078\n",
+        "{},V,606,2024-01-16,,,A,131955,seventy,7441127180,,,find.pdf,,Paper,"
+        "351,528,857,149,197.65\n",
+    ]
+    rows = [row_templates[i % len(row_templates)].format(i) for i in range(300)]
+    for position, row in extra_rows:
+        rows.insert(position, row)
+    with open(file_path, "w", newline="") as f:
+        f.write(header + "".join(rows))
+
+
+def test_BEADChallengeDataValidator_chunked_revalidation(
+    temp_dir, challengers_data_file, monkeypatch
+):
+    monkeypatch.setattr(incremental, "AVERAGE_CHUNK_RECORDS", 8)
+    monkeypatch.setattr(incremental, "MIN_CHUNK_RECORDS", 4)
+    monkeypatch.setattr(incremental, "MAX_CHUNK_RECORDS", 32)
+    data_dir = temp_dir.join("chunked")
+    data_dir.mkdir()
+    challengers_data_file.copy(data_dir.join("challengers.csv"))
+    challenges_file = data_dir.join("challenges.csv")
+    cache_dir = temp_dir.join("chunk_cache")
+
+    def run(name, **kwargs):
+        return validator.BEADChallengeDataValidator(
+            data_dir,
+            results_dir=temp_dir.join(name),
+            single_error_log_limit=50,
+            row_stats=True,
+            **kwargs,
+        )
+
+    _write_large_challenges_file(challenges_file)
+    full_run = run("full_run")
+    chunked_run = run("chunked_run", cache_dir=cache_dir)
+    assert json.loads(json.dumps(full_run.issues)) == json.loads(
+        json.dumps(chunked_run.issues)
+    )
+    assert chunked_run.row_counts == full_run.row_counts
+    assert chunked_run.row_error_stats == full_run.row_error_stats
+    assert chunked_run.column_profiles == full_run.column_profiles
+
+    inserted_row = (
+        "999,N,3,2024-05-19,,2024-07-01,A,579751,ten,6982608163,,,wife.pdf,"
+        ",Scientist you to that open.,,333,,491,96.41\n"
+    )
+    _write_large_challenges_file(challenges_file, extra_rows=[(150, inserted_row)])
+    full_run = run("full_rerun")
+    chunked_run = run("chunked_rerun", cache_dir=cache_dir)
+    assert chunked_run.cached_data_formats == ["challengers"]
+    result_cache = chunked_run.result_cache
+    entry = result_cache.get(chunked_run._get_cache_key("challenges"))
+    assert 0 < entry["chunks"]["revalidated"] <= 2 < entry["chunks"]["total"]
+    assert json.loads(json.dumps(full_run.issues)) == json.loads(
+        json.dumps(chunked_run.issues)
+    )
+
+
+def test_BEADChallengeDataValidator_append_only(temp_dir, challengers_data_file):
+    data_dir = temp_dir.join("appended")
+    data_dir.mkdir()
+    challengers_data_file.copy(data_dir.join("challengers.csv"))
+    challenges_file = data_dir.join("challenges.csv")
+    cache_dir = temp_dir.join("append_cache")
+    _write_large_challenges_file(challenges_file)
+    with open(challenges_file, "rb") as f:
+        content = f.read()
+    split_at = content.index(b"\n150,") + 1
+
+    def run(name, **kwargs):
+        return validator.BEADChallengeDataValidator(
+            data_dir,
+            results_dir=temp_dir.join(name),
+            single_error_log_limit=50,
+            row_stats=True,
+            **kwargs,
+        )
+
+    with open(challenges_file, "wb") as f:
+        f.write(content[:split_at])
+    first_run = run("first_append_run", cache_dir=cache_dir, append_only=True)
+    assert first_run.issues == run("first_full_run").issues
+
+    with open(challenges_file, "ab") as f:
+        f.write(content[split_at:])
+    second_run = run("second_append_run", cache_dir=cache_dir, append_only=True)
+    full_run = run("second_full_run")
+    assert json.loads(json.dumps(second_run.issues)) == json.loads(
+        json.dumps(full_run.issues)
+    )
+    assert second_run.row_counts == full_run.row_counts
+    assert second_run.row_error_stats == full_run.row_error_stats
+    entry = second_run.result_cache.get(second_run._get_cache_key("challenges"))
+    assert entry["appended"]["row_count"] == 150
+
+    # Changing an earlier record means the whole file is validated again.
+    with open(challenges_file, "wb") as f:
+        f.write(content.replace(b"\n1,N,3,", b"\n1,N,4,"))
+    third_run = run("third_append_run", cache_dir=cache_dir, append_only=True)
+    entry = third_run.result_cache.get(third_run._get_cache_key("challenges"))
+    assert entry["appended"]["row_count"] == 300
+    assert json.loads(json.dumps(third_run.issues)) == json.loads(
+        json.dumps(run("third_full_run").issues)
+    )
+
+
+def test_BEADChallengeDataValidator_row_error_stats(temp_dir):
+    _write_large_challenges_file(temp_dir.join("challenges.csv"))
+    # Failing rows are only tracked when asked for.
+    bcdv = validator.BEADChallengeDataValidator(
+        temp_dir, results_dir=temp_dir.join("untracked")
+    )
+    fv = bcdv.data_format_validators["challenges"].file_validator
+    assert fv.failure_bitmaps == {}
+    assert bcdv.row_error_stats == {}
+    extra_stats = {
+        es["data_format"]: es for es in bcdv._prepare_extra_summary_stats()
+    }
+    assert extra_stats["challenges"]["rows_with_errors"] == "N/A"
+
+    bcdv = validator.BEADChallengeDataValidator(temp_dir, row_stats=True)
+    fv = bcdv.data_format_validators["challenges"].file_validator
+    error_rows = set()
+    for label, bitmap in fv.failure_bitmaps.items():
+        if fv.failure_levels[label] == "error":
+            error_rows.update(bitmap)
+    stats = bcdv.row_error_stats["challenges"]
+    assert stats["rows_with_errors"] == len(error_rows) > 0
+    assert stats["rows_with_errors"] <= bcdv.row_counts["challenges"]
+    assert len(stats["co_failures"]) > 0
+    for label, other_label, num_rows in stats["co_failures"]:
+        both = set(fv.failure_bitmaps[label]) & set(fv.failure_bitmaps[other_label])
+        assert num_rows == len(both)
+    extra_stats = {
+        es["data_format"]: es for es in bcdv._prepare_extra_summary_stats()
+    }
+    assert extra_stats["challenges"]["rows_with_errors"] == stats["rows_with_errors"]
+    assert extra_stats["cai"]["rows_with_errors"] == "N/A"
+    with open(bcdv.reporter.report_file_path) as f:
+        assert "Validations Failing on the Same Rows" in f.read()
+
+
+@pytest.mark.parametrize("export_format", ["csv", "ndjson"])
+def test_BEADChallengeDataValidator_export_failures(temp_dir, export_format):
+    data_dir = temp_dir.join(f"export_{export_format}")
+    data_dir.mkdir()
+    _write_large_challenges_file(data_dir.join("challenges.csv"))
+    export_dir = temp_dir.join(f"failures_{export_format}")
+    bcdv = validator.BEADChallengeDataValidator(
+        data_dir,
+        single_error_log_limit=5,
+        export_failures_dir=export_dir,
+        export_format=export_format,
+        row_stats=True,
+    )
+    export_path = bcdv.failure_export_paths["challenges"]
+    assert export_path == export_dir.join(f"challenges_failures.{export_format}")
+    with open(export_path, newline="") as f:
+        if export_format == "csv":
+            records = list(csv.DictReader(f))
+        else:
+            records = [json.loads(line) for line in f]
+    technology_fails = [
+        r for r in records if r["validation"] == "technology (dtype)"
+    ]
+    assert len(technology_fails) == 60
+    assert {r["value"] for r in technology_fails} == {"seventy"}
+    # The log and report stay capped at single_error_log_limit.
+    dtype_issue = [
+        i
+        for i in bcdv.issues
+        if i["issue_type"] == "column_dtype_validation"
+        and i["issue_details"]["column"] == "technology"
+    ][0]
+    assert dtype_issue["issue_details"]["number_of_uncastable_values"] == 60
+    logged_rows = dtype_issue["issue_details"]["failing_rows_and_values"]
+    assert len(logged_rows) == 5
+    assert [str(r[0]) for r in logged_rows] == [
+        str(r["row_number"]) for r in technology_fails[:5]
+    ]
+    fv = bcdv.data_format_validators["challenges"].file_validator
+    assert len(records) == sum(len(b) for b in fv.failure_bitmaps.values())
+    with pytest.raises(ValueError):
+        validator.BEADChallengeDataValidator(data_dir, export_format="xlsx")
+
+
+def test_BEADChallengeDataValidator_split_output(temp_dir):
+    data_dir = temp_dir.join("split")
+    data_dir.mkdir()
+    challenges_file = data_dir.join("challenges.csv")
+    _write_large_challenges_file(challenges_file)
+    split_dir = temp_dir.join("split_output")
+    bcdv = validator.BEADChallengeDataValidator(
+        data_dir, split_output_dir=split_dir
+    )
+    fv = bcdv.data_format_validators["challenges"].file_validator
+    error_rows = set()
+    for label, bitmap in fv.failure_bitmaps.items():
+        if fv.failure_levels[label] == "error":
+            error_rows.update(bitmap)
+    counts = bcdv.split_row_counts["challenges"]
+    assert counts == {"valid": 300 - len(error_rows), "rejected": len(error_rows)}
+    assert 0 < counts["valid"] and 0 < counts["rejected"]
+
+    with open(challenges_file, "rb") as f:
+        original = f.read()
+    with open(split_dir.join("challenges.valid.csv"), "rb") as f:
+        valid = f.read()
+    with open(split_dir.join("challenges.rejected.csv"), "rb") as f:
+        rejected = f.read()
+    header, _ = original.split(b"\n", 1)
+    assert valid.startswith(header + b"\n")
+    assert rejected.startswith(header + b",reasons\n")
+    # Valid records (including the multiline one) keep their original bytes.
+    assert 'as.pdf,"Lorem,\nipsum",106'.encode() in valid
+    valid_rows = list(csv.reader(io.StringIO(valid.decode(), newline="")))[1:]
+    assert all(row[8] != "seventy" for row in valid_rows)
+    rejected_rows = list(csv.DictReader(io.StringIO(rejected.decode(), newline="")))
+    assert len(rejected_rows) == counts["rejected"]
+    seventy_rows = [r for r in rejected_rows if r["technology"] == "seventy"]
+    assert len(seventy_rows) == 60
+    assert all("technology (dtype)" in r["reasons"] for r in seventy_rows)
+    # Apart from the second header and the reasons, every byte is kept.
+    added_bytes = len(header + b",reasons\n") + sum(
+        len(f",{r['reasons']}") for r in rejected_rows
+    )
+    assert len(valid) + len(rejected) == len(original) + added_bytes
+
+
+def test_BEADChallengeDataValidator_most_common_invalid_values(temp_dir):
+    data_dir = temp_dir.join("most_common")
+    data_dir.mkdir()
+    _write_large_challenges_file(data_dir.join("challenges.csv"))
+    bcdv = validator.BEADChallengeDataValidator(data_dir, single_error_log_limit=5)
+    issues = {
+        (i["issue_type"], i["issue_details"].get("column")): i["issue_details"]
+        for i in bcdv.issues
+    }
+    dtype_details = issues[("column_dtype_validation", "technology")]
+    assert dtype_details["most_common_invalid_values"] == [["seventy", 60]]
+    assert dtype_details["most_common_counts_exact"]
+    contents_details = issues[("column_contents_validation", "technology")]
+    assert contents_details["most_common_invalid_values"] == [["seventy", 60]]
+    assert len(contents_details["failing_rows_and_values"]) == 5
+    with open(bcdv.reporter.report_file_path) as f:
+        assert "Most common invalid values" in f.read()
+
+
+def test_BEADChallengeDataValidator_chunked_most_common_invalid_values(
+    temp_dir, monkeypatch
+):
+    monkeypatch.setattr(incremental, "AVERAGE_CHUNK_RECORDS", 64)
+    monkeypatch.setattr(incremental, "MIN_CHUNK_RECORDS", 32)
+    monkeypatch.setattr(incremental, "MAX_CHUNK_RECORDS", 128)
+    data_dir = temp_dir.join("chunked_most_common")
+    data_dir.mkdir()
+    # Each chunk has more than 10 values more common in it than "x", the most
+    #   common value in the whole file.
+    technologies = ["x" if i % 20 == 0 else f"v{i // 5}" for i in range(400)]
+    _write_large_challenges_file(
+        data_dir.join("challenges.csv"),
+        extra_rows=[
+            (
+                0,
+                f"{1000 + i},N,3,2024-05-19,,2024-07-01,A,579751,{technology},"
+                "6982608163,,,wife.pdf,,Scientist you to that open.,,333,,491,96.41\n",
+            )
+            for i, technology in enumerate(technologies)
+        ],
+    )
+
+    def run(name, **kwargs):
+        return validator.BEADChallengeDataValidator(
+            data_dir, results_dir=temp_dir.join(name), **kwargs
+        )
+
+    full_run = run("full_run")
+    chunked_run = run("chunked_run", cache_dir=temp_dir.join("most_common_cache"))
+    entry = chunked_run.result_cache.get(chunked_run._get_cache_key("challenges"))
+    assert entry["chunks"]["total"] > 2
+    issues = {
+        (i["issue_type"], i["issue_details"].get("column")): i["issue_details"]
+        for i in chunked_run.issues
+    }
+    contents_details = issues[("column_contents_validation", "technology")]
+    assert contents_details["most_common_invalid_values"][0] == ["seventy", 60]
+    assert contents_details["most_common_invalid_values"][1] == ["x", 20]
+    assert "invalid_value_counters" not in contents_details
+    assert json.loads(json.dumps(full_run.issues)) == json.loads(
+        json.dumps(chunked_run.issues)
+    )
+
+
+def test_BEADChallengeDataValidator_column_profiles(temp_dir):
+    data_dir = temp_dir.join("profiles")
+    data_dir.mkdir()
+    _write_large_challenges_file(data_dir.join("challenges.csv"))
+    bcdv = validator.BEADChallengeDataValidator(data_dir)
+    extra_stats = {
+        es["data_format"]: es for es in bcdv._prepare_extra_summary_stats()
+    }
+    profiles = extra_stats["challenges"]["column_profiles"]
+    assert extra_stats["cai"]["column_profiles"] == {}
+    assert "index" not in profiles
+    assert profiles["challenge"]["distinct_count"] == 300
+    assert profiles["challenge"]["distinct_count_exact"]
+    assert profiles["challenge_type"]["distinct_count"] == 5
+    assert profiles["challenge_type"]["min"] is None
+    assert profiles["rebuttal_date"]["null_ratio"] == 0.4
+    assert profiles["challenge_date"]["min"] == "2024-01-16"
+    assert profiles["challenge_date"]["max"] == "2024-05-19"
+    assert profiles["latency"]["min"] == 96.41
+    assert profiles["latency"]["max"] == 197.65
+    # Uncastable values count towards the lengths but not the numeric range.
+    assert profiles["technology"]["min"] == 0
+    assert profiles["technology"]["max"] == 70
+    assert profiles["technology"]["max_length"] == len("seventy")
+
+    with open(bcdv.log_path) as f:
+        issue_log = json.load(f)
+    assert issue_log["issues"] == json.loads(json.dumps(bcdv.issues))
+    assert issue_log["metadata"]["column_profiles"]["challenges"] == profiles
+    with open(bcdv.reporter.report_file_path) as f:
+        assert "Column Profiles" in f.read()
+    # Reports can also be built from the log alone.
+    reporter = reporting.ReportGenerator(bcdv.log_path, overwrite_report=True)
+    assert "Column Profiles" in reporter.final_report
+
+
+def test_first_failure_sampling_keeps_the_first_failing_rows(temp_dir, monkeypatch):
+    def fail(*args, **kwargs):
+        raise AssertionError("FailureSample is only for reservoir sampling")
+
+    # In "first" mode, the failing rows are just the first ones found.
+    monkeypatch.setattr(validator, "FailureSample", fail)
+    _write_large_challenges_file(temp_dir.join("challenges.csv"))
+    bcdv = validator.BEADChallengeDataValidator(temp_dir, single_error_log_limit=4)
+    dtype_issue = [
+        i
+        for i in bcdv.issues
+        if i["issue_type"] == "column_dtype_validation"
+        and i["issue_details"]["column"] == "technology"
+    ][0]
+    details = dtype_issue["issue_details"]
+    assert details["number_of_uncastable_values"] > 4
+    failing_rows = details["failing_rows_and_values"]
+    assert len(failing_rows) == 4
+    assert failing_rows == sorted(failing_rows)
+    assert "failure_sampling" not in details
+
+
+def test_BEADChallengeDataValidator_reservoir_failure_sampling(
+    temp_dir, monkeypatch
+):
+    monkeypatch.setattr(incremental, "AVERAGE_CHUNK_RECORDS", 8)
+    monkeypatch.setattr(incremental, "MIN_CHUNK_RECORDS", 4)
+    monkeypatch.setattr(incremental, "MAX_CHUNK_RECORDS", 32)
+    data_dir = temp_dir.join("sampled")
+    data_dir.mkdir()
+    _write_large_challenges_file(data_dir.join("challenges.csv"))
+
+    def run(name, **kwargs):
+        return validator.BEADChallengeDataValidator(
+            data_dir,
+            results_dir=temp_dir.join(name),
+            single_error_log_limit=10,
+            **kwargs,
+        )
+
+    first_run = run("first_run")
+    full_run = run("full_run", failure_sampling="reservoir", sampling_seed=1)
+    rerun = run("rerun", failure_sampling="reservoir", sampling_seed=1)
+    chunked_run = run(
+        "chunked_run",
+        failure_sampling="reservoir",
+        sampling_seed=1,
+        cache_dir=temp_dir.join("sampled_cache"),
+    )
+    result_cache = chunked_run.result_cache
+    entry = result_cache.get(chunked_run._get_cache_key("challenges"))
+    assert entry["chunks"]["total"] > 2
+    assert full_run.issues == rerun.issues
+    assert json.loads(json.dumps(full_run.issues)) == json.loads(
+        json.dumps(chunked_run.issues)
+    )
+
+    def get_failing_rows(bcdv):
+        for issue in bcdv.issues:
+            details = issue["issue_details"]
+            if (
+                issue["issue_type"] == "column_contents_validation"
+                and details["column"] == "technology"
+            ):
+                return details, details["failing_rows_and_values"]
+
+    first_details, first_rows = get_failing_rows(first_run)
+    details, sampled_rows = get_failing_rows(full_run)
+    assert "failure_sampling" not in first_details
+    assert details["failure_sampling"] == "reservoir"
+    assert details["total_fails"] == 60
+    assert len(sampled_rows) == 10
+    assert sampled_rows[:3] == first_rows[:3]
+    assert sampled_rows != first_rows
+    assert sampled_rows[-1][0] > first_rows[-1][0]
+    with open(full_run.reporter.report_file_path) as f:
+        assert "a random sample of the rest" in f.read()
+    with pytest.raises(ValueError):
+        run("bad_run", failure_sampling="last")
+
+
+def test_BEADChallengeDataValidator_reports_issues_from_memory(temp_dir):
+    data_dir = temp_dir.join("in_memory")
+    data_dir.mkdir()
+    _write_large_challenges_file(data_dir.join("challenges.csv"))
+    bcdv = validator.BEADChallengeDataValidator(data_dir, single_error_log_limit=5)
+    with open(bcdv.log_path) as f:
+        log_text = f.read()
+    # The log is written compactly.
+    assert "\n" not in log_text
+    assert json.loads(log_text)["issues"] == json.loads(json.dumps(bcdv.issues))
+    report = bcdv.reporter.final_report
+    # The report is the same as one generated from the log on disk.
+    reporter = reporting.ReportGenerator(
+        bcdv.log_path,
+        extra_stats=bcdv._prepare_extra_summary_stats(),
+        max_error_rows=5,
+        overwrite_report=True,
+    )
+    assert reporter.final_report == report
+
+
+def test_BEADChallengeDataValidator_records_run_history(temp_dir):
+    data_dir = temp_dir.join("history_run")
+    data_dir.mkdir()
+    _write_large_challenges_file(data_dir.join("challenges.csv"))
+    history_db = temp_dir.join("history", "runs.db")
+    runs = [
+        validator.BEADChallengeDataValidator(
+            data_dir,
+            results_dir=temp_dir.join(f"history_run_{i}"),
+            history_db=history_db,
+            cache_dir=temp_dir.join("history_cache"),
+        )
+        for i in range(2)
+    ]
+    assert runs[1].cached_data_formats == ["challenges"]
+    with RunHistory(history_db) as history:
+        trend = history.get_trend("history_run")
+        assert len(trend) == 2
+        assert trend[0]["num_issues"] == trend[1]["num_issues"] > 0
+        assert trend[0]["duration_seconds"] is not None
+        (recorded_issues,) = history.connection.execute(
+            "SELECT COUNT(*) FROM run_issues WHERE run_id = ?", [trend[0]["run_id"]]
+        ).fetchone()
+        assert recorded_issues == len(runs[0].issues)
+        run_files = history.connection.execute(
+            "SELECT * FROM run_files ORDER BY run_id"
+        ).fetchall()
+        assert [f["data_format"] for f in run_files] == ["challenges", "challenges"]
+        assert run_files[0]["file_hash"] == run_files[1]["file_hash"]
+        assert run_files[0]["row_count"] == runs[0].row_counts["challenges"]
+
+
+def test_BEADChallengeDataValidator_max_workers(temp_dir, challengers_data_file):
+    data_dir = temp_dir.join("max_workers")
+    data_dir.mkdir()
+    challengers_data_file.copy(data_dir.join("challengers.csv"))
+    _write_large_challenges_file(data_dir.join("challenges.csv"))
+    runs = [
+        validator.BEADChallengeDataValidator(
+            data_dir,
+            results_dir=temp_dir.join(f"max_workers_{max_workers}"),
+            max_workers=max_workers,
+        )
+        for max_workers in [0, 1, 3]
+    ]
+    # max_workers <= 1 validates the files one at a time, and all the same issues
+    #   are found however many threads are used.
+    for run in runs[1:]:
+        assert run.issues == runs[0].issues
+
+
+@pytest.mark.parametrize("report_layout", ["single", "paginated"])
+def test_diff_report_keeps_the_run_report(temp_dir, report_layout):
+    data_dir = temp_dir.join(f"diff_report_{report_layout}")
+    data_dir.mkdir()
+    challenges_file = data_dir.join("challenges.csv")
+    _write_large_challenges_file(challenges_file)
+    runs = []
+    for i in range(2):
+        runs.append(
+            validator.BEADChallengeDataValidator(
+                data_dir,
+                results_dir=temp_dir.join(f"diff_report_{report_layout}_{i}"),
+                report_layout=report_layout,
+            )
+        )
+        with open(challenges_file, "rb") as f:
+            content = f.read()
+        with open(challenges_file, "wb") as f:
+            f.write(content.replace(b"\n1,N,3,", b"\n1,N,,"))
+    report = runs[1].reporter.final_report
+    main.diff_main([str(runs[0].log_path), str(runs[1].log_path), "--report"])
+    # The run's own report is untouched, and the report on the changes has the
+    #   same summary stats (rebuilt from the log's metadata) and layout.
+    assert runs[1].reporter.final_report == report
+    report_path = Path(runs[1].reporter.report_file_path)
+    if report_layout == "paginated":
+        changes_path = report_path.parent.with_name(
+            f"{report_path.parent.name}_changes"
+        ).joinpath("index.html")
+    else:
+        changes_path = report_path.with_name(f"{report_path.stem}_changes.html")
+    changes_report = changes_path.read_text(encoding="utf-8")
+    assert "<h2>Changes Since the Previous Run</h2>" in changes_report
+    for stat in ["total_rows_in_file", "rows_with_errors", "Column Profiles"]:
+        assert stat in report
+        assert stat in changes_report
+
+
+def test_main_validates_a_data_directory_named_like_a_mode(temp_dir, monkeypatch):
+    calls = []
+    monkeypatch.setitem(main.MODE_MAINS, "fix", calls.append)
+    monkeypatch.setattr(
+        validator.BEADChallengeDataValidator,
+        "__init__",
+        lambda self, data_directory, **kwargs: calls.append(data_directory),
+    )
+    monkeypatch.chdir(temp_dir)
+    monkeypatch.setattr(sys, "argv", ["bead_inspector", "fix", "data"])
+    main.main()
+    assert calls == [["data"]]
+
+    temp_dir.mkdir("fix")
+    monkeypatch.setattr(sys, "argv", ["bead_inspector", "fix"])
+    main.main()
+    assert calls[-1] == Path(temp_dir.join("fix")).resolve()
+
+
+def test_BEADChallengeDataValidator_logs_performance(temp_dir):
+    data_dir = temp_dir.join("performance_run")
+    data_dir.mkdir()
+    _write_large_challenges_file(data_dir.join("challenges.csv"))
+    runs = [
+        validator.BEADChallengeDataValidator(
+            data_dir, results_dir=temp_dir.join(f"performance_run_{i}"), **kwargs
+        )
+        for i, kwargs in enumerate(
+            [{}, {"cache_dir": temp_dir.join("performance_cache")}]
+        )
+    ]
+    for run in runs:
+        performance = run.log_metadata["performance"]
+        stats = performance["data_formats"]["challenges"]
+        assert set(performance["data_formats"]) == set(run.data_format_to_path_map)
+        assert stats["row_count"] == 300
+        assert stats["seconds"] > 0
+        assert stats["rows_per_second"] == round(300 / stats["seconds"], 1)
+        # Peak memory is only measured for the whole run.
+        assert "peak_memory_mb" in performance
+        assert "peak_memory_mb" not in stats
+        for stage in [
+            "encoding_detection",
+            "parsing",
+            "type_casting",
+            "validate_column_types",
+            "validate_row_contents",
+        ]:
+            assert stage in stats["stages"]
+        assert "ChallengesRebuttalDateAndFileRuleValidator" in stats["validators"]
+        # Nested stages aren't counted twice.
+        timed_seconds = sum(stats["stages"].values()) + sum(
+            stats["validators"].values()
+        )
+        assert timed_seconds <= stats["seconds"] + 1e-3
+        assert performance["cross_file_check_seconds"] >= 0
+        assert "report_rendering" in run.timings
+        with open(run.log_path) as f:
+            assert json.load(f)["metadata"]["performance"] == performance
+        report = run.reporter.final_report
+        assert "<h2>Performance</h2>" in report
+        assert "<h3>challenges.csv</h3>" in report
+    # The second run validated the file in chunks, and a third reuses its results.
+    assert "chunks" in runs[1].result_cache.get(runs[1]._get_cache_key("challenges"))
+    cached_run = validator.BEADChallengeDataValidator(
+        data_dir,
+        results_dir=temp_dir.join("performance_run_2"),
+        cache_dir=temp_dir.join("performance_cache"),
+    )
+    stats = cached_run.log_metadata["performance"]["data_formats"]["challenges"]
+    assert stats["from_cache"] is True
+    assert stats["seconds"] is None
+    assert stats["stages"] == {}
+    assert "N/A; results reused from the cache." in cached_run.reporter.final_report
+
+
+def test_BEADChallengeDataValidator_logs_a_table_of_failing_rows(temp_dir):
+    data_dir = temp_dir.join("failing_row_table")
+    data_dir.mkdir()
+    with open(data_dir.join("challenges.csv"), "w", newline="") as f:
+        f.write(
+            "challenge,challenge_type,challenger,challenge_date,rebuttal_date,"
+            "resolution_date,disposition,provider_id,technology,location_id,"
+            "unit,reason_code,evidence_file_id,response_file_id,resolution,"
+            "advertised_download_speed,download_speed,advertised_upload_speed,"
+            "upload_speed,latency\n"
+            "2,,,2024-03-18,2024-03-01,,,,,,,,,,,,,,,\n"
+        )
+    bcdv = validator.BEADChallengeDataValidator(
+        data_dir, results_dir=temp_dir.join("failing_row_table_run")
+    )
+    rule_issues = {
+        i["issue_details"]["validation"]: i["issue_details"]
+        for i in bcdv.issues
+        if i["issue_type"] == "row_rule_validation"
+    }
+    # The row breaks both rules, but its values are only stored once.
+    for rule in [
+        "ChallengesRebuttalDateAndFileRuleValidator",
+        "ChallengesChallengeAndRebuttalDateRuleValidator",
+    ]:
+        assert rule_issues[rule]["failing_rows_and_values"] == [(2, "2", None)]
+    (row_values,) = bcdv.failing_rows["challenges"].values()
+    assert row_values["challenge_date"] == "2024-03-18"
+    assert row_values["rebuttal_date"] == "2024-03-01"
+    assert "resolution" not in row_values
+    with open(bcdv.log_path) as f:
+        issue_log = json.load(f)
+    assert issue_log["metadata"]["failing_rows"] == bcdv.failing_rows
+    # The report looks the values up in the table.
+    report = bcdv.reporter.final_report
+    assert (
+        "<td>2</td><td>&#x27;2&#x27;</td><td>&#x27;2024-03-18&#x27;</td>"
+        "<td>&#x27;2024-03-01&#x27;</td>"
+    ) in report
+    assert "MISSING COLUMN" not in report
+    reporter = reporting.ReportGenerator(
+        bcdv.log_path,
+        extra_stats=bcdv._prepare_extra_summary_stats(),
+        overwrite_report=True,
+    )
+    assert reporter.final_report == report
+
+
+@pytest.mark.parametrize("log_format", ["ndjson", "ndjson.gz"])
+def test_BEADChallengeDataValidator_ndjson_issue_log(
+    temp_dir, challengers_data_file, log_format, monkeypatch
+):
+    data_dir = temp_dir.join(f"ndjson_{log_format}")
+    data_dir.mkdir()
+    challengers_data_file.copy(data_dir.join("challengers.csv"))
+    _write_large_challenges_file(data_dir.join("challenges.csv"))
+    open_log = gzip.open if log_format.endswith(".gz") else open
+
+    bcdv = validator.BEADChallengeDataValidator(
+        data_dir, results_dir=temp_dir.join(f"{log_format}_run"), log_format=log_format
+    )
+    assert bcdv.log_path.name.endswith(f".{log_format}")
+    with open_log(bcdv.log_path, "rt") as f:
+        records = [json.loads(line) for line in f]
+    assert records[-1] == {"metadata": json.loads(json.dumps(bcdv.log_metadata))}
+    # The challenges file's table of failing rows is logged before its issues.
+    assert list(bcdv.failing_rows) == ["challenges"]
+    assert len(records) == len(bcdv.issues) + 2
+    row_table_position = records.index({"failing_rows": bcdv.failing_rows})
+    assert records[row_table_position + 1]["data_format"] == "challenges"
+    reporter = reporting.ReportGenerator(
+        bcdv.log_path,
+        extra_stats=bcdv._prepare_extra_summary_stats(),
+        overwrite_report=True,
+    )
+    assert reporter.final_report == bcdv.reporter.final_report
+    assert reporter.report_file_path.name.endswith(".html")
+
+    # A run that crashes after validating every file still logs their issues.
+    def crash(self):
+        raise RuntimeError("crashed")
+
+    monkeypatch.setattr(
+        validator.BEADChallengeDataValidator, "add_skipped_format_issues", crash
+    )
+    with pytest.raises(RuntimeError):
+        validator.BEADChallengeDataValidator(
+            data_dir,
+            results_dir=temp_dir.join(f"{log_format}_crash"),
+            log_format=log_format,
+        )
+    (log_path,) = temp_dir.join(f"{log_format}_crash", "logs").listdir()
+    logged_formats = {
+        i["data_format"] for i in reporting.ReportGenerator(log_path).issues
+    }
+    assert {"cai", "challenges"} <= logged_formats
+
+    # As does a log cut off partway through a record.
+    with open(log_path, "rb") as f:
+        log_bytes = f.read()
+    with open(log_path, "wb") as f:
+        f.write(log_bytes[: len(log_bytes) - 10])
+    reporter = reporting.ReportGenerator(log_path, overwrite_report=True)
+    assert 0 < len(reporter.issues)
+    assert "challenges" in {i["data_format"] for i in reporter.issues}
+
+
+def test_BEADChallengeDataValidator_paginated_report(temp_dir):
+    data_dir = temp_dir.join("paginated")
+    data_dir.mkdir()
+    _write_large_challenges_file(data_dir.join("challenges.csv"))
+    bcdv = validator.BEADChallengeDataValidator(
+        data_dir, report_layout="paginated", max_workers=2
+    )
+    report_file_path = bcdv.reporter.report_file_path
+    assert report_file_path.name == "index.html"
+    assert report_file_path.parent.joinpath("challenges.html").is_file()
+    assert "Column Profiles" in bcdv.reporter.final_report
+    with pytest.raises(ValueError):
+        validator.BEADChallengeDataValidator(data_dir, report_layout="tabbed")